@@ -0,0 +1,194 @@
+"""Shared async HTTP helpers for the Gitee upload scripts.
+
+Both upload_to_gitee.py and upload_tts_to_gitee.py open their session here so
+that connection pooling, DNS caching, retry/backoff and adaptive concurrency
+behave the same way in each.
+"""
+import asyncio
+import random
+import time
+from collections import deque
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+GITEE_API = "https://gitee.com/api/v5/repos"
+
+MAX_RETRIES = 5
+
+BACKOFF_BASE = 0.5  # seconds
+BACKOFF_CAP = 30.0  # seconds
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+_rng = random.Random()
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Capped exponential backoff with jitter, never shorter than Retry-After."""
+    wait = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt) + _rng.uniform(0, BACKOFF_BASE)
+    if retry_after:
+        try:
+            wait = max(wait, float(retry_after))
+        except ValueError:
+            pass  # HTTP-date form; fall back to computed backoff
+    return wait
+
+
+class AIMDController:
+    """Adaptive limit on in-flight requests (additive increase, multiplicative decrease).
+
+    Successful responses grow the limit by ``increase``; 429s, 5xx, network
+    errors or a sustained mean latency above ``latency_target`` shrink it by
+    ``decrease``, so concurrency settles just below Gitee's real quota.
+    """
+
+    def __init__(self, initial=8, minimum=1, maximum=32, increase=0.5,
+                 decrease=0.5, latency_target=10.0, window=20):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.latencies = deque(maxlen=window)
+        self.in_flight = 0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_result(self, status, latency=None):
+        """Adjust the limit from one response (status 0 means network error)."""
+        if latency is not None:
+            self.latencies.append(latency)
+        congested = status == 0 or status == 429 or status >= 500
+        if (not congested and len(self.latencies) == self.latencies.maxlen
+                and sum(self.latencies) / len(self.latencies) > self.latency_target):
+            congested = True
+        if congested:
+            self.limit = max(self.minimum, self.limit * self.decrease)
+            self.latencies.clear()
+        else:
+            self.limit = min(self.maximum, self.limit + self.increase)
+
+
+async def api_request(session, limiter, url, data=None, method="GET", max_retries=MAX_RETRIES):
+    """Make an API request with retry."""
+    for attempt in range(max_retries):
+        try:
+            async with limiter:
+                started = time.monotonic()
+                if isinstance(data, (bytes, bytearray)):
+                    request = session.request(
+                        method, url, data=data, headers={"Content-Type": "application/json"}
+                    )
+                else:
+                    request = session.request(method, url, json=data)
+                async with request as resp:
+                    status = resp.status
+                    retry_after = resp.headers.get("Retry-After")
+                    if status < 400:
+                        result = await resp.json(content_type=None)
+                    else:
+                        body = (await resp.text())[:300]
+                limiter.on_result(status, time.monotonic() - started)
+        except Exception as e:
+            limiter.on_result(0)
+            if attempt < max_retries - 1:
+                wait = backoff_delay(attempt)
+                print(f"    Error: {e}, retrying in {wait:.1f}s...")
+                await asyncio.sleep(wait)
+                continue
+            print(f"    FAILED: {e}")
+            return None, 0
+
+        if status < 400:
+            return result, status
+        if status == 404:
+            return None, 404
+        # Client errors (401/403/422...) will not succeed on retry
+        if status in RETRYABLE_STATUS and attempt < max_retries - 1:
+            wait = backoff_delay(attempt, retry_after)
+            print(f"    HTTP {status}, retrying in {wait:.1f}s... ({body})")
+            await asyncio.sleep(wait)
+        else:
+            print(f"    FAILED HTTP {status}: {body}")
+            return None, status
+
+
+def open_session(limit=32, timeout=None):
+    """
+    Create a ClientSession over a keep-alive pool with a 5 minute DNS cache.
+
+    Must be called from inside the running event loop.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        keepalive_timeout=60,
+        ttl_dns_cache=300,
+        enable_cleanup_closed=True,
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+async def read_chunks(local_path, chunk_size):
+    """Yield a file in chunk_size pieces, reading off the event loop."""
+    with open(local_path, "rb") as f:
+        while True:
+            chunk = await asyncio.to_thread(f.read, chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+async def upload_release_asset(session, owner, repo, release_id, token, local_path,
+                               filename, chunk_size, timeout):
+    """
+    Stream a file to a release's attach_files endpoint as chunked multipart.
+
+    Memory use stays O(chunk_size) regardless of file size. Returns
+    ``(status, response_text)``; network errors propagate to the caller.
+    """
+    url = f"{GITEE_API}/{owner}/{repo}/releases/{release_id}/attach_files"
+    form = aiohttp.FormData()
+    form.add_field("access_token", token)
+    form.add_field(
+        "file",
+        read_chunks(local_path, chunk_size),
+        filename=filename,
+        content_type="application/octet-stream",
+    )
+    async with session.post(url, data=form, chunked=True, timeout=timeout) as resp:
+        return resp.status, await resp.text()
+
+
+def run(coro):
+    """
+    Run a coroutine to completion on one event loop.
+
+    Uses asyncio.run normally; inside an already running loop (e.g. Jupyter)
+    it falls back to nest_asyncio so the scripts' main() can still be called.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    try:
+        import nest_asyncio
+    except ImportError:
+        coro.close()
+        raise RuntimeError(
+            "An event loop is already running. Run: pip install nest_asyncio"
+        )
+    nest_asyncio.apply()
+    return asyncio.get_event_loop().run_until_complete(coro)
@@ -1,97 +1,141 @@
 """Upload word list files to Gitee repo via API with retry and rate limiting."""
+import asyncio
 import base64
+import hashlib
 import json
 import os
 import sys
-import time
-import urllib.request
-import urllib.error
 
-TOKEN = sys.argv[1] if len(sys.argv) > 1 else ""
+from gitee_client import GITEE_API, AIMDController, aiohttp, api_request, open_session, run
+
+_ARGS = [a for a in sys.argv[1:] if not a.startswith("--")]
+TOKEN = _ARGS[0] if _ARGS else ""
+FORCE = "--force" in sys.argv[1:]
 OWNER = "lratusa"
 REPO = "wordmaster-wordlists"
-BASE_API = f"https://gitee.com/api/v5/repos/{OWNER}/{REPO}/contents"
+BASE_API = f"{GITEE_API}/{OWNER}/{REPO}/contents"
 ASSETS_DIR = os.path.join(os.path.dirname(__file__), "..", "assets", "wordlists")
+# remote_path -> git blob sha of the content last confirmed on Gitee
+MANIFEST_PATH = os.path.join(ASSETS_DIR, ".gitee_manifest.json")
+
+INITIAL_CONCURRENCY = 8
+MAX_CONCURRENT_UPLOADS = 32
+REQUEST_TIMEOUT = 120  # seconds
+B64_BLOCK_SIZE = 48 * 1024  # multiple of 3: no base64 padding between blocks
 
-MAX_RETRIES = 3
-DELAY_BETWEEN_UPLOADS = 2  # seconds
-
-
-def api_request(url, data=None, method="GET"):
-    """Make an API request with retry."""
-    for attempt in range(MAX_RETRIES):
-        try:
-            if data is not None:
-                req = urllib.request.Request(
-                    url,
-                    data=json.dumps(data).encode(),
-                    headers={"Content-Type": "application/json"},
-                    method=method,
-                )
-            else:
-                req = urllib.request.Request(url, method=method)
-            resp = urllib.request.urlopen(req, timeout=120)
-            return json.loads(resp.read()), resp.status
-        except urllib.error.HTTPError as e:
-            body = e.read().decode()[:300]
-            if e.code == 404:
-                return None, 404
-            if attempt < MAX_RETRIES - 1:
-                wait = (attempt + 1) * 5
-                print(f"    HTTP {e.code}, retrying in {wait}s... ({body})")
-                time.sleep(wait)
-            else:
-                print(f"    FAILED HTTP {e.code}: {body}")
-                return None, e.code
-        except Exception as e:
-            if attempt < MAX_RETRIES - 1:
-                wait = (attempt + 1) * 5
-                print(f"    Error: {e}, retrying in {wait}s...")
-                time.sleep(wait)
-            else:
-                print(f"    FAILED: {e}")
-                return None, 0
-
-
-def file_exists(remote_path):
+async def file_exists(session, limiter, remote_path):
     """Check if file already exists on Gitee, return sha if so."""
     url = f"{BASE_API}/{remote_path}?access_token={TOKEN}"
-    data, status = api_request(url)
+    data, status = await api_request(session, limiter, url)
     if status == 200 and data and isinstance(data, dict):
         return data.get("sha", "")
     return None
 
 
-def upload_file(local_path, remote_path):
+def load_manifest():
+    """Load the local upload manifest, or an empty one if missing/corrupt."""
+    if FORCE or not os.path.exists(MANIFEST_PATH):
+        return {}
+    try:
+        with open(MANIFEST_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Warning: ignoring unreadable manifest: {e}")
+        return {}
+
+
+def save_manifest(manifest):
+    """Write the upload manifest back to disk."""
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def read_base64(local_path):
+    """Stream-encode a local file, returning its base64 bytes and git blob sha.
+
+    The git blob SHA-1 (sha1 of "blob <size>\\0" + content) is the value Gitee
+    reports as a file's sha, so it can be compared against remote files.
+
+    Blocks are a multiple of 3 bytes so no padding appears mid-stream, and the
+    raw file is never held in memory alongside its encoding.
+    """
+    encoded = bytearray()
+    with open(local_path, "rb") as f:
+        digest = hashlib.sha1(f"blob {os.fstat(f.fileno()).st_size}\0".encode())
+        while chunk := f.read(B64_BLOCK_SIZE):
+            digest.update(chunk)
+            encoded += base64.b64encode(chunk)
+    return encoded, digest.hexdigest()
+
+
+def build_body(content, message, sha=None):
+    """Build the JSON body for a create/update request around pre-encoded content.
+
+    Base64 output needs no JSON escaping, so it is spliced in as-is instead of
+    round-tripping through a str and json.dumps.
+    """
+    fields = {"access_token": TOKEN, "message": message}
+    if sha:
+        fields["sha"] = sha
+    head = json.dumps(fields)[:-1]
+    return b"".join([head.encode(), b', "content": "', content, b'"}'])
+
+
+async def upload_file(session, limiter, manifest, local_path, remote_path):
     """Upload a single file to Gitee."""
     size_kb = os.path.getsize(local_path) / 1024
 
-    # Check if already exists
-    sha = file_exists(remote_path)
-    if sha:
-        print(f"  EXISTS   {remote_path} ({size_kb:.0f} KB) - skipping")
+    # Read off the event loop so other uploads keep making progress
+    content, local_sha = await asyncio.to_thread(read_base64, local_path)
+
+    # Unchanged since the last confirmed upload: no API call at all
+    if manifest.get(remote_path) == local_sha:
+        print(f"  CACHED   {remote_path} ({size_kb:.0f} KB) - skipping")
         return True
 
-    with open(local_path, "rb") as f:
-        content = base64.b64encode(f.read()).decode("ascii")
-
-    payload = {
-        "access_token": TOKEN,
-        "content": content,
-        "message": f"Add {remote_path}",
-    }
-    data, status = api_request(f"{BASE_API}/{remote_path}", payload, "POST")
+    # Check if already exists; Gitee's sha is a git blob sha, comparable locally
+    remote_sha = await file_exists(session, limiter, remote_path)
+    if remote_sha == local_sha:
+        print(f"  EXISTS   {remote_path} ({size_kb:.0f} KB) - unchanged, skipping")
+        manifest[remote_path] = local_sha
+        return True
+
+    if remote_sha:
+        payload = build_body(content, f"Update {remote_path}", remote_sha)
+        method, label = "PUT", "UPDATED "
+    else:
+        payload = build_body(content, f"Add {remote_path}")
+        method, label = "POST", "CREATED "
+    del content
+    data, status = await api_request(
+        session, limiter, f"{BASE_API}/{remote_path}", payload, method
+    )
+
     if status in (200, 201):
-        print(f"  CREATED  {remote_path} ({size_kb:.0f} KB)")
+        print(f"  {label} {remote_path} ({size_kb:.0f} KB)")
+        manifest[remote_path] = local_sha
         return True
     else:
         print(f"  ERROR    {remote_path} ({size_kb:.0f} KB) - status {status}")
         return False
 
 
+async def upload_all(files, manifest):
+    """Upload all files concurrently over a shared connection pool."""
+    limiter = AIMDController(initial=INITIAL_CONCURRENCY, maximum=MAX_CONCURRENT_UPLOADS)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    async with open_session(limit=MAX_CONCURRENT_UPLOADS, timeout=timeout) as session:
+        return await asyncio.gather(
+            *(upload_file(session, limiter, manifest, local, remote) for local, remote in files)
+        )
+
+
 def main():
     if not TOKEN:
-        print("Usage: python upload_to_gitee.py <gitee_access_token>")
+        print("Usage: python upload_to_gitee.py <gitee_access_token> [--force]")
+        sys.exit(1)
+    if aiohttp is None:
+        print("aiohttp package not installed. Run: pip install aiohttp")
         sys.exit(1)
 
     # Collect all JSON files
@@ -108,18 +152,13 @@ def main():
 
     print(f"Found {len(files)} files to upload\n")
 
-    success = 0
-    failed = 0
-    for i, (local, remote) in enumerate(files):
-        ok = upload_file(local, remote)
-        if ok:
-            success += 1
-        else:
-            failed += 1
-
-        # Rate limit delay (skip for last file and already-existing files)
-        if i < len(files) - 1:
-            time.sleep(DELAY_BETWEEN_UPLOADS)
+    manifest = load_manifest()
+    try:
+        results = run(upload_all(files, manifest))
+    finally:
+        save_manifest(manifest)
+    success = sum(1 for ok in results if ok)
+    failed = len(results) - success
 
     print(f"\nDone: {success} uploaded/existing, {failed} failed")
 
@@ -1,12 +1,14 @@
 """Download TTS models from GitHub and upload to Gitee releases."""
+import argparse
+import asyncio
 import json
 import os
+import shutil
 import sys
-import time
-import urllib.request
-import urllib.error
 
-TOKEN = sys.argv[1] if len(sys.argv) > 1 else ""
+from gitee_client import GITEE_API, aiohttp, backoff_delay, open_session, run, upload_release_asset
+
+TOKEN = ""  # set from the command line in main()
 OWNER = "lratusa"
 REPO = "wordmaster-tts-models"
 TAG = "v1"
@@ -19,11 +21,16 @@ MODELS = [
 ]
 
 TEMP_DIR = os.path.join(os.path.dirname(__file__), "..", "temp_tts_download")
+UPLOAD_TIMEOUT = 3600  # seconds
+API_TIMEOUT = 30  # seconds
+DEFAULT_CHUNK_SIZE = 2 * 1024 * 1024  # bytes
+DOWNLOAD_PARTS = 8
+DOWNLOAD_RETRIES = 5
 
 
-def create_release():
+async def create_release(session):
     """Create a release on Gitee."""
-    url = f"https://gitee.com/api/v5/repos/{OWNER}/{REPO}/releases"
+    url = f"{GITEE_API}/{OWNER}/{REPO}/releases"
     payload = {
         "access_token": TOKEN,
         "tag_name": TAG,
@@ -32,33 +39,35 @@ def create_release():
         "target_commitish": "master",
     }
     try:
-        req = urllib.request.Request(
-            url,
-            data=json.dumps(payload).encode(),
-            headers={"Content-Type": "application/json"},
-            method="POST",
-        )
-        resp = urllib.request.urlopen(req, timeout=30)
-        data = json.loads(resp.read())
-        release_id = data.get("id")
-        print(f"Created release '{TAG}' (id={release_id})")
-        return release_id
-    except urllib.error.HTTPError as e:
-        body = e.read().decode()[:300]
+        timeout = aiohttp.ClientTimeout(total=API_TIMEOUT)
+        async with session.post(url, json=payload, timeout=timeout) as resp:
+            text = await resp.text()
+            status = resp.status
+    except Exception as e:
+        print(f"Error creating release: {e}")
+        return None
+
+    if status >= 400:
+        body = text[:300]
         if "已存在" in body or "already" in body.lower():
             print(f"Release '{TAG}' already exists, fetching...")
-            return get_existing_release()
-        print(f"Error creating release: {e.code} {body}")
+            return await get_existing_release(session)
+        print(f"Error creating release: {status} {body}")
         return None
 
+    release_id = json.loads(text).get("id")
+    print(f"Created release '{TAG}' (id={release_id})")
+    return release_id
 
-def get_existing_release():
+
+async def get_existing_release(session):
     """Get existing release ID."""
-    url = f"https://gitee.com/api/v5/repos/{OWNER}/{REPO}/releases?access_token={TOKEN}"
+    url = f"{GITEE_API}/{OWNER}/{REPO}/releases?access_token={TOKEN}"
     try:
-        req = urllib.request.Request(url)
-        resp = urllib.request.urlopen(req, timeout=30)
-        releases = json.loads(resp.read())
+        timeout = aiohttp.ClientTimeout(total=API_TIMEOUT)
+        async with session.get(url, timeout=timeout) as resp:
+            resp.raise_for_status()
+            releases = await resp.json(content_type=None)
         for r in releases:
             if r.get("tag_name") == TAG:
                 rid = r.get("id")
@@ -72,7 +81,69 @@ def get_existing_release():
     return None
 
 
-def download_model(filename):
+async def _download_part(session, url, part_path, start, end):
+    """Fetch bytes [start, end] into part_path, resuming from what is already there."""
+    expected = end - start + 1
+    for attempt in range(DOWNLOAD_RETRIES):
+        have = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if have >= expected:
+            return
+        try:
+            headers = {"Range": f"bytes={start + have}-{end}"}
+            async with session.get(url, headers=headers) as resp:
+                if resp.status != 206:
+                    raise RuntimeError(f"HTTP {resp.status} for range request")
+                with open(part_path, "ab") as f:
+                    async for chunk in resp.content.iter_chunked(DEFAULT_CHUNK_SIZE):
+                        f.write(chunk)
+        except Exception as e:
+            if attempt == DOWNLOAD_RETRIES - 1:
+                raise
+            wait = backoff_delay(attempt)
+            print(f"    {os.path.basename(part_path)}: {e}, retrying in {wait:.1f}s...")
+            await asyncio.sleep(wait)
+    if os.path.getsize(part_path) < expected:
+        raise RuntimeError(f"{os.path.basename(part_path)} incomplete after retries")
+
+
+async def _download_ranged(session, url, local_path, parts):
+    """Download url in parallel byte ranges, resuming any existing .part files."""
+    # Resolve the GitHub redirect once; parts hit the CDN directly
+    async with session.head(url, allow_redirects=True) as resp:
+        resp.raise_for_status()
+        size = int(resp.headers.get("Content-Length", 0))
+        ranged = resp.headers.get("Accept-Ranges", "") == "bytes"
+        url = str(resp.url)
+
+    part_paths = [f"{local_path}.part{i}" for i in range(parts)]
+    if size and ranged:
+        step = -(-size // parts)
+        bounds = [(i * step, min(size, (i + 1) * step) - 1) for i in range(parts)]
+        await asyncio.gather(*(
+            _download_part(session, url, path, start, end)
+            for path, (start, end) in zip(part_paths, bounds)
+            if start <= end
+        ))
+    else:
+        # Server cannot serve ranges: single stream, no resume
+        part_paths = part_paths[:1]
+        async with session.get(url) as resp:
+            resp.raise_for_status()
+            with open(part_paths[0], "wb") as f:
+                async for chunk in resp.content.iter_chunked(DEFAULT_CHUNK_SIZE):
+                    f.write(chunk)
+
+    with open(local_path, "wb") as out:
+        for path in part_paths:
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    shutil.copyfileobj(f, out, DEFAULT_CHUNK_SIZE)
+    for path in part_paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+async def download_model(session, filename):
     """Download model from GitHub to temp directory."""
     os.makedirs(TEMP_DIR, exist_ok=True)
     local_path = os.path.join(TEMP_DIR, filename)
@@ -84,92 +155,119 @@ def download_model(filename):
             return local_path
 
     url = f"{GITHUB_BASE}/{filename}"
-    print(f"  Downloading {filename} from GitHub...")
+    print(f"  Downloading {filename} from GitHub ({DOWNLOAD_PARTS} parts)...")
     try:
-        urllib.request.urlretrieve(url, local_path)
+        await _download_ranged(session, url, local_path, DOWNLOAD_PARTS)
         size_mb = os.path.getsize(local_path) / (1024 * 1024)
         print(f"  Downloaded: {size_mb:.1f} MB")
         return local_path
     except Exception as e:
-        print(f"  Download failed: {e}")
+        print(f"  Download failed: {e} (partial data kept for resume)")
         return None
 
 
-def upload_to_release(release_id, local_path, filename):
+async def upload_to_release(session, release_id, local_path, filename, chunk_size):
     """Upload file as release asset via Gitee API."""
-    url = f"https://gitee.com/api/v5/repos/{OWNER}/{REPO}/releases/{release_id}/attach_files"
-
     size_mb = os.path.getsize(local_path) / (1024 * 1024)
     print(f"  Uploading {filename} ({size_mb:.1f} MB) to Gitee release...")
 
-    # Use multipart form upload
-    import mimetypes
-    boundary = "----WebKitFormBoundary7MA4YWxkTrZu0gW"
-
-    with open(local_path, "rb") as f:
-        file_data = f.read()
-
-    body = (
-        f"--{boundary}\r\n"
-        f'Content-Disposition: form-data; name="access_token"\r\n\r\n'
-        f"{TOKEN}\r\n"
-        f"--{boundary}\r\n"
-        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
-        f"Content-Type: application/octet-stream\r\n\r\n"
-    ).encode() + file_data + f"\r\n--{boundary}--\r\n".encode()
-
-    req = urllib.request.Request(
-        url,
-        data=body,
-        headers={
-            "Content-Type": f"multipart/form-data; boundary={boundary}",
-        },
-        method="POST",
-    )
-
+    timeout = aiohttp.ClientTimeout(total=UPLOAD_TIMEOUT)
     try:
-        resp = urllib.request.urlopen(req, timeout=600)
-        data = json.loads(resp.read())
-        dl_url = data.get("browser_download_url", "")
-        print(f"  UPLOADED: {filename}")
-        print(f"  URL: {dl_url}")
-        return True
-    except urllib.error.HTTPError as e:
-        body_text = e.read().decode()[:500]
-        print(f"  Upload failed: {e.code} {body_text}")
-        return False
+        status, text = await upload_release_asset(
+            session, OWNER, REPO, release_id, TOKEN, local_path, filename, chunk_size, timeout
+        )
     except Exception as e:
-        print(f"  Upload failed: {e}")
+        print(f"  Upload failed: {filename}: {e}")
+        return False
+
+    if status >= 400:
+        print(f"  Upload failed: {filename}: {status} {text[:500]}")
         return False
 
+    try:
+        dl_url = json.loads(text).get("browser_download_url", "")
+    except ValueError:
+        dl_url = ""
+    print(f"  UPLOADED: {filename}")
+    print(f"  URL: {dl_url}")
+    return True
+
+
+async def upload_all(session, release_id, downloads, max_files, chunk_size):
+    """Upload several release assets in parallel."""
+    sem = asyncio.Semaphore(max_files)
+
+    async def upload_one(local_path, filename):
+        async with sem:
+            return await upload_to_release(
+                session, release_id, local_path, filename, chunk_size
+            )
+
+    return await asyncio.gather(
+        *(upload_one(path, name) for path, name in downloads)
+    )
+
+
+async def mirror_models(max_files, chunk_size):
+    """Create the release, then download and upload every model over one session."""
+    # One keep-alive pool for the API, GitHub and the CDN: each host pays
+    # DNS + TCP + TLS setup once rather than once per request
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60)
+    async with open_session(timeout=timeout) as session:
+        # Step 1: Create or get release
+        release_id = await create_release(session)
+        if not release_id:
+            print("Failed to create/get release")
+            return False
+
+        # Step 2: Download each model
+        downloads = []
+        for filename in MODELS:
+            print(f"\nProcessing: {filename}")
+            local_path = await download_model(session, filename)
+            if not local_path:
+                print(f"  Skipping {filename} (download failed)")
+                continue
+            downloads.append((local_path, filename))
+
+        # Step 3: Upload all models in parallel, one connection per asset
+        print(f"\nUploading {len(downloads)} model(s), up to {max_files} at a time...")
+        results = await upload_all(session, release_id, downloads, max_files, chunk_size)
+        for (_, filename), ok in zip(downloads, results):
+            if not ok:
+                print(f"  FAILED to upload {filename}")
+    return True
+
 
 def main():
+    global TOKEN
+
+    parser = argparse.ArgumentParser(description="Mirror TTS models to Gitee releases")
+    parser.add_argument("token", nargs="?", default="", help="Gitee access token")
+    parser.add_argument(
+        "--max-files", type=int, default=len(MODELS),
+        help="Maximum number of assets uploaded in parallel (default: all)",
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+        help=f"Read/send chunk size in bytes (default: {DEFAULT_CHUNK_SIZE})",
+    )
+    args = parser.parse_args()
+    TOKEN = args.token
+
     if not TOKEN:
-        print("Usage: python upload_tts_to_gitee.py <gitee_access_token>")
+        print("Usage: python upload_tts_to_gitee.py <gitee_access_token> "
+              "[--max-files N] [--chunk-size BYTES]")
+        sys.exit(1)
+    if aiohttp is None:
+        print("aiohttp package not installed. Run: pip install aiohttp")
         sys.exit(1)
 
     print("=== TTS Model Upload to Gitee ===\n")
 
-    # Step 1: Create or get release
-    release_id = create_release()
-    if not release_id:
-        print("Failed to create/get release")
+    if not run(mirror_models(max(1, args.max_files), args.chunk_size)):
         sys.exit(1)
 
-    # Step 2: Download and upload each model
-    for filename in MODELS:
-        print(f"\nProcessing: {filename}")
-        local_path = download_model(filename)
-        if not local_path:
-            print(f"  Skipping {filename} (download failed)")
-            continue
-
-        ok = upload_to_release(release_id, local_path, filename)
-        if not ok:
-            print(f"  FAILED to upload {filename}")
-
-        time.sleep(2)
-
     print("\nDone!")
 
 
@@ -11,11 +11,15 @@ Usage:
     python generate_all.py --exam cet6 kaoyan # Generate multiple exams
     python generate_all.py --no-api           # Skip API calls
     python generate_all.py --dry-run          # Test with 10 words only
+    python generate_all.py --no-api --parallel # Build exams in parallel processes
 """
 
 import argparse
-import json
+import asyncio
 import os
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+import re
 import sys
 from pathlib import Path
 from typing import Optional
@@ -33,8 +37,11 @@ except ImportError:
 
 # Add utils to path
 sys.path.insert(0, str(Path(__file__).parent))
-from utils.gemini_client import GeminiClient
+from utils.gemini_client import GeminiClient, RateLimitError
+from utils.json_io import dump_json_streamed, load_json, load_json_mapped
 from utils.json_repair import validate_word_entry
+from utils.llm_cache import LLMCache
+from utils.progress import ProgressWriter
 
 
 # Configuration for each exam type
@@ -114,18 +121,23 @@ EXAM_CONFIGS = {
 # Base vocabulary for "core" classification (CET4 + CET6)
 CET4_PATH = 'D:/temp/english-vocabulary/json/3-CET4-顺序.json'
 CET6_PATH = 'D:/temp/english-vocabulary/json/4-CET6-顺序.json'
+CORE_WORDS_CACHE = Path(__file__).parent / 'core_words_cache.txt'
+LLM_CACHE_FILE = Path(__file__).parent / 'checkpoints' / 'llm_cache.sqlite'  # Shared with the other generators
 
 OUTPUT_DIR = Path(__file__).parent.parent.parent / 'assets' / 'wordlists' / 'english'
 BATCH_SIZE = 15
+API_CONCURRENCY = 8  # in-flight batches; GeminiClient still enforces its RPM limit
+PROGRESS_SYNC_EVERY = 5  # batches between checkpoint fsyncs
 
 
 def load_source_data(source_path: str) -> list[dict]:
     """Load and deduplicate source data."""
     print(f"Loading source data from: {source_path}")
 
-    with open(source_path, encoding='utf-8') as f:
-        raw_data = json.load(f)
+    raw_data = load_json(source_path)
 
+    # Translations/phrases are deduplicated through insertion-ordered dicts
+    # keyed by their content, instead of O(k) list membership scans
     word_map = {}
     for entry in raw_data:
         word = entry.get('word', '').strip().lower()
@@ -135,60 +147,91 @@ def load_source_data(source_path: str) -> list[dict]:
         if word not in word_map:
             word_map[word] = {
                 'word': entry.get('word', '').strip(),
-                'translations': [],
-                'phrases': []
+                'translations': {},
+                'phrases': {}
             }
 
+        translations = word_map[word]['translations']
         for trans in entry.get('translations', []):
-            if trans not in word_map[word]['translations']:
-                word_map[word]['translations'].append(trans)
+            translations.setdefault((trans.get('type', ''), trans.get('translation', '')), trans)
 
+        phrases = word_map[word]['phrases']
         for phrase in entry.get('phrases', []):
-            if phrase not in word_map[word]['phrases']:
-                word_map[word]['phrases'].append(phrase)
+            phrases.setdefault((phrase.get('phrase', ''), phrase.get('translation', '')), phrase)
+
+    for item in word_map.values():
+        item['translations'] = list(item['translations'].values())
+        item['phrases'] = list(item['phrases'].values())
 
     print(f"Loaded {len(word_map)} unique words (from {len(raw_data)} entries)")
     return list(word_map.values())
 
 
-def load_core_word_set() -> set[str]:
+def _core_sources_fingerprint() -> str:
+    """Describe the CET4/6 source files so a stale word cache can be detected."""
+    parts = []
+    for path in [CET4_PATH, CET6_PATH]:
+        if Path(path).exists():
+            stat = Path(path).stat()
+            parts.append(f"{path}|{stat.st_size}|{stat.st_mtime_ns}")
+    return '\t'.join(parts)
+
+
+def load_core_word_set() -> frozenset[str]:
     """Load CET4 + CET6 words as core vocabulary reference."""
+    fingerprint = _core_sources_fingerprint()
+
+    # Cache: first line is the source fingerprint, then one word per line
+    if CORE_WORDS_CACHE.exists():
+        with open(CORE_WORDS_CACHE, encoding='utf-8') as f:
+            if f.readline().rstrip('\n') == fingerprint:
+                core_words = frozenset(f.read().splitlines())
+                print(f"Loaded {len(core_words)} core reference words from cache")
+                return core_words
+
     core_words = set()
     for path in [CET4_PATH, CET6_PATH]:
         if Path(path).exists():
-            with open(path, encoding='utf-8') as f:
-                for entry in json.load(f):
-                    word = entry.get('word', '').strip().lower()
-                    if word:
-                        core_words.add(word)
+            for entry in load_json_mapped(path):
+                word = entry.get('word', '').strip().lower()
+                if word:
+                    core_words.add(word)
     print(f"Loaded {len(core_words)} core reference words from CET4/6")
-    return core_words
+
+    if fingerprint:
+        with open(CORE_WORDS_CACHE, 'w', encoding='utf-8') as f:
+            f.write(fingerprint + '\n')
+            f.write('\n'.join(sorted(core_words)))
+    return frozenset(core_words)
+
+
+POS_MAP = {
+    'n': 'n.', 'v': 'v.', 'vt': 'vt.', 'vi': 'vi.',
+    'adj': 'adj.', 'adv': 'adv.', 'prep': 'prep.',
+    'conj': 'conj.', 'pron': 'pron.', 'int': 'int.',
+    'art': 'art.', 'num': 'num.',
+}
+POS_ORDER_RANK = {
+    pos: i for i, pos in enumerate(['n.', 'v.', 'vt.', 'vi.', 'adj.', 'adv.', 'prep.', 'conj.', 'pron.'])
+}
+POS_SPLIT_RE = re.compile(r'[\s&]+')
+COMPLEX_SUFFIX_RE = re.compile(r'(?:tion|sion|ment|ness|ical|ious|eous|able|ible)$', re.IGNORECASE)
 
 
 def normalize_part_of_speech(translations: list[dict]) -> str:
     """Normalize part of speech from translations."""
-    pos_map = {
-        'n': 'n.', 'v': 'v.', 'vt': 'vt.', 'vi': 'vi.',
-        'adj': 'adj.', 'adv': 'adv.', 'prep': 'prep.',
-        'conj': 'conj.', 'pron': 'pron.', 'int': 'int.',
-        'art': 'art.', 'num': 'num.',
-    }
-
     types = set()
     for trans in translations:
-        pos = trans.get('type', '').lower().strip()
-        for part in pos.replace('&', ' ').split():
-            part = part.strip()
-            if part in pos_map:
-                types.add(pos_map[part])
+        for part in POS_SPLIT_RE.split(trans.get('type', '').lower()):
+            if part in POS_MAP:
+                types.add(POS_MAP[part])
             elif part:
                 types.add(part + '.' if not part.endswith('.') else part)
 
     if not types:
         return ''
 
-    order = ['n.', 'v.', 'vt.', 'vi.', 'adj.', 'adv.', 'prep.', 'conj.', 'pron.']
-    sorted_types = sorted(types, key=lambda x: order.index(x) if x in order else 100)
+    sorted_types = sorted(types, key=lambda x: POS_ORDER_RANK.get(x, 100))
     return '/'.join(sorted_types)
 
 
@@ -220,35 +263,66 @@ def load_progress(progress_file: Path) -> dict[str, dict]:
     return progress
 
 
-def save_progress(progress_file: Path, items: list[dict]):
-    """Append items to progress file."""
-    if jsonlines is None:
-        return
-    with jsonlines.open(progress_file, mode='a') as writer:
-        for item in items:
-            writer.write(item)
-
-
 def chunks(lst: list, n: int):
     """Yield successive n-sized chunks from lst."""
     for i in range(0, len(lst), n):
         yield lst[i:i + n]
 
 
+async def generate_batches(
+    client: GeminiClient,
+    batches: list[list[str]],
+    progress: dict[str, dict],
+    writer: ProgressWriter,
+):
+    """Run API batches concurrently, checkpointing each as it completes."""
+    sem = asyncio.Semaphore(API_CONCURRENCY)
+    failed = asyncio.Event()
+
+    async def process_batch(i: int, batch: list[str]):
+        async with sem:
+            # A failed batch stops new ones from starting; finished ones are kept
+            if failed.is_set():
+                return
+            print(f"\nBatch {i+1}: Processing {len(batch)} words: {batch[:3]}...")
+
+            try:
+                results = await client.generate_word_data_async(batch)
+            except RateLimitError as e:
+                # Throttled even after backing off: leave it for --resume, keep going
+                print(f"  Batch {i+1} rate limited, skipping: {e}")
+                return
+            except Exception as e:
+                print(f"  Batch {i+1} failed: {e}")
+                print("  Stopping to preserve progress. Run with --resume to continue.")
+                failed.set()
+                return
+
+        valid_results = []
+        for item in results:
+            issues = validate_word_entry(item)
+            if issues:
+                print(f"  Warning: Issues with '{item.get('word', '?')}': {issues[:2]}")
+            valid_results.append(item)
+
+        for item in valid_results:
+            progress[item['word'].lower()] = item
+
+        # Runs without an await, so checkpoint writes never interleave
+        writer.add_batch(valid_results)
+        print(f"  Batch {i+1}: saved {len(valid_results)} words to checkpoint")
+
+    await asyncio.gather(*(process_batch(i, batch) for i, batch in enumerate(batches)))
+
+
 def assign_difficulty(word: str) -> int:
     """Assign difficulty level based on word characteristics."""
-    word_lower = word.lower()
-
     if len(word) <= 4:
         return 1
     if len(word) >= 10:
         return 3
-
-    complex_suffixes = ['tion', 'sion', 'ment', 'ness', 'ical', 'ious', 'eous', 'able', 'ible']
-    for suffix in complex_suffixes:
-        if word_lower.endswith(suffix):
-            return 3
-
+    if COMPLEX_SUFFIX_RE.search(word):
+        return 3
     return 2
 
 
@@ -260,7 +334,9 @@ def generate_wordlist(
     dry_run: bool = False,
     generate_core: bool = True,
     generate_full: bool = True,
-    core_word_set: set[str] = None,
+    core_word_set: Optional[frozenset[str]] = None,
+    response_cache: bool = True,
+    context_cache: bool = False,
 ) -> dict:
     """Generate word list for a specific exam."""
     print(f"\n{'='*60}")
@@ -296,42 +372,25 @@ def generate_wordlist(
     # Generate with API
     if use_api and words_needing_api:
         try:
-            client = GeminiClient()
+            client = GeminiClient(
+                use_context_cache=context_cache,
+                response_cache=LLMCache(LLM_CACHE_FILE) if response_cache else None,
+            )
+            batches = list(chunks(words_needing_api, BATCH_SIZE))
             print(f"\nGenerating data for {len(words_needing_api)} words...")
-            print(f"Batch size: {BATCH_SIZE}, Estimated batches: {len(words_needing_api) // BATCH_SIZE + 1}")
-
-            for i, batch in enumerate(chunks(words_needing_api, BATCH_SIZE)):
-                print(f"\nBatch {i+1}: Processing {len(batch)} words: {batch[:3]}...")
-
-                try:
-                    results = client.generate_word_data(batch)
-
-                    valid_results = []
-                    for item in results:
-                        issues = validate_word_entry(item)
-                        if issues:
-                            print(f"  Warning: Issues with '{item.get('word', '?')}': {issues[:2]}")
-                        valid_results.append(item)
-
-                    for item in valid_results:
-                        progress[item['word'].lower()] = item
-
-                    save_progress(progress_file, valid_results)
-                    print(f"  Saved {len(valid_results)} words to checkpoint")
-
-                except Exception as e:
-                    print(f"  Batch failed: {e}")
-                    print("  Stopping to preserve progress. Run with --resume to continue.")
-                    break
-
+            print(f"Batch size: {BATCH_SIZE}, Batches: {len(batches)}, Concurrency: {API_CONCURRENCY}")
+            with ProgressWriter(progress_file, flush_every=PROGRESS_SYNC_EVERY) as writer:
+                asyncio.run(generate_batches(client, batches, progress, writer))
         except (ImportError, ValueError) as e:
             print(f"Warning: Cannot initialize Gemini client: {e}")
             print("Proceeding without API generation...")
 
     # Build final output
     print("\nBuilding final word list...")
+    # (sort key, entry) pairs so .lower() runs once per word, not per comparison
     all_words = []
     core_words = []
+    add_core = generate_core and core_word_set is not None
 
     for entry in source_data:
         word = entry['word']
@@ -358,48 +417,46 @@ def generate_wordlist(
                 if phrase.get('phrase')
             ]
 
-        all_words.append(word_entry)
+        all_words.append((word_lower, word_entry))
 
-        if core_word_set and word_lower in core_word_set:
-            core_words.append(word_entry)
+        if add_core and word_lower in core_word_set:
+            core_words.append((word_lower, word_entry))
 
     # Sort alphabetically
-    all_words.sort(key=lambda x: x['word'].lower())
-    core_words.sort(key=lambda x: x['word'].lower())
+    all_words.sort(key=itemgetter(0))
+    core_words.sort(key=itemgetter(0))
+    all_words = [entry for _, entry in all_words]
+    core_words = [entry for _, entry in core_words]
 
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     stats = {}
 
     # Write core vocabulary
     if generate_core and core_words:
-        core_output = {
+        core_header = {
             'name': config['name_core'],
             'language': 'en',
             'description': f"{config['desc_core']} ({len(core_words)}词)",
             'icon_name': 'school',
-            'words': core_words
         }
 
         core_path = OUTPUT_DIR / config['output_core']
-        with open(core_path, 'w', encoding='utf-8') as f:
-            json.dump(core_output, f, ensure_ascii=False, indent=2)
+        dump_json_streamed(core_header, 'words', core_words, core_path)
 
         print(f"Core vocabulary written to: {core_path}")
         stats['core_words'] = len(core_words)
 
     # Write full vocabulary
     if generate_full:
-        full_output = {
+        full_header = {
             'name': config['name_full'],
             'language': 'en',
             'description': f"{config['desc_full']} ({len(all_words)}词)",
             'icon_name': 'school',
-            'words': all_words
         }
 
         full_path = OUTPUT_DIR / config['output_full']
-        with open(full_path, 'w', encoding='utf-8') as f:
-            json.dump(full_output, f, ensure_ascii=False, indent=2)
+        dump_json_streamed(full_header, 'words', all_words, full_path)
 
         print(f"Full vocabulary written to: {full_path}")
         stats['full_words'] = len(all_words)
@@ -447,30 +504,61 @@ def main():
         action='store_true',
         help='Generate only full vocabulary (skip core)'
     )
+    parser.add_argument(
+        '--parallel',
+        action='store_true',
+        help='Generate exams in parallel processes (only with --no-api)'
+    )
+    parser.add_argument(
+        '--context-cache',
+        action='store_true',
+        help='Send the fixed prompt instructions once as Gemini cached content'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Ignore the on-disk response cache and regenerate every word'
+    )
 
     args = parser.parse_args()
 
     exams = args.exam or list(EXAM_CONFIGS.keys())
 
     # Load core word set for classification
-    core_word_set = load_core_word_set() if not args.full_only else set()
+    core_word_set = load_core_word_set() if not args.full_only else None
 
     print(f"Will generate word lists for: {', '.join(exams)}")
 
+    options = dict(
+        use_api=not args.no_api,
+        resume=not args.no_resume,
+        dry_run=args.dry_run,
+        generate_core=not args.full_only,
+        generate_full=True,
+        core_word_set=core_word_set,
+        response_cache=not args.no_cache,
+        context_cache=args.context_cache,
+    )
+
+    parallel = args.parallel and len(exams) > 1
+    if parallel and not args.no_api:
+        # Every process would get its own rate limiter against one Gemini quota
+        print("Note: --parallel requires --no-api; generating sequentially")
+        parallel = False
+
     all_stats = {}
-    for exam in exams:
-        config = EXAM_CONFIGS[exam]
-        stats = generate_wordlist(
-            exam=exam,
-            config=config,
-            use_api=not args.no_api,
-            resume=not args.no_resume,
-            dry_run=args.dry_run,
-            generate_core=not args.full_only,
-            generate_full=True,
-            core_word_set=core_word_set,
-        )
-        all_stats[exam] = stats
+    if parallel:
+        workers = min(len(exams), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                exam: pool.submit(generate_wordlist, exam=exam, config=EXAM_CONFIGS[exam], **options)
+                for exam in exams
+            }
+            for exam, future in futures.items():
+                all_stats[exam] = future.result()
+    else:
+        for exam in exams:
+            all_stats[exam] = generate_wordlist(exam=exam, config=EXAM_CONFIGS[exam], **options)
 
     print(f"\n{'='*60}")
     print("SUMMARY")
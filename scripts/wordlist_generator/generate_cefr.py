@@ -14,21 +14,20 @@ Usage:
     python generate_cefr.py --level all         # Generate all levels
     python generate_cefr.py --level b1 --resume # Resume from checkpoint
     python generate_cefr.py --level a1 --dry-run # Test with 10 words
+    python generate_cefr.py --level all --context-cache # Cache prompt instructions
+    python generate_cefr.py --level all --parallel # Levels in parallel processes
 """
 
 import argparse
+import asyncio
 import csv
-import json
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
 from pathlib import Path
 from typing import Optional
 
-try:
-    import jsonlines
-except ImportError:
-    jsonlines = None
-
 try:
     from dotenv import load_dotenv
     load_dotenv()
@@ -37,8 +36,24 @@ except ImportError:
 
 # Add utils to path
 sys.path.insert(0, str(Path(__file__).parent))
-from utils.gemini_client import GeminiClient
-from utils.json_repair import validate_word_entry
+from utils.gemini_client import (
+    MODEL_NAME,
+    PROMPT_VERSION,
+    GeminiClient,
+    RateLimiter,
+    RateLimitError,
+    load_api_keys,
+)
+from utils.json_io import dump_json
+from utils.json_repair import WORD_ENTRY_SCHEMA, validate_word_entry
+from utils.llm_cache import LLMCache
+from utils.progress import (
+    ProgressStore,
+    checkpoint_meta,
+    run_fingerprint,
+    save_fingerprint,
+    up_to_date_stats,
+)
 
 
 # Configuration for each CEFR level
@@ -49,7 +64,7 @@ CEFR_CONFIGS = {
         'name': 'CEFR A1 入门',
         'description': '欧洲语言共同参考框架 A1 级别词汇',
         'difficulty': 1,
-        'progress_file': 'cefr_a1_progress.jsonl',
+        'progress_file': 'cefr_a1_progress.sqlite',
     },
     'a2': {
         'level': 'A2',
@@ -57,7 +72,7 @@ CEFR_CONFIGS = {
         'name': 'CEFR A2 初级',
         'description': '欧洲语言共同参考框架 A2 级别词汇',
         'difficulty': 1,
-        'progress_file': 'cefr_a2_progress.jsonl',
+        'progress_file': 'cefr_a2_progress.sqlite',
     },
     'b1': {
         'level': 'B1',
@@ -65,7 +80,7 @@ CEFR_CONFIGS = {
         'name': 'CEFR B1 中级',
         'description': '欧洲语言共同参考框架 B1 级别词汇',
         'difficulty': 2,
-        'progress_file': 'cefr_b1_progress.jsonl',
+        'progress_file': 'cefr_b1_progress.sqlite',
     },
     'b2': {
         'level': 'B2',
@@ -73,7 +88,7 @@ CEFR_CONFIGS = {
         'name': 'CEFR B2 中高级',
         'description': '欧洲语言共同参考框架 B2 级别词汇',
         'difficulty': 2,
-        'progress_file': 'cefr_b2_progress.jsonl',
+        'progress_file': 'cefr_b2_progress.sqlite',
     },
     'c1': {
         'level': 'C1',
@@ -81,7 +96,7 @@ CEFR_CONFIGS = {
         'name': 'CEFR C1 高级',
         'description': '欧洲语言共同参考框架 C1 级别词汇',
         'difficulty': 3,
-        'progress_file': 'cefr_c1_progress.jsonl',
+        'progress_file': 'cefr_c1_progress.sqlite',
     },
     'c2': {
         'level': 'C2',
@@ -89,7 +104,7 @@ CEFR_CONFIGS = {
         'name': 'CEFR C2 精通',
         'description': '欧洲语言共同参考框架 C2 级别词汇',
         'difficulty': 3,
-        'progress_file': 'cefr_c2_progress.jsonl',
+        'progress_file': 'cefr_c2_progress.sqlite',
     },
 }
 
@@ -99,38 +114,52 @@ CEFRJ_FILE = DATA_DIR / 'cefrj-vocabulary-profile-1.5.csv'
 OCTANOVE_FILE = DATA_DIR / 'octanove-vocabulary-profile-c1c2-1.0.csv'
 OUTPUT_DIR = Path(__file__).parent.parent.parent / 'assets' / 'wordlists' / 'english'
 CHECKPOINT_DIR = Path(__file__).parent / 'checkpoints'
+LLM_CACHE_FILE = CHECKPOINT_DIR / 'llm_cache.sqlite'
 
 BATCH_SIZE = 15
+# Batches combined into one request; raises throughput under an RPM limit
+# while keeping the response (~150 tokens/word) well under the output cap
+SUPER_BATCH = 2
+API_CONCURRENCY = 8  # in-flight requests; GeminiClient still enforces its RPM limit
+CHECKPOINT_META = checkpoint_meta(MODEL_NAME, PROMPT_VERSION, WORD_ENTRY_SCHEMA)
+
+
+def cefr_source_file(level: str) -> Path:
+    """Return the source CSV a CEFR level's words come from."""
+    if level.upper() in ['A1', 'A2', 'B1', 'B2']:
+        return CEFRJ_FILE
+    return OCTANOVE_FILE  # C1, C2
 
 
 def load_cefr_words(level: str) -> list[dict]:
     """
     Load words for a specific CEFR level from source CSV files.
 
-    Returns list of dicts with: word, pos (part of speech)
+    Returns list of dicts with: word, _lower (lowercase key), part_of_speech
     """
     level_upper = level.upper()
     words = {}  # word -> {word, pos_list}
-
-    # Determine which file to use
-    if level_upper in ['A1', 'A2', 'B1', 'B2']:
-        source_file = CEFRJ_FILE
-    else:  # C1, C2
-        source_file = OCTANOVE_FILE
+    source_file = cefr_source_file(level)
 
     if not source_file.exists():
         raise FileNotFoundError(f"Source file not found: {source_file}")
 
     print(f"Loading {level_upper} words from: {source_file}")
 
-    with open(source_file, encoding='utf-8') as f:
-        reader = csv.DictReader(f)
+    with open(source_file, encoding='utf-8', newline='') as f:
+        # Plain rows with fixed column indices avoid a dict per CSV row
+        reader = csv.reader(f)
+        header = next(reader)
+        level_col = header.index('CEFR')
+        headword_col = header.index('headword')
+        pos_col = header.index('pos')
+
         for row in reader:
-            if row['CEFR'] != level_upper:
+            if row[level_col] != level_upper:
                 continue
 
-            headword = row['headword'].strip()
-            pos = row['pos'].strip()
+            headword = row[headword_col].strip()
+            pos = row[pos_col].strip()
 
             # Skip empty entries
             if not headword:
@@ -139,96 +168,91 @@ def load_cefr_words(level: str) -> list[dict]:
             # Normalize headword (take first variant if multiple)
             # e.g., "a.m./A.M./am/AM" -> "a.m."
             if '/' in headword:
-                headword = headword.split('/')[0].strip()
+                headword = headword.split('/', 1)[0].strip()
 
             word_lower = headword.lower()
 
-            if word_lower not in words:
-                words[word_lower] = {
+            entry = words.get(word_lower)
+            if entry is None:
+                entry = words[word_lower] = {
                     'word': headword,
                     'pos_list': []
                 }
 
-            if pos and pos not in words[word_lower]['pos_list']:
-                words[word_lower]['pos_list'].append(pos)
+            if pos and pos not in entry['pos_list']:
+                entry['pos_list'].append(pos)
 
     # Convert to list and sort
     result = []
-    for word_data in words.values():
+    for word_lower, word_data in words.items():
         result.append({
             'word': word_data['word'],
+            '_lower': word_lower,
             'part_of_speech': normalize_pos(word_data['pos_list'])
         })
 
-    result.sort(key=lambda x: x['word'].lower())
+    result.sort(key=itemgetter('_lower'))
     print(f"Loaded {len(result)} unique words for {level_upper}")
     return result
 
 
+POS_MAP = {
+    'noun': 'n.', 'verb': 'v.', 'adjective': 'adj.', 'adverb': 'adv.',
+    'preposition': 'prep.', 'conjunction': 'conj.', 'pronoun': 'pron.',
+    'interjection': 'int.', 'determiner': 'det.', 'number': 'num.',
+    'modal': 'modal', 'auxiliary': 'aux.', 'prefix': 'prefix', 'suffix': 'suffix',
+}
+POS_ORDER_RANK = {
+    pos: i for i, pos in enumerate(['n.', 'v.', 'adj.', 'adv.', 'prep.', 'conj.', 'pron.', 'det.'])
+}
+
+
 def normalize_pos(pos_list: list[str]) -> str:
     """Normalize part of speech list to standard format."""
-    pos_map = {
-        'noun': 'n.',
-        'verb': 'v.',
-        'adjective': 'adj.',
-        'adverb': 'adv.',
-        'preposition': 'prep.',
-        'conjunction': 'conj.',
-        'pronoun': 'pron.',
-        'interjection': 'int.',
-        'determiner': 'det.',
-        'number': 'num.',
-        'modal': 'modal',
-        'auxiliary': 'aux.',
-        'prefix': 'prefix',
-        'suffix': 'suffix',
-    }
-
-    normalized = []
-    for pos in pos_list:
-        pos_lower = pos.lower()
-        if pos_lower in pos_map:
-            norm = pos_map[pos_lower]
-            if norm not in normalized:
-                normalized.append(norm)
-        elif pos and pos not in normalized:
-            # Keep as-is if not in map
-            normalized.append(pos)
+    # Unknown parts of speech are kept as-is; dict.fromkeys dedups in order
+    normalized = list(dict.fromkeys(POS_MAP.get(pos.lower(), pos) for pos in pos_list if pos))
 
     # Sort by common order
-    order = ['n.', 'v.', 'adj.', 'adv.', 'prep.', 'conj.', 'pron.', 'det.']
-    normalized.sort(key=lambda x: order.index(x) if x in order else 100)
+    normalized.sort(key=lambda x: POS_ORDER_RANK.get(x, 100))
+
+    return '/'.join(normalized)
+
 
-    return '/'.join(normalized) if normalized else ''
+def open_progress_store(progress_file: Path) -> ProgressStore:
+    """Open a level's checkpoint, importing its older JSONL checkpoint once."""
+    return ProgressStore(progress_file, CHECKPOINT_META, legacy_jsonl=progress_file.with_suffix('.jsonl'))
 
 
 def load_progress(progress_file: Path) -> dict[str, dict]:
     """Load progress from checkpoint file."""
-    if not progress_file.exists():
-        return {}
-    if jsonlines is None:
-        print("Warning: jsonlines not installed, cannot load checkpoint")
+    if not progress_file.exists() and not progress_file.with_suffix('.jsonl').exists():
         return {}
 
-    progress = {}
-    with jsonlines.open(progress_file) as reader:
-        for item in reader:
-            word = item.get('word', '').lower()
-            if word:
-                progress[word] = item
+    with open_progress_store(progress_file) as store:
+        progress = store.load()
     print(f"Loaded {len(progress)} words from checkpoint")
     return progress
 
 
-def save_progress(progress_file: Path, items: list[dict]):
-    """Append items to progress file."""
-    if jsonlines is None:
-        return
+def progress_revision(progress_file: Path) -> tuple[int, int]:
+    """Return the checkpoint's (entry count, newest mtime), or (0, 0) if there is none."""
+    if not progress_file.exists() and not progress_file.with_suffix('.jsonl').exists():
+        return 0, 0
+
+    with open_progress_store(progress_file) as store:
+        return store.revision()
 
-    progress_file.parent.mkdir(parents=True, exist_ok=True)
-    with jsonlines.open(progress_file, mode='a') as writer:
-        for item in items:
-            writer.write(item)
+
+def output_fingerprint(level: str, progress_file: Path, use_api: bool, resume: bool) -> str:
+    """Fingerprint everything a level's output is built from."""
+    return run_fingerprint(
+        cefr_source_file(level),
+        PROMPT_VERSION,
+        level.upper(),
+        use_api,
+        resume,
+        progress_revision(progress_file),
+    )
 
 
 def chunks(lst: list, n: int):
@@ -237,19 +261,113 @@ def chunks(lst: list, n: int):
         yield lst[i:i + n]
 
 
+def split_results(batches: list[list[str]], results: list[dict]) -> list[list[dict]]:
+    """Assign a combined response's entries back to the batches that asked for them."""
+    owner = {word.lower(): j for j, batch in enumerate(batches) for word in batch}
+    split = [[] for _ in batches]
+    for item in results:
+        # Entries for words nobody asked for stay with the last batch
+        split[owner.get(item.get('word', '').lower(), len(batches) - 1)].append(item)
+    return split
+
+
+async def generate_batches(
+    client: GeminiClient,
+    batches: list[list[str]],
+    level: str,
+    progress: dict[str, dict],
+    store: ProgressStore,
+):
+    """
+    Run API batches concurrently, checkpointing each as it completes.
+
+    Every SUPER_BATCH consecutive batches share one request; the response is
+    split back so checkpoints and logs stay per batch.
+    """
+    sem = asyncio.Semaphore(API_CONCURRENCY)
+    failed = asyncio.Event()
+    total_batches = len(batches)
+
+    async def process_group(first: int, group: list[list[str]]):
+        last = first + len(group)
+        labels = f"{first + 1}-{last}" if len(group) > 1 else str(last)
+        words = [word for batch in group for word in batch]
+        async with sem:
+            # A failed batch stops new ones from starting; finished ones are kept
+            if failed.is_set():
+                return
+            print(f"\nBatch {labels}/{total_batches}: Processing {len(words)} words: {words[:3]}...")
+
+            try:
+                results = await client.generate_cefr_word_data_async(words, level)
+            except RateLimitError as e:
+                # Throttled even after backing off: leave it for --resume, keep going
+                print(f"  Batch {labels} rate limited, skipping: {e}")
+                return
+            except Exception as e:
+                print(f"  Batch {labels} failed: {e}")
+                print("  Stopping to preserve progress. Run with --resume to continue.")
+                failed.set()
+                return
+
+        for j, batch_results in enumerate(split_results(group, results)):
+            valid_results = []
+            for item in batch_results:
+                issues = validate_word_entry(item)
+                if issues:
+                    print(f"  Warning: Issues with '{item.get('word', '?')}': {issues[:2]}")
+                valid_results.append(item)
+
+            for item in valid_results:
+                progress[item['word'].lower()] = item
+
+            # Runs without an await, so checkpoint writes never interleave
+            store.add_batch(valid_results)
+            print(f"  Batch {first + j + 1}: saved {len(valid_results)} words to checkpoint")
+
+    await asyncio.gather(*(
+        process_group(i * SUPER_BATCH, group)
+        for i, group in enumerate(chunks(batches, SUPER_BATCH))
+    ))
+
+
 def generate_cefr_wordlist(
     level: str,
     config: dict,
     use_api: bool = True,
     resume: bool = True,
     dry_run: bool = False,
+    context_cache: bool = False,
+    response_cache: bool = True,
+    quota_share: int = 1,
+    force: bool = False,
+    api_key: Optional[str] = None,
 ) -> dict:
-    """Generate word list for a specific CEFR level."""
+    """
+    Generate word list for a specific CEFR level.
+
+    quota_share is the number of levels running at once in separate
+    processes on the same API key; each then paces itself to that fraction
+    of the key's quota. api_key defaults to the first configured key.
+
+    Unless force is set, a level whose source CSV, prompt version and
+    checkpoint are unchanged since its last full run is not rebuilt.
+    """
     print(f"\n{'='*60}")
     print(f"Generating CEFR {config['level']} word list")
     print(f"{'='*60}")
 
     progress_file = CHECKPOINT_DIR / config['progress_file']
+    output_path = OUTPUT_DIR / config['output']
+    fingerprint_file = CHECKPOINT_DIR / Path(config['output']).with_suffix('.fingerprint').name
+
+    # A fresh (non-resumed) API run always regenerates
+    if not (dry_run or force or (use_api and not resume)):
+        fingerprint = output_fingerprint(level, progress_file, use_api, resume)
+        stats = up_to_date_stats(fingerprint_file, fingerprint, output_path, require_complete=use_api)
+        if stats is not None:
+            print(f"Up to date: {output_path} ({stats['total_words']} words)")
+            return stats
 
     # Load source words
     source_words = load_cefr_words(config['level'])
@@ -261,60 +379,48 @@ def generate_cefr_wordlist(
     # Load progress
     progress = load_progress(progress_file) if resume else {}
 
-    # Find words needing API
-    words_needing_api = []
-    for entry in source_words:
-        word_lower = entry['word'].lower()
-        if word_lower not in progress:
-            words_needing_api.append(entry['word'])
+    # Find words needing API (progress is keyed by the same lowercase form)
+    words_needing_api = [
+        entry['word'] for entry in source_words if entry['_lower'] not in progress
+    ]
 
     print(f"Words needing API generation: {len(words_needing_api)}")
 
     # Generate with API
     if use_api and words_needing_api:
+        cache = LLMCache(LLM_CACHE_FILE) if response_cache else None
         try:
-            client = GeminiClient()
+            client = GeminiClient(
+                api_key=api_key, use_context_cache=context_cache, response_cache=cache
+            )
+            if quota_share > 1:
+                client.limiter = RateLimiter(
+                    client.requests_per_minute / quota_share,
+                    client.tokens_per_minute / quota_share,
+                )
+            batches = list(chunks(words_needing_api, BATCH_SIZE))
             print(f"\nGenerating data for {len(words_needing_api)} words...")
-            print(f"Batch size: {BATCH_SIZE}, Estimated batches: {(len(words_needing_api) + BATCH_SIZE - 1) // BATCH_SIZE}")
-
-            for i, batch in enumerate(chunks(words_needing_api, BATCH_SIZE)):
-                batch_num = i + 1
-                total_batches = (len(words_needing_api) + BATCH_SIZE - 1) // BATCH_SIZE
-                print(f"\nBatch {batch_num}/{total_batches}: Processing {len(batch)} words: {batch[:3]}...")
-
-                try:
-                    results = client.generate_cefr_word_data(batch, config['level'])
-
-                    valid_results = []
-                    for item in results:
-                        issues = validate_word_entry(item)
-                        if issues:
-                            print(f"  Warning: Issues with '{item.get('word', '?')}': {issues[:2]}")
-                        valid_results.append(item)
-
-                    for item in valid_results:
-                        progress[item['word'].lower()] = item
-
-                    save_progress(progress_file, valid_results)
-                    print(f"  Saved {len(valid_results)} words to checkpoint")
-
-                except Exception as e:
-                    print(f"  Batch failed: {e}")
-                    print("  Stopping to preserve progress. Run with --resume to continue.")
-                    break
-
+            print(f"Batch size: {BATCH_SIZE}, Batches: {len(batches)}, "
+                  f"Batches per request: {SUPER_BATCH}, Concurrency: {API_CONCURRENCY}")
+            with open_progress_store(progress_file) as store:
+                asyncio.run(generate_batches(client, batches, config['level'], progress, store))
         except (ImportError, ValueError) as e:
             print(f"Warning: Cannot initialize Gemini client: {e}")
             print("Proceeding without API generation...")
+        finally:
+            if cache is not None:
+                cache.close()
 
     # Build final output
     print("\nBuilding final word list...")
     all_words = []
+    missing = 0  # Words without API data
 
     for entry in source_words:
         word = entry['word']
-        word_lower = word.lower()
-        api_data = progress.get(word_lower, {})
+        api_data = progress.get(entry['_lower'], {})
+        if not api_data:
+            missing += 1
 
         word_entry = {
             'word': word,
@@ -328,8 +434,7 @@ def generate_cefr_wordlist(
 
         all_words.append(word_entry)
 
-    # Sort alphabetically
-    all_words.sort(key=lambda x: x['word'].lower())
+    # Already alphabetical: built in source_words order, which is sorted by _lower
 
     # Write output
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -342,18 +447,23 @@ def generate_cefr_wordlist(
         'words': all_words
     }
 
-    output_path = OUTPUT_DIR / config['output']
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, ensure_ascii=False, indent=2)
+    fingerprint_file.unlink(missing_ok=True)
+    dump_json(output_data, output_path)
 
     print(f"Word list written to: {output_path}")
 
-    # Statistics
+    # Statistics (one pass over the list)
+    with_translation = with_phonetic = with_examples = 0
+    for w in all_words:
+        with_translation += bool(w.get('translation_cn'))
+        with_phonetic += bool(w.get('phonetic'))
+        with_examples += len(w.get('examples', ())) >= 2
+
     stats = {
         'total_words': len(all_words),
-        'with_translation': sum(1 for w in all_words if w.get('translation_cn')),
-        'with_phonetic': sum(1 for w in all_words if w.get('phonetic')),
-        'with_examples': sum(1 for w in all_words if len(w.get('examples', [])) >= 2),
+        'with_translation': with_translation,
+        'with_phonetic': with_phonetic,
+        'with_examples': with_examples,
     }
 
     print(f"\nStatistics for CEFR {config['level']}:")
@@ -362,6 +472,10 @@ def generate_cefr_wordlist(
     print(f"  With phonetic: {stats['with_phonetic']} ({100*stats['with_phonetic']/stats['total_words']:.1f}%)")
     print(f"  With 2+ examples: {stats['with_examples']} ({100*stats['with_examples']/stats['total_words']:.1f}%)")
 
+    if not dry_run:
+        fingerprint = output_fingerprint(level, progress_file, use_api, resume)
+        save_fingerprint(fingerprint_file, fingerprint, missing, stats)
+
     return stats
 
 
@@ -388,6 +502,27 @@ def main():
         action='store_true',
         help='Process only 10 words for testing'
     )
+    parser.add_argument(
+        '--context-cache',
+        action='store_true',
+        help='Send the fixed prompt instructions once as Gemini cached content'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Ignore the on-disk response cache and regenerate every word'
+    )
+    parser.add_argument(
+        '--parallel',
+        action='store_true',
+        help='Generate levels in parallel processes, one GEMINI_API_KEYS key each '
+             '(levels sharing a key split its quota)'
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Rebuild word lists even if their inputs are unchanged'
+    )
 
     args = parser.parse_args()
 
@@ -395,17 +530,38 @@ def main():
 
     print(f"Will generate CEFR word lists for: {', '.join(levels)}")
 
+    options = dict(
+        use_api=not args.no_api,
+        resume=args.resume,
+        dry_run=args.dry_run,
+        context_cache=args.context_cache,
+        response_cache=not args.no_cache,
+        force=args.force,
+    )
+
     all_stats = {}
-    for level in levels:
-        config = CEFR_CONFIGS[level]
-        stats = generate_cefr_wordlist(
-            level=level,
-            config=config,
-            use_api=not args.no_api,
-            resume=args.resume,
-            dry_run=args.dry_run,
-        )
-        all_stats[level] = stats
+    if args.parallel and len(levels) > 1:
+        # Levels are mostly waiting on the API, so one process per level.
+        # Keys are dealt out round-robin; levels sharing a key split its quota.
+        workers = len(levels)
+        keys = load_api_keys() or [None]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                level: pool.submit(
+                    generate_cefr_wordlist,
+                    level=level,
+                    config=CEFR_CONFIGS[level],
+                    api_key=keys[i % len(keys)],
+                    quota_share=len(levels[i % len(keys)::len(keys)]),
+                    **options,
+                )
+                for i, level in enumerate(levels)
+            }
+            for level, future in futures.items():
+                all_stats[level] = future.result()
+    else:
+        for level in levels:
+            all_stats[level] = generate_cefr_wordlist(level=level, config=CEFR_CONFIGS[level], **options)
 
     print(f"\n{'='*60}")
     print("SUMMARY")
@@ -23,17 +23,19 @@ Usage:
 """
 
 import argparse
-import json
+import asyncio
 import os
+import re
 import sys
 import time
+from operator import itemgetter
 from pathlib import Path
 from typing import Optional
 
 try:
-    import jsonlines
+    import ijson
 except ImportError:
-    jsonlines = None
+    ijson = None
 
 try:
     from dotenv import load_dotenv
@@ -43,15 +45,29 @@ except ImportError:
 
 # Add utils to path
 sys.path.insert(0, str(Path(__file__).parent))
-from utils.gemini_client import GeminiClient
-from utils.json_repair import validate_word_entry
+from utils.gemini_client import MODEL_NAME, PROMPT_VERSION, GeminiClient, RateLimitError
+from utils.json_io import dump_json, load_json
+from utils.json_repair import WORD_ENTRY_SCHEMA, validate_word_entry
+from utils.llm_cache import LLMCache
+from utils.progress import (
+    ProgressStore,
+    checkpoint_meta,
+    run_fingerprint,
+    save_fingerprint,
+    up_to_date_stats,
+)
 
 
 # Configuration
 DEFAULT_SOURCE_PATH = "D:/temp/english-vocabulary/json/3-CET4-顺序.json"
 DEFAULT_OUTPUT_PATH = Path(__file__).parent.parent.parent / "assets" / "wordlists" / "english" / "cet4.json"
-PROGRESS_FILE = Path(__file__).parent / "cet4_progress.jsonl"
+PROGRESS_FILE = Path(__file__).parent / "cet4_progress.sqlite"
+LEGACY_PROGRESS_FILE = PROGRESS_FILE.with_suffix('.jsonl')  # Imported once, then renamed
+FINGERPRINT_FILE = Path(__file__).parent / "cet4_output.fingerprint"  # Inputs of the last full run
+LLM_CACHE_FILE = Path(__file__).parent / 'checkpoints' / 'llm_cache.sqlite'  # Shared with the other generators
 BATCH_SIZE = 15  # Words per API request
+API_CONCURRENCY = 8  # In-flight batches; GeminiClient still enforces its RPM limit
+CHECKPOINT_META = checkpoint_meta(MODEL_NAME, PROMPT_VERSION, WORD_ENTRY_SCHEMA)
 
 
 def load_source_data(source_path: str) -> list[dict]:
@@ -62,42 +78,65 @@ def load_source_data(source_path: str) -> list[dict]:
         source_path: Path to the CET-4 JSON file
 
     Returns:
-        List of deduplicated word entries
+        List of deduplicated word entries (with '_lower', the lowercase key)
     """
     print(f"Loading source data from: {source_path}")
 
-    with open(source_path, encoding='utf-8') as f:
-        raw_data = json.load(f)
-
-    # Deduplicate by word, merging translations
+    # Deduplicate by word, merging translations. Translations/phrases go
+    # through insertion-ordered dicts keyed by their content, instead of
+    # O(k) list membership scans
     word_map = {}
+    raw_count = 0
+
+    with open(source_path, 'rb') as f:
+        # Stream entries with ijson so only the deduplicated map stays in memory
+        entries = ijson.items(f, 'item', use_float=True) if ijson is not None else load_json(source_path)
+
+        for entry in entries:
+            raw_count += 1
+            word = entry.get('word', '').strip().lower()
+            if not word:
+                continue
+
+            if word not in word_map:
+                word_map[word] = {
+                    'word': entry.get('word', '').strip(),
+                    '_lower': word,
+                    'translations': {},
+                    'phrases': {}
+                }
+
+            # Merge translations
+            translations = word_map[word]['translations']
+            for trans in entry.get('translations', []):
+                translations.setdefault((trans.get('type', ''), trans.get('translation', '')), trans)
+
+            # Merge phrases
+            phrases = word_map[word]['phrases']
+            for phrase in entry.get('phrases', []):
+                phrases.setdefault((phrase.get('phrase', ''), phrase.get('translation', '')), phrase)
+
+    for item in word_map.values():
+        item['translations'] = list(item['translations'].values())
+        item['phrases'] = list(item['phrases'].values())
 
-    for entry in raw_data:
-        word = entry.get('word', '').strip().lower()
-        if not word:
-            continue
-
-        if word not in word_map:
-            word_map[word] = {
-                'word': entry.get('word', '').strip(),
-                'translations': [],
-                'phrases': []
-            }
-
-        # Merge translations
-        for trans in entry.get('translations', []):
-            if trans not in word_map[word]['translations']:
-                word_map[word]['translations'].append(trans)
-
-        # Merge phrases
-        for phrase in entry.get('phrases', []):
-            if phrase not in word_map[word]['phrases']:
-                word_map[word]['phrases'].append(phrase)
-
-    print(f"Loaded {len(word_map)} unique words (from {len(raw_data)} entries)")
+    print(f"Loaded {len(word_map)} unique words (from {raw_count} entries)")
     return list(word_map.values())
 
 
+POS_MAP = {
+    'n': 'n.', 'v': 'v.', 'vt': 'vt.', 'vi': 'vi.',
+    'adj': 'adj.', 'adv': 'adv.', 'prep': 'prep.',
+    'conj': 'conj.', 'pron': 'pron.', 'int': 'int.',
+    'art': 'art.', 'num': 'num.',
+}
+POS_ORDER_RANK = {
+    pos: i for i, pos in enumerate(['n.', 'v.', 'vt.', 'vi.', 'adj.', 'adv.', 'prep.', 'conj.', 'pron.'])
+}
+# Compound types like "n & v"
+POS_SPLIT_RE = re.compile(r'[\s&]+')
+
+
 def normalize_part_of_speech(translations: list[dict]) -> str:
     """
     Normalize part of speech from translations.
@@ -108,29 +147,11 @@ def normalize_part_of_speech(translations: list[dict]) -> str:
     Returns:
         Normalized part of speech string
     """
-    pos_map = {
-        'n': 'n.',
-        'v': 'v.',
-        'vt': 'vt.',
-        'vi': 'vi.',
-        'adj': 'adj.',
-        'adv': 'adv.',
-        'prep': 'prep.',
-        'conj': 'conj.',
-        'pron': 'pron.',
-        'int': 'int.',
-        'art': 'art.',
-        'num': 'num.',
-    }
-
     types = set()
     for trans in translations:
-        pos = trans.get('type', '').lower().strip()
-        # Handle compound types like "n & v"
-        for part in pos.replace('&', ' ').split():
-            part = part.strip()
-            if part in pos_map:
-                types.add(pos_map[part])
+        for part in POS_SPLIT_RE.split(trans.get('type', '').lower()):
+            if part in POS_MAP:
+                types.add(POS_MAP[part])
             elif part:
                 types.add(part + '.' if not part.endswith('.') else part)
 
@@ -138,8 +159,7 @@ def normalize_part_of_speech(translations: list[dict]) -> str:
         return ''
 
     # Sort by common order
-    order = ['n.', 'v.', 'vt.', 'vi.', 'adj.', 'adv.', 'prep.', 'conj.', 'pron.']
-    sorted_types = sorted(types, key=lambda x: order.index(x) if x in order else 100)
+    sorted_types = sorted(types, key=lambda x: POS_ORDER_RANK.get(x, 100))
 
     return '/'.join(sorted_types)
 
@@ -163,6 +183,16 @@ def combine_translations(translations: list[dict]) -> str:
     return '；'.join(trans_texts)
 
 
+def open_progress_store() -> ProgressStore:
+    """
+    Open the checkpoint database, importing the older JSONL checkpoint once.
+
+    Returns:
+        Open progress store
+    """
+    return ProgressStore(PROGRESS_FILE, CHECKPOINT_META, legacy_jsonl=LEGACY_PROGRESS_FILE)
+
+
 def load_progress() -> dict[str, dict]:
     """
     Load progress from checkpoint file.
@@ -170,38 +200,45 @@ def load_progress() -> dict[str, dict]:
     Returns:
         Dictionary mapping word to generated data
     """
-    if not PROGRESS_FILE.exists():
-        return {}
-
-    if jsonlines is None:
-        print("Warning: jsonlines not installed, cannot load progress")
+    if not PROGRESS_FILE.exists() and not LEGACY_PROGRESS_FILE.exists():
         return {}
 
-    progress = {}
-    with jsonlines.open(PROGRESS_FILE) as reader:
-        for item in reader:
-            word = item.get('word', '').lower()
-            if word:
-                progress[word] = item
+    with open_progress_store() as store:
+        progress = store.load()
 
     print(f"Loaded {len(progress)} words from checkpoint")
     return progress
 
 
-def save_progress(items: list[dict]):
+def progress_revision() -> tuple[int, int]:
     """
-    Append items to progress file.
+    Identify the checkpoint's current contents.
 
-    Args:
-        items: List of word data dictionaries to save
+    Returns:
+        (entry count, newest mtime), or (0, 0) if there is no checkpoint
     """
-    if jsonlines is None:
-        print("Warning: jsonlines not installed, cannot save progress")
-        return
+    if not PROGRESS_FILE.exists() and not LEGACY_PROGRESS_FILE.exists():
+        return 0, 0
+
+    with open_progress_store() as store:
+        return store.revision()
 
-    with jsonlines.open(PROGRESS_FILE, mode='a') as writer:
-        for item in items:
-            writer.write(item)
+
+def output_fingerprint(source_path: str, output_path: Path, use_api: bool, resume: bool) -> str:
+    """
+    Fingerprint everything the output is built from.
+
+    Returns:
+        Hex digest to compare against FINGERPRINT_FILE
+    """
+    return run_fingerprint(
+        source_path,
+        PROMPT_VERSION,
+        output_path,
+        use_api,
+        resume,
+        progress_revision(),
+    )
 
 
 def chunks(lst: list, n: int):
@@ -210,6 +247,67 @@ def chunks(lst: list, n: int):
         yield lst[i:i + n]
 
 
+async def generate_batches(
+    client: GeminiClient,
+    batches: list[list[str]],
+    progress: dict[str, dict],
+    store: ProgressStore
+):
+    """
+    Run API batches concurrently, checkpointing each as it completes.
+
+    Args:
+        client: Initialized Gemini client
+        batches: Word batches to generate
+        progress: Word -> generated data map, updated in place
+        store: Checkpoint store for completed batches
+    """
+    sem = asyncio.Semaphore(API_CONCURRENCY)
+    failed = asyncio.Event()
+
+    async def process_batch(i: int, batch: list[str]):
+        async with sem:
+            # A failed batch stops new ones from starting; finished ones are kept
+            if failed.is_set():
+                return
+            print(f"\nBatch {i+1}: Processing {len(batch)} words: {batch[:3]}...")
+
+            try:
+                results = await client.generate_word_data_async(batch)
+            except RateLimitError as e:
+                # Throttled even after backing off: leave it for --resume, keep going
+                print(f"  Batch {i+1} rate limited, skipping: {e}")
+                return
+            except Exception as e:
+                print(f"  Batch {i+1} failed: {e}")
+                print("  Stopping to preserve progress. Run with --resume to continue.")
+                failed.set()
+                return
+
+        # Validate and save results
+        valid_results = []
+        for item in results:
+            issues = validate_word_entry(item)
+            if issues:
+                print(f"  Warning: Issues with '{item.get('word', '?')}': {issues[:2]}")
+            valid_results.append(item)
+
+        # Update progress
+        for item in valid_results:
+            word_lower = item['word'].lower()
+            progress[word_lower] = item
+
+        # Save checkpoint; runs without an await, so writes never interleave
+        store.add_batch(valid_results)
+        print(f"  Batch {i+1}: saved {len(valid_results)} words to checkpoint")
+
+    await asyncio.gather(*(process_batch(i, batch) for i, batch in enumerate(batches)))
+
+
+# Complex suffixes (Latin/Greek-derived words)
+COMPLEX_SUFFIX_RE = re.compile(r'(?:tion|sion|ment|ness|ical|ious|eous)$', re.IGNORECASE)
+
+
 def assign_difficulty(word: str, pos: str) -> int:
     """
     Assign difficulty level based on word characteristics.
@@ -222,8 +320,6 @@ def assign_difficulty(word: str, pos: str) -> int:
         Difficulty level 1-3
     """
     # Simple heuristic based on word length and common patterns
-    word_lower = word.lower()
-
     # Level 1: Common, short words
     if len(word) <= 5:
         return 1
@@ -233,10 +329,8 @@ def assign_difficulty(word: str, pos: str) -> int:
         return 3
 
     # Check for complex suffixes
-    complex_suffixes = ['tion', 'sion', 'ment', 'ness', 'ical', 'ious', 'eous']
-    for suffix in complex_suffixes:
-        if word_lower.endswith(suffix):
-            return 3
+    if COMPLEX_SUFFIX_RE.search(word):
+        return 3
 
     # Default to level 2
     return 2
@@ -247,7 +341,10 @@ def generate_wordlist(
     output_path: Optional[Path] = None,
     use_api: bool = True,
     resume: bool = True,
-    dry_run: bool = False
+    dry_run: bool = False,
+    force: bool = False,
+    response_cache: bool = True,
+    context_cache: bool = False,
 ) -> dict:
     """
     Generate the CET-4 word list.
@@ -258,12 +355,24 @@ def generate_wordlist(
         use_api: Whether to use Gemini API for examples
         resume: Whether to resume from checkpoint
         dry_run: If True, only process 10 words for testing
+        force: Rebuild even if the inputs are unchanged since the last full run
+        response_cache: Reuse entries from the on-disk response cache
+        context_cache: Send the fixed prompt instructions once as cached content
 
     Returns:
         Statistics dictionary
     """
     if output_path is None:
         output_path = DEFAULT_OUTPUT_PATH
+    output_path = Path(output_path)
+
+    # A fresh (non-resumed) API run always regenerates
+    if not (dry_run or force or (use_api and not resume)):
+        fingerprint = output_fingerprint(source_path, output_path, use_api, resume)
+        stats = up_to_date_stats(FINGERPRINT_FILE, fingerprint, output_path, require_complete=use_api)
+        if stats is not None:
+            print(f"Up to date: {output_path} ({stats['total_words']} words)")
+            return stats
 
     # Load source data
     source_data = load_source_data(source_path)
@@ -275,93 +384,72 @@ def generate_wordlist(
     # Load existing progress
     progress = load_progress() if resume else {}
 
-    # Prepare words that need API generation
-    words_needing_api = []
-    for entry in source_data:
-        word_lower = entry['word'].lower()
-        if word_lower not in progress:
-            words_needing_api.append(entry['word'])
+    # Prepare words that need API generation (progress uses the same lowercase key)
+    words_needing_api = [
+        entry['word'] for entry in source_data if entry['_lower'] not in progress
+    ]
 
     print(f"Words needing API generation: {len(words_needing_api)}")
 
     # Generate with API if needed
     if use_api and words_needing_api:
         try:
-            client = GeminiClient()
+            client = GeminiClient(
+                use_context_cache=context_cache,
+                response_cache=LLMCache(LLM_CACHE_FILE) if response_cache else None,
+            )
         except (ImportError, ValueError) as e:
             print(f"Warning: Cannot initialize Gemini client: {e}")
             print("Proceeding without API generation...")
             use_api = False
 
     if use_api and words_needing_api:
+        batches = list(chunks(words_needing_api, BATCH_SIZE))
         print(f"\nGenerating data for {len(words_needing_api)} words...")
-        print(f"Batch size: {BATCH_SIZE}, Estimated batches: {len(words_needing_api) // BATCH_SIZE + 1}")
-
-        for i, batch in enumerate(chunks(words_needing_api, BATCH_SIZE)):
-            print(f"\nBatch {i+1}: Processing {len(batch)} words: {batch[:3]}...")
-
-            try:
-                results = client.generate_word_data(batch)
-
-                # Validate and save results
-                valid_results = []
-                for item in results:
-                    issues = validate_word_entry(item)
-                    if issues:
-                        print(f"  Warning: Issues with '{item.get('word', '?')}': {issues[:2]}")
-                    valid_results.append(item)
+        print(f"Batch size: {BATCH_SIZE}, Batches: {len(batches)}, Concurrency: {API_CONCURRENCY}")
 
-                # Update progress
-                for item in valid_results:
-                    word_lower = item['word'].lower()
-                    progress[word_lower] = item
+        with open_progress_store() as store:
+            asyncio.run(generate_batches(client, batches, progress, store))
 
-                # Save checkpoint
-                save_progress(valid_results)
-                print(f"  Saved {len(valid_results)} words to checkpoint")
-
-            except Exception as e:
-                print(f"  Batch failed: {e}")
-                print("  Stopping to preserve progress. Run with --resume to continue.")
-                break
-
-    # Build final output
+    # Build final output in alphabetical order
     print("\nBuilding final word list...")
+    source_data.sort(key=itemgetter('_lower'))
     words_output = []
+    missing = 0  # Words without API data
 
     for entry in source_data:
         word = entry['word']
-        word_lower = word.lower()
+        translations = entry.get('translations', [])
 
         # Get API-generated data if available
-        api_data = progress.get(word_lower, {})
+        api_data = progress.get(entry['_lower'], {})
+        if not api_data:
+            missing += 1
 
         # Combine source and API data
         word_entry = {
             'word': word,
-            'translation_cn': combine_translations(entry.get('translations', [])),
-            'part_of_speech': normalize_part_of_speech(entry.get('translations', [])),
+            'translation_cn': combine_translations(translations),
+            'part_of_speech': normalize_part_of_speech(translations),
             'phonetic': api_data.get('phonetic', ''),
-            'difficulty_level': assign_difficulty(word, entry.get('translations', [])),
+            'difficulty_level': assign_difficulty(word, translations),
             'examples': api_data.get('examples', [])
         }
 
         # Use phrases from source as fallback examples if no API data
-        if not word_entry['examples'] and entry.get('phrases'):
+        phrases = entry.get('phrases')
+        if not word_entry['examples'] and phrases:
             word_entry['examples'] = [
                 {
                     'sentence': phrase.get('phrase', ''),
                     'translation_cn': phrase.get('translation', '')
                 }
-                for phrase in entry.get('phrases', [])[:2]
+                for phrase in phrases[:2]
                 if phrase.get('phrase')
             ]
 
         words_output.append(word_entry)
 
-    # Sort alphabetically
-    words_output.sort(key=lambda x: x['word'].lower())
-
     # Build final structure
     output = {
         'name': 'CET-4 大学英语四级',
@@ -372,19 +460,23 @@ def generate_wordlist(
     }
 
     # Write output
-    output_path = Path(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
+    FINGERPRINT_FILE.unlink(missing_ok=True)
+    dump_json(output, output_path)
 
     print(f"\nOutput written to: {output_path}")
 
-    # Statistics
+    # Statistics (one pass over the list)
+    with_phonetic = with_examples = 0
+    for w in words_output:
+        with_phonetic += bool(w.get('phonetic'))
+        with_examples += len(w.get('examples', ())) >= 2
+
     stats = {
         'total_words': len(words_output),
-        'with_phonetic': sum(1 for w in words_output if w.get('phonetic')),
-        'with_examples': sum(1 for w in words_output if len(w.get('examples', [])) >= 2),
+        'with_phonetic': with_phonetic,
+        'with_examples': with_examples,
         'output_path': str(output_path),
         'file_size_mb': output_path.stat().st_size / (1024 * 1024)
     }
@@ -395,6 +487,10 @@ def generate_wordlist(
     print(f"  With 2+ examples: {stats['with_examples']} ({100*stats['with_examples']/stats['total_words']:.1f}%)")
     print(f"  File size: {stats['file_size_mb']:.2f} MB")
 
+    if not dry_run:
+        fingerprint = output_fingerprint(source_path, output_path, use_api, resume)
+        save_fingerprint(FINGERPRINT_FILE, fingerprint, missing, stats)
+
     return stats
 
 
@@ -425,6 +521,21 @@ def main():
         action='store_true',
         help='Process only 10 words for testing'
     )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Rebuild even if the source and checkpoint are unchanged'
+    )
+    parser.add_argument(
+        '--context-cache',
+        action='store_true',
+        help='Send the fixed prompt instructions once as Gemini cached content'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Ignore the on-disk response cache and regenerate every word'
+    )
 
     args = parser.parse_args()
 
@@ -440,7 +551,10 @@ def main():
         output_path=Path(args.output),
         use_api=not args.no_api,
         resume=not args.no_resume,
-        dry_run=args.dry_run
+        dry_run=args.dry_run,
+        force=args.force,
+        response_cache=not args.no_cache,
+        context_cache=args.context_cache,
     )
 
 
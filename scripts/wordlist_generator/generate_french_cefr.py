@@ -17,9 +17,12 @@ Usage:
 """
 
 import argparse
-import json
+import asyncio
+import functools
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from pathlib import Path
 from typing import Optional
 
@@ -30,11 +33,6 @@ if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
     sys.stderr.reconfigure(encoding='utf-8')
 
-try:
-    import jsonlines
-except ImportError:
-    jsonlines = None
-
 try:
     from dotenv import load_dotenv
     load_dotenv()
@@ -43,8 +41,11 @@ except ImportError:
 
 # Add utils to path
 sys.path.insert(0, str(Path(__file__).parent))
-from utils.gemini_client import GeminiClient
-from utils.json_repair import validate_word_entry
+from utils.gemini_client import MODEL_NAME, PROMPT_VERSION, GeminiClient, RateLimitError
+from utils.json_io import dump_json, dump_json_streamed, load_json, load_line
+from utils.json_repair import WORD_ENTRY_SCHEMA, validate_word_entry
+from utils.llm_cache import LLMCache
+from utils.progress import ProgressStore, checkpoint_meta
 
 
 # Configuration for each CEFR level
@@ -56,7 +57,7 @@ FRENCH_CEFR_CONFIGS = {
         'description': '法语 A1 级别词汇（入门级）',
         'target_count': 500,
         'difficulty': 1,
-        'progress_file': 'french_cefr_a1_progress.jsonl',
+        'progress_file': 'french_cefr_a1_progress.sqlite',
     },
     'a2': {
         'level': 'A2',
@@ -65,7 +66,7 @@ FRENCH_CEFR_CONFIGS = {
         'description': '法语 A2 级别词汇（基础级）',
         'target_count': 1000,
         'difficulty': 1,
-        'progress_file': 'french_cefr_a2_progress.jsonl',
+        'progress_file': 'french_cefr_a2_progress.sqlite',
     },
     'b1': {
         'level': 'B1',
@@ -74,7 +75,7 @@ FRENCH_CEFR_CONFIGS = {
         'description': '法语 B1 级别词汇（中级）',
         'target_count': 1500,
         'difficulty': 2,
-        'progress_file': 'french_cefr_b1_progress.jsonl',
+        'progress_file': 'french_cefr_b1_progress.sqlite',
     },
     'b2': {
         'level': 'B2',
@@ -83,7 +84,7 @@ FRENCH_CEFR_CONFIGS = {
         'description': '法语 B2 级别词汇（中高级）',
         'target_count': 2000,
         'difficulty': 2,
-        'progress_file': 'french_cefr_b2_progress.jsonl',
+        'progress_file': 'french_cefr_b2_progress.sqlite',
     },
     'c1': {
         'level': 'C1',
@@ -92,7 +93,7 @@ FRENCH_CEFR_CONFIGS = {
         'description': '法语 C1 级别词汇（高级）',
         'target_count': 2500,
         'difficulty': 3,
-        'progress_file': 'french_cefr_c1_progress.jsonl',
+        'progress_file': 'french_cefr_c1_progress.sqlite',
     },
     'c2': {
         'level': 'C2',
@@ -101,7 +102,7 @@ FRENCH_CEFR_CONFIGS = {
         'description': '法语 C2 级别词汇（精通级）',
         'target_count': 3000,
         'difficulty': 3,
-        'progress_file': 'french_cefr_c2_progress.jsonl',
+        'progress_file': 'french_cefr_c2_progress.sqlite',
     },
 }
 
@@ -109,11 +110,32 @@ FRENCH_CEFR_CONFIGS = {
 DATA_DIR = Path(__file__).parent / 'data' / 'french'
 OUTPUT_DIR = Path(__file__).parent.parent.parent / 'assets' / 'wordlists' / 'french'
 CHECKPOINT_DIR = Path(__file__).parent / 'checkpoints'
+LLM_CACHE_FILE = CHECKPOINT_DIR / 'llm_cache.sqlite'
 
 BATCH_SIZE = 15
+API_CONCURRENCY = 8  # in-flight requests; GeminiClient still enforces its RPM limit
+CHECKPOINT_META = checkpoint_meta(MODEL_NAME, PROMPT_VERSION, WORD_ENTRY_SCHEMA)
+
+
+@functools.lru_cache(maxsize=1)
+def get_client(response_cache: bool = True, context_cache: bool = False) -> GeminiClient:
+    """Return the process-wide Gemini client, so every level shares one rate limiter."""
+    return GeminiClient(
+        use_context_cache=context_cache,
+        response_cache=LLMCache(LLM_CACHE_FILE) if response_cache else None,
+    )
+
+
+def warm_client(use_api: bool, response_cache: bool = True, context_cache: bool = False):
+    """Create the shared client up front, before parallel levels race to."""
+    if use_api:
+        try:
+            get_client(response_cache, context_cache)
+        except (ImportError, ValueError):
+            pass  # Each level reports the error itself
 
 
-def generate_french_vocabulary_list(level: str, target_count: int) -> list[str]:
+def generate_french_vocabulary_list(level: str, target_count: int, client: GeminiClient) -> list[str]:
     """
     Generate a list of French words appropriate for the given CEFR level.
 
@@ -121,7 +143,6 @@ def generate_french_vocabulary_list(level: str, target_count: int) -> list[str]:
     Returns a list of French words (headwords only).
     Generates in batches to avoid response truncation.
     """
-    client = GeminiClient()
 
     level_descriptions = {
         'A1': 'very basic everyday words (greetings, numbers, family, colors, food, common verbs like être/avoir/aller)',
@@ -166,19 +187,13 @@ Generate {batch_size} words now:"""
 
         # Parse JSON array from response
         try:
-            # Strip all markdown code fences (both opening and closing)
-            import re
-            response_cleaned = re.sub(r'```(?:json|[a-z]*)\s*\n?', '', response)  # Remove ```json or ```
-            response_cleaned = re.sub(r'```\s*$', '', response_cleaned)  # Remove trailing ```
-            response_cleaned = response_cleaned.strip()
-
-            # Find first [ and last ] to extract JSON array
-            start_idx = response_cleaned.find('[')
-            end_idx = response_cleaned.rfind(']')
-
-            if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
-                json_str = response_cleaned[start_idx:end_idx + 1]
-                batch_words = json.loads(json_str)
+            # First [ to last ] is the array; this also skips any markdown fences
+            start_idx = response.find('[')
+            end_idx = response.rfind(']')
+
+            if start_idx != -1 and end_idx > start_idx:
+                json_str = response[start_idx:end_idx + 1]
+                batch_words = load_line(json_str)
                 print(f"    Got {len(batch_words)} words")
                 all_words.extend(batch_words)
             else:
@@ -193,47 +208,86 @@ Generate {batch_size} words now:"""
     return all_words[:target_count]  # Limit to target count
 
 
+def open_progress_store(progress_file: Path) -> ProgressStore:
+    """Open a level's checkpoint, importing its older JSONL checkpoint once."""
+    return ProgressStore(progress_file, CHECKPOINT_META, legacy_jsonl=progress_file.with_suffix('.jsonl'))
+
+
 def load_progress(progress_file: Path) -> dict[str, dict]:
     """Load progress from checkpoint file."""
-    if not progress_file.exists():
-        return {}
-    if jsonlines is None:
-        print("Warning: jsonlines not installed, cannot load checkpoint")
+    if not progress_file.exists() and not progress_file.with_suffix('.jsonl').exists():
         return {}
 
-    progress = {}
-    with jsonlines.open(progress_file) as reader:
-        for item in reader:
-            word = item.get('word', '').lower()
-            if word:
-                progress[word] = item
+    with open_progress_store(progress_file) as store:
+        progress = store.load()
     print(f"Loaded {len(progress)} words from checkpoint")
     return progress
 
 
-def save_progress(progress_file: Path, items: list[dict]):
-    """Append items to progress file."""
-    if jsonlines is None:
-        return
-
-    progress_file.parent.mkdir(parents=True, exist_ok=True)
-    with jsonlines.open(progress_file, mode='a') as writer:
-        for item in items:
-            writer.write(item)
-
-
 def chunks(lst: list, n: int):
     """Yield successive n-sized chunks from lst."""
     for i in range(0, len(lst), n):
         yield lst[i:i + n]
 
 
+async def generate_batches(
+    client: GeminiClient,
+    batches: list[list[str]],
+    level: str,
+    progress: dict[str, dict],
+    store: ProgressStore,
+):
+    """Run API batches concurrently, checkpointing each as it completes."""
+    sem = asyncio.Semaphore(API_CONCURRENCY)
+    failed = asyncio.Event()
+    total_batches = len(batches)
+
+    async def process_batch(i: int, batch: list[str]):
+        async with sem:
+            # A failed batch stops new ones from starting; finished ones are kept
+            if failed.is_set():
+                return
+            print(f"\nBatch {i + 1}/{total_batches}: Processing {len(batch)} words: {batch[:3]}...")
+
+            try:
+                # Generate French word data (phonetic, translation, examples)
+                results = await client.generate_french_word_data_async(batch, level)
+            except RateLimitError as e:
+                # Throttled even after backing off: leave it for --resume, keep going
+                print(f"  Batch {i + 1} rate limited, skipping: {e}")
+                return
+            except Exception as e:
+                print(f"  Batch {i + 1} failed: {e}")
+                print("  Stopping to preserve progress. Run with --resume to continue.")
+                failed.set()
+                return
+
+        valid_results = []
+        for item in results:
+            issues = validate_word_entry(item)
+            if issues:
+                print(f"  Warning: Issues with '{item.get('word', '?')}': {issues[:2]}")
+            valid_results.append(item)
+
+        for item in valid_results:
+            progress[item['word'].lower()] = item
+
+        # Runs without an await, so checkpoint writes never interleave
+        store.add_batch(valid_results)
+        print(f"  Batch {i + 1}: saved {len(valid_results)} words to checkpoint")
+
+    await asyncio.gather(*(process_batch(i, batch) for i, batch in enumerate(batches)))
+
+
 def generate_french_cefr_wordlist(
     level: str,
     config: dict,
     use_api: bool = True,
     resume: bool = True,
     dry_run: bool = False,
+    export_jsonl: bool = False,
+    response_cache: bool = True,
+    context_cache: bool = False,
 ) -> dict:
     """Generate French word list for a specific CEFR level."""
     print(f"\n{'='*60}")
@@ -245,19 +299,27 @@ def generate_french_cefr_wordlist(
     # Load progress
     progress = load_progress(progress_file) if resume else {}
 
+    # The generated headword list, so a resumed run does not ask for it again
+    words_file = CHECKPOINT_DIR / f'french_cefr_{level}_words.json'
+
     # Generate French vocabulary list if needed
     if not progress or len(progress) < config['target_count']:
-        if use_api:
+        if resume and words_file.exists():
+            french_words = load_json(words_file)
+            print(f"Using {len(french_words)} words from {words_file.name}")
+        elif use_api:
             try:
-                client = GeminiClient()
+                client = get_client(response_cache, context_cache)
                 print(f"Generating {config['target_count']} French words for level {config['level']}...")
-                french_words = generate_french_vocabulary_list(config['level'], config['target_count'])
+                french_words = generate_french_vocabulary_list(config['level'], config['target_count'], client)
 
                 if not french_words:
                     print("Error: Failed to generate French vocabulary list")
                     return {}
 
                 print(f"Generated {len(french_words)} French words")
+                CHECKPOINT_DIR.mkdir(parents=True, exist_ok=True)
+                dump_json(french_words, words_file, indent=False)
             except Exception as e:
                 print(f"Error generating vocabulary: {e}")
                 return {}
@@ -273,59 +335,41 @@ def generate_french_cefr_wordlist(
         print("DRY RUN: Processing only 10 words")
         french_words = french_words[:10]
 
+    # Lowercase each word once; the progress lookups and the final sort reuse it
+    keyed_words = [(word.lower(), word) for word in french_words]
+
     # Find words needing API enrichment
-    words_needing_api = []
-    for word in french_words:
-        word_lower = word.lower()
-        if word_lower not in progress:
-            words_needing_api.append(word)
+    words_needing_api = [word for word_lower, word in keyed_words if word_lower not in progress]
 
     print(f"Words needing API enrichment: {len(words_needing_api)}")
 
     # Generate enriched data with API
     if use_api and words_needing_api:
         try:
-            client = GeminiClient()
+            client = get_client(response_cache, context_cache)
+            batches = list(chunks(words_needing_api, BATCH_SIZE))
             print(f"\nGenerating data for {len(words_needing_api)} French words...")
-            print(f"Batch size: {BATCH_SIZE}, Estimated batches: {(len(words_needing_api) + BATCH_SIZE - 1) // BATCH_SIZE}")
-
-            for i, batch in enumerate(chunks(words_needing_api, BATCH_SIZE)):
-                batch_num = i + 1
-                total_batches = (len(words_needing_api) + BATCH_SIZE - 1) // BATCH_SIZE
-                print(f"\nBatch {batch_num}/{total_batches}: Processing {len(batch)} words: {batch[:3]}...")
-
-                try:
-                    # Generate French word data (phonetic, translation, examples)
-                    results = client.generate_french_word_data(batch, config['level'])
-
-                    valid_results = []
-                    for item in results:
-                        issues = validate_word_entry(item)
-                        if issues:
-                            print(f"  Warning: Issues with '{item.get('word', '?')}': {issues[:2]}")
-                        valid_results.append(item)
+            print(f"Batch size: {BATCH_SIZE}, Batches: {len(batches)}, Concurrency: {API_CONCURRENCY}")
 
-                    for item in valid_results:
-                        progress[item['word'].lower()] = item
-
-                    save_progress(progress_file, valid_results)
-                    print(f"  Saved {len(valid_results)} words to checkpoint")
-
-                except Exception as e:
-                    print(f"  Batch failed: {e}")
-                    print("  Stopping to preserve progress. Run with --resume to continue.")
-                    break
+            with open_progress_store(progress_file) as store:
+                asyncio.run(generate_batches(client, batches, config['level'], progress, store))
 
         except (ImportError, ValueError) as e:
             print(f"Warning: Cannot initialize Gemini client: {e}")
             print("Proceeding without API generation...")
 
-    # Build final output
+    if export_jsonl and progress_file.exists():
+        export_path = progress_file.with_suffix('.export.jsonl')
+        with open_progress_store(progress_file) as store:
+            count = store.export_jsonl(export_path)
+        print(f"Exported {count} checkpoint entries to {export_path}")
+
+    # Build final output in alphabetical order
     print("\nBuilding final French word list...")
+    keyed_words.sort(key=itemgetter(0))
     all_words = []
 
-    for word in french_words:
-        word_lower = word.lower()
+    for word_lower, word in keyed_words:
         api_data = progress.get(word_lower, {})
 
         word_entry = {
@@ -337,33 +381,35 @@ def generate_french_cefr_wordlist(
 
         all_words.append(word_entry)
 
-    # Sort alphabetically
-    all_words.sort(key=lambda x: x['word'].lower())
-
     # Write output
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    output_data = {
+    header = {
         'name': config['name'],
         'language': 'fr',
         'description': f"{config['description']} ({len(all_words)}词)",
         'category': 'cefr',
         'level': config['level'],
-        'words': all_words
     }
 
+    # Serialize one entry at a time rather than the whole list at once
     output_path = OUTPUT_DIR / config['output']
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, ensure_ascii=False, indent=2)
+    dump_json_streamed(header, 'words', all_words, output_path)
 
     print(f"French word list written to: {output_path}")
 
-    # Statistics
+    # Statistics (one pass; every entry was built above with all keys)
+    with_translation = with_phonetic = with_examples = 0
+    for w in all_words:
+        with_translation += bool(w['translation_cn'])
+        with_phonetic += bool(w['phonetic'])
+        with_examples += len(w['examples']) >= 2
+
     stats = {
         'total_words': len(all_words),
-        'with_translation': sum(1 for w in all_words if w.get('translation_cn')),
-        'with_phonetic': sum(1 for w in all_words if w.get('phonetic')),
-        'with_examples': sum(1 for w in all_words if len(w.get('examples', [])) >= 2),
+        'with_translation': with_translation,
+        'with_phonetic': with_phonetic,
+        'with_examples': with_examples,
     }
 
     print(f"\nStatistics for French CEFR {config['level']}:")
@@ -398,6 +444,28 @@ def main():
         action='store_true',
         help='Process only 10 words for testing'
     )
+    parser.add_argument(
+        '--export-jsonl',
+        action='store_true',
+        help='Also dump each level checkpoint to a JSONL file for debugging'
+    )
+    parser.add_argument(
+        '--context-cache',
+        action='store_true',
+        help='Send the fixed prompt instructions once as Gemini cached content'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Ignore the on-disk response cache and call the API for every prompt'
+    )
+
+    parser.add_argument(
+        '--parallel',
+        action='store_true',
+        help='Generate levels in parallel threads sharing one rate-limited client'
+    )
+
 
     args = parser.parse_args()
 
@@ -405,17 +473,36 @@ def main():
 
     print(f"Will generate French CEFR word lists for: {', '.join(levels)}")
 
+    options = dict(
+        use_api=not args.no_api,
+        resume=args.resume,
+        dry_run=args.dry_run,
+        export_jsonl=args.export_jsonl,
+        response_cache=not args.no_cache,
+        context_cache=args.context_cache,
+    )
+
     all_stats = {}
-    for level in levels:
-        config = FRENCH_CEFR_CONFIGS[level]
-        stats = generate_french_cefr_wordlist(
-            level=level,
-            config=config,
-            use_api=not args.no_api,
-            resume=args.resume,
-            dry_run=args.dry_run,
-        )
-        all_stats[level] = stats
+    if args.parallel and len(levels) > 1:
+        # Levels mostly wait on the API; the shared client's limiter paces them all
+        warm_client(options['use_api'], options['response_cache'], options['context_cache'])
+        with ThreadPoolExecutor(max_workers=len(levels)) as pool:
+            futures = {
+                level: pool.submit(
+                    generate_french_cefr_wordlist,
+                    level=level,
+                    config=FRENCH_CEFR_CONFIGS[level],
+                    **options,
+                )
+                for level in levels
+            }
+            for level, future in futures.items():
+                all_stats[level] = future.result()
+    else:
+        for level in levels:
+            all_stats[level] = generate_french_cefr_wordlist(
+                level=level, config=FRENCH_CEFR_CONFIGS[level], **options
+            )
 
     print(f"\n{'='*60}")
     print("SUMMARY")
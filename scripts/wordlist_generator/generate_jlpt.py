@@ -15,19 +15,17 @@ Usage:
 """
 
 import argparse
+import asyncio
 import csv
-import json
+import functools
 import os
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from pathlib import Path
 from typing import Optional
 
-try:
-    import jsonlines
-except ImportError:
-    jsonlines = None
-
 try:
     from dotenv import load_dotenv
     load_dotenv()
@@ -36,8 +34,11 @@ except ImportError:
 
 # Add utils to path
 sys.path.insert(0, str(Path(__file__).parent))
-from utils.gemini_client import GeminiClient
-from utils.json_repair import validate_word_entry
+from utils.gemini_client import MODEL_NAME, PROMPT_VERSION, GeminiClient, RateLimitError
+from utils.json_io import dump_json_streamed
+from utils.json_repair import JAPANESE_ENTRY_SCHEMA, validate_japanese_entry
+from utils.llm_cache import LLMCache
+from utils.progress import ProgressStore, checkpoint_meta
 
 
 # Configuration for each JLPT level
@@ -82,45 +83,65 @@ JLPT_CONFIGS = {
 SOURCE_CSV = Path(__file__).parent / 'data' / 'jlpt' / 'all.csv'
 OUTPUT_DIR = Path(__file__).parent.parent.parent / 'assets' / 'wordlists' / 'japanese'
 CHECKPOINT_DIR = Path(__file__).parent / 'checkpoints'
+LLM_CACHE_FILE = CHECKPOINT_DIR / 'llm_cache.sqlite'
 BATCH_SIZE = 15
+API_CONCURRENCY = 8  # in-flight requests; GeminiClient still enforces its RPM limit
+CHECKPOINT_META = checkpoint_meta(MODEL_NAME, PROMPT_VERSION, JAPANESE_ENTRY_SCHEMA)
 
 
-def load_source_data(level: str) -> list[dict]:
-    """Load and filter source data for specific JLPT level."""
-    print(f"Loading source data from: {SOURCE_CSV}")
-
-    config = JLPT_CONFIGS[level]
-    level_tags = set(config['level_tags'])
+@functools.lru_cache(maxsize=1)
+def load_source_rows() -> tuple[tuple[str, str, str, frozenset], ...]:
+    """
+    Parse the source CSV once per process; every level filters the same rows.
 
-    words = []
-    seen = set()
+    Returns (expression, reading, meaning, tags) for rows that have both an
+    expression and a reading.
+    """
+    print(f"Loading source data from: {SOURCE_CSV}")
 
-    with open(SOURCE_CSV, encoding='utf-8') as f:
-        reader = csv.DictReader(f)
+    rows = []
+    with open(SOURCE_CSV, encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        columns = [
+            header.index(name) if name in header else None
+            for name in ('expression', 'reading', 'meaning', 'tags')
+        ]
         for row in reader:
-            expression = row.get('expression', '').strip()
-            reading = row.get('reading', '').strip()
-            meaning = row.get('meaning', '').strip()
-            tags = row.get('tags', '')
-
+            expression, reading, meaning, tags = (
+                row[i] if i is not None and i < len(row) else '' for i in columns
+            )
+            expression = expression.strip()
+            reading = reading.strip()
             if not expression or not reading:
                 continue
+            rows.append((expression, reading, meaning.strip(), frozenset(tags.split())))
 
-            # Check if this entry matches our level
-            row_tags = set(tags.split())
-            if not row_tags & level_tags:
-                continue
+    return tuple(rows)
 
-            # Deduplicate by expression
-            if expression in seen:
-                continue
-            seen.add(expression)
 
-            words.append({
-                'word': expression,
-                'reading': reading,
-                'meaning_en': meaning,
-            })
+def load_source_data(level: str) -> list[dict]:
+    """Load and filter source data for specific JLPT level."""
+    level_tags = JLPT_CONFIGS[level]['level_tags']
+
+    words = []
+    seen = set()
+
+    for expression, reading, meaning, row_tags in load_source_rows():
+        # Check if this entry matches our level
+        if row_tags.isdisjoint(level_tags):
+            continue
+
+        # Deduplicate by expression
+        if expression in seen:
+            continue
+        seen.add(expression)
+
+        words.append({
+            'word': expression,
+            'reading': reading,
+            'meaning_en': meaning,
+        })
 
     print(f"Loaded {len(words)} unique words for {level.upper()}")
     return words
@@ -131,89 +152,125 @@ def get_jlpt_level_display(level: str) -> str:
     return level.upper()  # N5, N4, etc.
 
 
+# Part-of-speech hints in English meanings, in priority order
+POS_PATTERNS = [
+    (r'\(n\)', '名'),
+    (r'\(v\)', '动'),
+    (r'\(adj\)', '形'),
+    (r'\(adv\)', '副'),
+    (r'\bverb\b', '动'),
+    (r'\bnoun\b', '名'),
+    (r'\badjective\b', '形'),
+    (r'\badverb\b', '副'),
+    (r'\bparticle\b', '助'),
+    (r'\bconjunction\b', '接'),
+    (r'\binterjection\b', '感'),
+    (r'\bto\s+\w+', '动'),  # "to do" patterns indicate verb
+]
+
+# One anchored alternation of lookaheads: the first pattern found anywhere in
+# the meaning wins, as if each were searched in turn, in a single match call
+POS_RE = re.compile(
+    '|'.join(f'(?=.*?{pattern})(?P<p{i}>)' for i, (pattern, _) in enumerate(POS_PATTERNS)),
+    re.DOTALL,
+)
+POS_BY_GROUP = {f'p{i}': pos for i, (_, pos) in enumerate(POS_PATTERNS)}
+
+
 def normalize_part_of_speech(meaning: str) -> str:
     """Extract part of speech from meaning if present."""
-    # Common patterns in English meanings
-    pos_patterns = {
-        r'\(n\)': '名',
-        r'\(v\)': '动',
-        r'\(adj\)': '形',
-        r'\(adv\)': '副',
-        r'\bverb\b': '动',
-        r'\bnoun\b': '名',
-        r'\badjective\b': '形',
-        r'\badverb\b': '副',
-        r'\bparticle\b': '助',
-        r'\bconjunction\b': '接',
-        r'\binterjection\b': '感',
-        r'\bto\s+\w+': '动',  # "to do" patterns indicate verb
-    }
+    match = POS_RE.match(meaning.lower())
+    return POS_BY_GROUP[match.lastgroup] if match else ''
 
-    meaning_lower = meaning.lower()
-    for pattern, pos in pos_patterns.items():
-        if re.search(pattern, meaning_lower):
-            return pos
 
-    return ''
+def open_progress_store(progress_file: Path) -> ProgressStore:
+    """Open a level's checkpoint, importing its older JSONL checkpoint once."""
+    # Keyed by the exact expression: Japanese words are not case-folded
+    return ProgressStore(
+        progress_file, CHECKPOINT_META, legacy_jsonl=progress_file.with_suffix('.jsonl'), key=str
+    )
 
 
 def load_progress(progress_file: Path) -> dict[str, dict]:
     """Load progress from checkpoint file."""
-    if not progress_file.exists():
-        return {}
-    if jsonlines is None:
-        print("Warning: jsonlines not installed, cannot load checkpoint")
+    if not progress_file.exists() and not progress_file.with_suffix('.jsonl').exists():
         return {}
 
-    progress = {}
-    with jsonlines.open(progress_file) as reader:
-        for item in reader:
-            word = item.get('word', '')
-            if word:
-                progress[word] = item
+    with open_progress_store(progress_file) as store:
+        progress = store.load()
     print(f"Loaded {len(progress)} words from checkpoint")
     return progress
 
 
-def save_progress(progress_file: Path, items: list[dict]):
-    """Append items to progress file."""
-    if jsonlines is None:
-        return
-    progress_file.parent.mkdir(parents=True, exist_ok=True)
-    with jsonlines.open(progress_file, mode='a') as writer:
-        for item in items:
-            writer.write(item)
-
-
 def chunks(lst: list, n: int):
     """Yield successive n-sized chunks from lst."""
     for i in range(0, len(lst), n):
         yield lst[i:i + n]
 
 
-def validate_japanese_entry(entry: dict) -> list[str]:
-    """Validate a Japanese word entry."""
-    issues = []
-    word = entry.get('word', '<unknown>')
-
-    if not entry.get('word'):
-        issues.append("Missing 'word' field")
-    if not entry.get('translation_cn'):
-        issues.append(f"Missing 'translation_cn' for: {word}")
-
-    examples = entry.get('examples', [])
-    if not examples:
-        issues.append(f"No examples for: {word}")
-    elif len(examples) < 2:
-        issues.append(f"Less than 2 examples for: {word} (has {len(examples)})")
+async def generate_batches(
+    client: GeminiClient,
+    batches: list[list[dict]],
+    progress: dict[str, dict],
+    store: ProgressStore,
+):
+    """Run API batches concurrently, checkpointing each as it completes."""
+    sem = asyncio.Semaphore(API_CONCURRENCY)
+    failed = asyncio.Event()
+
+    async def process_batch(i: int, batch: list[dict]):
+        batch_words = [w['word'] for w in batch]
+        async with sem:
+            # A failed batch stops new ones from starting; finished ones are kept
+            if failed.is_set():
+                return
+            print(f"\nBatch {i+1}: Processing {len(batch)} words: {batch_words[:3]}...")
+
+            try:
+                results = await client.generate_japanese_enrichment_async(batch)
+            except RateLimitError as e:
+                # Throttled even after backing off: leave it for --resume, keep going
+                print(f"  Batch {i+1} rate limited, skipping: {e}")
+                return
+            except Exception as e:
+                print(f"  Batch {i+1} failed: {e}")
+                print("  Stopping to preserve progress. Run with --resume to continue.")
+                failed.set()
+                return
+
+        valid_results = []
+        for item in results:
+            issues = validate_japanese_entry(item)
+            if issues:
+                print(f"  Warning: Issues with '{item.get('word', '?')}': {issues[:2]}")
+            valid_results.append(item)
+
+        for item in valid_results:
+            progress[item['word']] = item
+
+        # Runs without an await, so checkpoint writes never interleave
+        store.add_batch(valid_results)
+        print(f"  Batch {i+1}: saved {len(valid_results)} words to checkpoint")
+
+    await asyncio.gather(*(process_batch(i, batch) for i, batch in enumerate(batches)))
+
+
+@functools.lru_cache(maxsize=1)
+def get_client(response_cache: bool = True, context_cache: bool = False) -> GeminiClient:
+    """Return the process-wide Gemini client, so every level shares one rate limiter."""
+    return GeminiClient(
+        use_context_cache=context_cache,
+        response_cache=LLMCache(LLM_CACHE_FILE) if response_cache else None,
+    )
 
-    for i, ex in enumerate(examples):
-        if not ex.get('sentence'):
-            issues.append(f"Example {i+1} missing 'sentence' for: {word}")
-        if not ex.get('translation_cn'):
-            issues.append(f"Example {i+1} missing 'translation_cn' for: {word}")
 
-    return issues
+def warm_client(use_api: bool, response_cache: bool = True, context_cache: bool = False):
+    """Create the shared client up front, before parallel levels race to."""
+    if use_api:
+        try:
+            get_client(response_cache, context_cache)
+        except (ImportError, ValueError):
+            pass  # Each level reports the error itself
 
 
 def generate_wordlist(
@@ -221,6 +278,9 @@ def generate_wordlist(
     use_api: bool = True,
     resume: bool = True,
     dry_run: bool = False,
+    export_jsonl: bool = False,
+    response_cache: bool = True,
+    context_cache: bool = False,
 ) -> dict:
     """Generate word list for a specific JLPT level."""
     config = JLPT_CONFIGS[level]
@@ -229,7 +289,7 @@ def generate_wordlist(
     print(f"Generating JLPT {level.upper()} word list")
     print(f"{'='*60}")
 
-    progress_file = CHECKPOINT_DIR / f'jlpt_{level}_progress.jsonl'
+    progress_file = CHECKPOINT_DIR / f'jlpt_{level}_progress.sqlite'
 
     # Load source data
     source_data = load_source_data(level)
@@ -246,49 +306,31 @@ def generate_wordlist(
     progress = load_progress(progress_file) if resume else {}
 
     # Find words needing API enrichment
-    words_needing_api = []
-    for entry in source_data:
-        if entry['word'] not in progress:
-            words_needing_api.append(entry)
+    words_needing_api = [entry for entry in source_data if entry['word'] not in progress]
 
     print(f"Words needing API generation: {len(words_needing_api)}")
 
     # Generate with API
     if use_api and words_needing_api:
         try:
-            client = GeminiClient()
+            client = get_client(response_cache, context_cache)
+            batches = list(chunks(words_needing_api, BATCH_SIZE))
             print(f"\nGenerating data for {len(words_needing_api)} words...")
-            print(f"Batch size: {BATCH_SIZE}, Estimated batches: {len(words_needing_api) // BATCH_SIZE + 1}")
-
-            for i, batch in enumerate(chunks(words_needing_api, BATCH_SIZE)):
-                batch_words = [w['word'] for w in batch]
-                print(f"\nBatch {i+1}: Processing {len(batch)} words: {batch_words[:3]}...")
-
-                try:
-                    results = client.generate_japanese_enrichment(batch)
+            print(f"Batch size: {BATCH_SIZE}, Batches: {len(batches)}, Concurrency: {API_CONCURRENCY}")
 
-                    valid_results = []
-                    for item in results:
-                        issues = validate_japanese_entry(item)
-                        if issues:
-                            print(f"  Warning: Issues with '{item.get('word', '?')}': {issues[:2]}")
-                        valid_results.append(item)
-
-                    for item in valid_results:
-                        progress[item['word']] = item
-
-                    save_progress(progress_file, valid_results)
-                    print(f"  Saved {len(valid_results)} words to checkpoint")
-
-                except Exception as e:
-                    print(f"  Batch failed: {e}")
-                    print("  Stopping to preserve progress. Run with --resume to continue.")
-                    break
+            with open_progress_store(progress_file) as store:
+                asyncio.run(generate_batches(client, batches, progress, store))
 
         except (ImportError, ValueError) as e:
             print(f"Warning: Cannot initialize Gemini client: {e}")
             print("Proceeding without API generation...")
 
+    if export_jsonl and progress_file.exists():
+        export_path = progress_file.with_suffix('.export.jsonl')
+        with open_progress_store(progress_file) as store:
+            count = store.export_jsonl(export_path)
+        print(f"Exported {count} checkpoint entries to {export_path}")
+
     # Build final output
     print("\nBuilding final word list...")
     all_words = []
@@ -318,30 +360,34 @@ def generate_wordlist(
                 all_words.append(word_entry)
 
     # Sort by reading (hiragana order)
-    all_words.sort(key=lambda x: x['reading'])
+    all_words.sort(key=itemgetter('reading'))
 
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
     # Write output
-    output = {
+    header = {
         'name': config['name'],
         'language': 'ja',
         'description': f"{config['desc']} ({len(all_words)}词)",
         'icon_name': 'language',
-        'words': all_words
     }
 
+    # Serialize one entry at a time rather than the whole list at once
     output_path = OUTPUT_DIR / config['output']
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
+    dump_json_streamed(header, 'words', all_words, output_path)
 
     print(f"Output written to: {output_path}")
 
-    # Statistics
+    # Statistics (one pass; every entry was built above with all keys)
+    with_translation = with_examples = 0
+    for w in all_words:
+        with_translation += bool(w['translation_cn'])
+        with_examples += len(w['examples']) >= 2
+
     stats = {
         'total_words': len(all_words),
-        'with_translation': sum(1 for w in all_words if w.get('translation_cn')),
-        'with_examples': sum(1 for w in all_words if len(w.get('examples', [])) >= 2),
+        'with_translation': with_translation,
+        'with_examples': with_examples,
     }
 
     print(f"\nStatistics for JLPT {level.upper()}:")
@@ -375,6 +421,28 @@ def main():
         action='store_true',
         help='Process only 10 words for testing'
     )
+    parser.add_argument(
+        '--export-jsonl',
+        action='store_true',
+        help='Also dump each level checkpoint to a JSONL file for debugging'
+    )
+    parser.add_argument(
+        '--context-cache',
+        action='store_true',
+        help='Send the fixed prompt instructions once as Gemini cached content'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Ignore the on-disk response cache and regenerate every word'
+    )
+
+    parser.add_argument(
+        '--parallel',
+        action='store_true',
+        help='Generate levels in parallel threads sharing one rate-limited client'
+    )
+
 
     args = parser.parse_args()
 
@@ -382,15 +450,27 @@ def main():
 
     print(f"Will generate word lists for: {', '.join(l.upper() for l in levels)}")
 
+    options = dict(
+        use_api=not args.no_api,
+        resume=args.resume,
+        dry_run=args.dry_run,
+        export_jsonl=args.export_jsonl,
+        response_cache=not args.no_cache,
+        context_cache=args.context_cache,
+    )
+
     all_stats = {}
-    for level in levels:
-        stats = generate_wordlist(
-            level=level,
-            use_api=not args.no_api,
-            resume=args.resume,
-            dry_run=args.dry_run,
-        )
-        all_stats[level] = stats
+    if args.parallel and len(levels) > 1:
+        # Levels mostly wait on the API; the shared client's limiter paces them all
+        warm_client(options['use_api'], options['response_cache'], options['context_cache'])
+        load_source_rows()
+        with ThreadPoolExecutor(max_workers=len(levels)) as pool:
+            futures = {level: pool.submit(generate_wordlist, level=level, **options) for level in levels}
+            for level, future in futures.items():
+                all_stats[level] = future.result()
+    else:
+        for level in levels:
+            all_stats[level] = generate_wordlist(level=level, **options)
 
     print(f"\n{'='*60}")
     print("SUMMARY")
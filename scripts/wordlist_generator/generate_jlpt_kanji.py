@@ -13,6 +13,7 @@ Usage:
     python generate_jlpt_kanji.py --level all         # Generate all levels
     python generate_jlpt_kanji.py --level n3 --resume # Resume from checkpoint
     python generate_jlpt_kanji.py --level n5 --dry-run # Test with 10 kanji
+    python generate_jlpt_kanji.py --level all --context-cache # Cache prompt instructions
 """
 
 import argparse
@@ -22,11 +23,6 @@ import sys
 from pathlib import Path
 from typing import Optional
 
-try:
-    import jsonlines
-except ImportError:
-    jsonlines = None
-
 try:
     from dotenv import load_dotenv
     load_dotenv()
@@ -35,8 +31,13 @@ except ImportError:
 
 # Add utils to path
 sys.path.insert(0, str(Path(__file__).parent))
-from utils.gemini_client import GeminiClient
-from utils.json_repair import validate_word_entry
+from utils.json_io import dump_json_streamed
+from utils.kanji_pipeline import (
+    KANJI_DEFAULTS,
+    print_kanji_stats,
+    run_kanji_generation,
+    tally_kanji,
+)
 
 
 # Configuration for each JLPT level
@@ -88,8 +89,7 @@ DATA_DIR = Path(__file__).parent / 'data' / 'jlpt'
 KANJI_FILE = DATA_DIR / 'jlpt-kanji.json'
 OUTPUT_DIR = Path(__file__).parent.parent.parent / 'assets' / 'wordlists' / 'japanese'
 CHECKPOINT_DIR = Path(__file__).parent / 'checkpoints'
-
-BATCH_SIZE = 10  # Smaller batch for kanji (more complex data per entry)
+LLM_CACHE_FILE = CHECKPOINT_DIR / 'llm_cache.sqlite'
 
 
 def load_jlpt_kanji(level: str) -> list[dict]:
@@ -127,71 +127,14 @@ def load_jlpt_kanji(level: str) -> list[dict]:
     return kanji_list
 
 
-def load_progress(progress_file: Path) -> dict[str, dict]:
-    """Load progress from checkpoint file."""
-    if not progress_file.exists():
-        return {}
-    if jsonlines is None:
-        print("Warning: jsonlines not installed, cannot load checkpoint")
-        return {}
-
-    progress = {}
-    with jsonlines.open(progress_file) as reader:
-        for item in reader:
-            kanji = item.get('kanji', '')
-            if kanji:
-                progress[kanji] = item
-    print(f"Loaded {len(progress)} kanji from checkpoint")
-    return progress
-
-
-def save_progress(progress_file: Path, items: list[dict]):
-    """Append items to progress file."""
-    if jsonlines is None:
-        return
-
-    progress_file.parent.mkdir(parents=True, exist_ok=True)
-    with jsonlines.open(progress_file, mode='a') as writer:
-        for item in items:
-            writer.write(item)
-
-
-def chunks(lst: list, n: int):
-    """Yield successive n-sized chunks from lst."""
-    for i in range(0, len(lst), n):
-        yield lst[i:i + n]
-
-
-def validate_kanji_entry(entry: dict) -> list[str]:
-    """Validate kanji entry structure."""
-    issues = []
-
-    if not entry.get('kanji'):
-        issues.append('missing kanji')
-    if not entry.get('translation_cn'):
-        issues.append('missing translation_cn')
-
-    examples = entry.get('examples', [])
-    if len(examples) < 2:
-        issues.append(f'only {len(examples)} examples (need 2)')
-
-    for i, ex in enumerate(examples):
-        if not ex.get('word'):
-            issues.append(f'example {i+1} missing word')
-        if not ex.get('reading'):
-            issues.append(f'example {i+1} missing reading')
-        if not ex.get('translation_cn'):
-            issues.append(f'example {i+1} missing translation_cn')
-
-    return issues
-
-
 def generate_jlpt_kanji_wordlist(
     level: str,
     config: dict,
     use_api: bool = True,
     resume: bool = True,
     dry_run: bool = False,
+    context_cache: bool = False,
+    response_cache: bool = True,
 ) -> dict:
     """Generate kanji list for a specific JLPT level."""
     print(f"\n{'='*60}")
@@ -207,112 +150,54 @@ def generate_jlpt_kanji_wordlist(
         print("DRY RUN: Processing only 10 kanji")
         source_kanji = source_kanji[:10]
 
-    # Load progress
-    progress = load_progress(progress_file) if resume else {}
-
-    # Find kanji needing API
-    kanji_needing_api = []
-    for entry in source_kanji:
-        if entry['kanji'] not in progress:
-            kanji_needing_api.append(entry)
-
-    print(f"Kanji needing API generation: {len(kanji_needing_api)}")
-
-    # Generate with API
-    if use_api and kanji_needing_api:
-        try:
-            client = GeminiClient()
-            print(f"\nGenerating data for {len(kanji_needing_api)} kanji...")
-            print(f"Batch size: {BATCH_SIZE}, Estimated batches: {(len(kanji_needing_api) + BATCH_SIZE - 1) // BATCH_SIZE}")
-
-            for i, batch in enumerate(chunks(kanji_needing_api, BATCH_SIZE)):
-                batch_num = i + 1
-                total_batches = (len(kanji_needing_api) + BATCH_SIZE - 1) // BATCH_SIZE
-                batch_kanji = [k['kanji'] for k in batch]
-                print(f"\nBatch {batch_num}/{total_batches}: Processing {len(batch)} kanji: {batch_kanji[:5]}...")
-
-                try:
-                    results = client.generate_kanji_data(batch, config['level'])
-
-                    valid_results = []
-                    for item in results:
-                        issues = validate_kanji_entry(item)
-                        if issues:
-                            print(f"  Warning: Issues with '{item.get('kanji', '?')}': {issues[:2]}")
-                        valid_results.append(item)
-
-                    for item in valid_results:
-                        progress[item['kanji']] = item
-
-                    save_progress(progress_file, valid_results)
-                    print(f"  Saved {len(valid_results)} kanji to checkpoint")
-
-                except Exception as e:
-                    print(f"  Batch failed: {e}")
-                    print("  Stopping to preserve progress. Run with --resume to continue.")
-                    break
-
-        except (ImportError, ValueError) as e:
-            print(f"Warning: Cannot initialize Gemini client: {e}")
-            print("Proceeding without API generation...")
+    progress = run_kanji_generation(
+        source_kanji,
+        progress_file,
+        config['level'],
+        use_api=use_api,
+        resume=resume,
+        context_cache=context_cache,
+        llm_cache_file=LLM_CACHE_FILE if response_cache else None,
+    )
 
-    # Build final output
+    # Build final output, already in frequency order (see load_jlpt_kanji)
     print("\nBuilding final kanji list...")
-    all_kanji = []
-
-    for entry in source_kanji:
-        kanji = entry['kanji']
-        api_data = progress.get(kanji, {})
-
-        kanji_entry = {
-            'word': kanji,  # Use 'word' for consistency with app schema
-            'translation_cn': api_data.get('translation_cn', ''),
-            'onyomi': api_data.get('onyomi', ''),
-            'kunyomi': api_data.get('kunyomi', ''),
-            'strokes': entry.get('strokes'),
-            'frequency': entry.get('frequency'),
-            'jlpt_level': config['level'],
-            'difficulty_level': config['difficulty'],
-            'examples': api_data.get('examples', [])
-        }
 
-        all_kanji.append(kanji_entry)
-
-    # Sort by frequency (most common first)
-    all_kanji.sort(key=lambda x: x.get('frequency') or 9999)
+    def output_entries():
+        for entry in source_kanji:
+            kanji = entry['kanji']
+            api_data = progress.get(kanji, KANJI_DEFAULTS)
+
+            yield {
+                'word': kanji,  # Use 'word' for consistency with app schema
+                'translation_cn': api_data['translation_cn'],
+                'onyomi': api_data['onyomi'],
+                'kunyomi': api_data['kunyomi'],
+                'strokes': entry.get('strokes'),
+                'frequency': entry.get('frequency'),
+                'jlpt_level': config['level'],
+                'difficulty_level': config['difficulty'],
+                'examples': api_data['examples']
+            }
 
     # Write output
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    output_data = {
+    header = {
         'name': config['name'],
         'language': 'ja',
-        'description': f"{config['description']} ({len(all_kanji)}字)",
+        'description': f"{config['description']} ({len(source_kanji)}字)",
         'icon_name': 'translate',
-        'words': all_kanji
     }
 
+    # Serialize one entry at a time, counting statistics on the way
+    stats = {}
     output_path = OUTPUT_DIR / config['output']
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, ensure_ascii=False, indent=2)
+    dump_json_streamed(header, 'words', tally_kanji(output_entries(), stats), output_path)
 
     print(f"Kanji list written to: {output_path}")
 
-    # Statistics
-    stats = {
-        'total_kanji': len(all_kanji),
-        'with_translation': sum(1 for k in all_kanji if k.get('translation_cn')),
-        'with_onyomi': sum(1 for k in all_kanji if k.get('onyomi')),
-        'with_kunyomi': sum(1 for k in all_kanji if k.get('kunyomi')),
-        'with_examples': sum(1 for k in all_kanji if len(k.get('examples', [])) >= 2),
-    }
-
-    print(f"\nStatistics for JLPT {config['level']}:")
-    print(f"  Total kanji: {stats['total_kanji']}")
-    print(f"  With translation: {stats['with_translation']} ({100*stats['with_translation']/stats['total_kanji']:.1f}%)")
-    print(f"  With onyomi: {stats['with_onyomi']} ({100*stats['with_onyomi']/stats['total_kanji']:.1f}%)")
-    print(f"  With kunyomi: {stats['with_kunyomi']} ({100*stats['with_kunyomi']/stats['total_kanji']:.1f}%)")
-    print(f"  With 2+ examples: {stats['with_examples']} ({100*stats['with_examples']/stats['total_kanji']:.1f}%)")
+    print_kanji_stats(f"JLPT {config['level']}", stats)
 
     return stats
 
@@ -340,6 +225,16 @@ def main():
         action='store_true',
         help='Process only 10 kanji for testing'
     )
+    parser.add_argument(
+        '--context-cache',
+        action='store_true',
+        help='Send the fixed prompt instructions once as Gemini cached content'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Ignore the on-disk response cache and regenerate every kanji'
+    )
 
     args = parser.parse_args()
 
@@ -356,6 +251,8 @@ def main():
             use_api=not args.no_api,
             resume=args.resume,
             dry_run=args.dry_run,
+            context_cache=args.context_cache,
+            response_cache=not args.no_cache,
         )
         all_stats[level] = stats
 
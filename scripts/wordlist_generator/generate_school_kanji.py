@@ -18,21 +18,17 @@ Usage:
     python generate_school_kanji.py --level high           # Generate high school
     python generate_school_kanji.py --level all            # Generate all levels
     python generate_school_kanji.py --level grade3 --resume # Resume from checkpoint
+    python generate_school_kanji.py --level all --context-cache # Cache prompt instructions
 """
 
 import argparse
 import csv
-import json
+import functools
 import os
 import sys
 from pathlib import Path
 from typing import Optional
 
-try:
-    import jsonlines
-except ImportError:
-    jsonlines = None
-
 try:
     from dotenv import load_dotenv
     load_dotenv()
@@ -41,7 +37,13 @@ except ImportError:
 
 # Add utils to path
 sys.path.insert(0, str(Path(__file__).parent))
-from utils.gemini_client import GeminiClient
+from utils.json_io import dump_json_streamed
+from utils.kanji_pipeline import (
+    KANJI_DEFAULTS,
+    print_kanji_stats,
+    run_kanji_generation,
+    tally_kanji,
+)
 
 
 # Configuration for each school level
@@ -122,30 +124,33 @@ KYOIKU_FILE = DATA_DIR / 'kyoiku-kanji-2017.csv'
 JOYO_FILE = DATA_DIR / 'joyo-kanji.csv'
 OUTPUT_DIR = Path(__file__).parent.parent.parent / 'assets' / 'wordlists' / 'japanese'
 CHECKPOINT_DIR = Path(__file__).parent / 'checkpoints'
+LLM_CACHE_FILE = CHECKPOINT_DIR / 'llm_cache.sqlite'
 
-BATCH_SIZE = 10
 
-
-def load_kyoiku_kanji() -> dict[int, list[str]]:
-    """Load elementary school kanji grouped by grade."""
+@functools.lru_cache(maxsize=None)
+def load_kyoiku_kanji() -> dict[int, tuple[str, ...]]:
+    """Load elementary school kanji grouped by grade (cached)."""
     if not KYOIKU_FILE.exists():
         raise FileNotFoundError(f"Kyoiku kanji file not found: {KYOIKU_FILE}")
 
     grades = {i: [] for i in range(1, 7)}
 
-    with open(KYOIKU_FILE, encoding='utf-8') as f:
-        reader = csv.DictReader(f)
+    with open(KYOIKU_FILE, encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        kanji_col = header.index('Kanji')
+        grade_col = header.index('Grade_2017')
         for row in reader:
-            kanji = row['Kanji']
-            grade = int(row['Grade_2017'])
+            grade = int(row[grade_col])
             if grade in grades:
-                grades[grade].append(kanji)
+                grades[grade].append(row[kanji_col])
 
-    return grades
+    return {grade: tuple(kanji) for grade, kanji in grades.items()}
 
 
-def load_joyo_kanji() -> list[str]:
-    """Load all joyo kanji."""
+@functools.lru_cache(maxsize=None)
+def load_joyo_kanji() -> tuple[str, ...]:
+    """Load all joyo kanji (cached)."""
     if not JOYO_FILE.exists():
         raise FileNotFoundError(f"Joyo kanji file not found: {JOYO_FILE}")
 
@@ -157,7 +162,14 @@ def load_joyo_kanji() -> list[str]:
             if len(row) >= 2:
                 kanji_list.append(row[1])  # Second column is the kanji
 
-    return kanji_list
+    return tuple(kanji_list)
+
+
+@functools.lru_cache(maxsize=None)
+def load_secondary_kanji() -> tuple[str, ...]:
+    """Return the joyo kanji not taught in elementary school, in joyo order."""
+    all_kyoiku = frozenset().union(*load_kyoiku_kanji().values())
+    return tuple(k for k in load_joyo_kanji() if k not in all_kyoiku)
 
 
 def load_school_kanji(level: str) -> list[dict]:
@@ -166,38 +178,23 @@ def load_school_kanji(level: str) -> list[dict]:
 
     Returns list of dicts with: kanji
     """
-    kyoiku_grades = load_kyoiku_kanji()
-
     if level.startswith('grade'):
         # Elementary grades
         grade = int(level.replace('grade', ''))
-        kanji_list = kyoiku_grades.get(grade, [])
+        kanji_list = load_kyoiku_kanji().get(grade, ())
         print(f"Loaded {len(kanji_list)} kanji for grade {grade}")
 
-    elif level == 'middle':
-        # Middle school: roughly first half of non-kyoiku joyo kanji (by order)
-        all_joyo = set(load_joyo_kanji())
-        all_kyoiku = set()
-        for grade_list in kyoiku_grades.values():
-            all_kyoiku.update(grade_list)
-
-        secondary_kanji = [k for k in load_joyo_kanji() if k not in all_kyoiku]
-        # Take first ~55% for middle school (roughly 600 out of 1110)
+    elif level in ('middle', 'high'):
+        # Secondary kanji by joyo order: roughly the first 55% (about 600 of
+        # 1110) for middle school, the rest for high school
+        secondary_kanji = load_secondary_kanji()
         split_point = int(len(secondary_kanji) * 0.55)
-        kanji_list = secondary_kanji[:split_point]
-        print(f"Loaded {len(kanji_list)} kanji for middle school")
-
-    elif level == 'high':
-        # High school: remaining joyo kanji
-        all_joyo = set(load_joyo_kanji())
-        all_kyoiku = set()
-        for grade_list in kyoiku_grades.values():
-            all_kyoiku.update(grade_list)
-
-        secondary_kanji = [k for k in load_joyo_kanji() if k not in all_kyoiku]
-        split_point = int(len(secondary_kanji) * 0.55)
-        kanji_list = secondary_kanji[split_point:]
-        print(f"Loaded {len(kanji_list)} kanji for high school")
+        if level == 'middle':
+            kanji_list = secondary_kanji[:split_point]
+            print(f"Loaded {len(kanji_list)} kanji for middle school")
+        else:
+            kanji_list = secondary_kanji[split_point:]
+            print(f"Loaded {len(kanji_list)} kanji for high school")
 
     else:
         raise ValueError(f"Unknown level: {level}")
@@ -205,41 +202,6 @@ def load_school_kanji(level: str) -> list[dict]:
     return [{'kanji': k} for k in kanji_list]
 
 
-def load_progress(progress_file: Path) -> dict[str, dict]:
-    """Load progress from checkpoint file."""
-    if not progress_file.exists():
-        return {}
-    if jsonlines is None:
-        print("Warning: jsonlines not installed, cannot load checkpoint")
-        return {}
-
-    progress = {}
-    with jsonlines.open(progress_file) as reader:
-        for item in reader:
-            kanji = item.get('kanji', '')
-            if kanji:
-                progress[kanji] = item
-    print(f"Loaded {len(progress)} kanji from checkpoint")
-    return progress
-
-
-def save_progress(progress_file: Path, items: list[dict]):
-    """Append items to progress file."""
-    if jsonlines is None:
-        return
-
-    progress_file.parent.mkdir(parents=True, exist_ok=True)
-    with jsonlines.open(progress_file, mode='a') as writer:
-        for item in items:
-            writer.write(item)
-
-
-def chunks(lst: list, n: int):
-    """Yield successive n-sized chunks from lst."""
-    for i in range(0, len(lst), n):
-        yield lst[i:i + n]
-
-
 def validate_kanji_entry(entry: dict) -> list[str]:
     """Validate kanji entry structure."""
     issues = []
@@ -262,6 +224,8 @@ def generate_school_kanji_wordlist(
     use_api: bool = True,
     resume: bool = True,
     dry_run: bool = False,
+    context_cache: bool = False,
+    response_cache: bool = True,
 ) -> dict:
     """Generate kanji list for a specific school level."""
     print(f"\n{'='*60}")
@@ -277,120 +241,62 @@ def generate_school_kanji_wordlist(
         print("DRY RUN: Processing only 10 kanji")
         source_kanji = source_kanji[:10]
 
-    # Load progress
-    progress = load_progress(progress_file) if resume else {}
-
-    # Find kanji needing API
-    kanji_needing_api = []
-    for entry in source_kanji:
-        if entry['kanji'] not in progress:
-            kanji_needing_api.append(entry)
-
-    print(f"Kanji needing API generation: {len(kanji_needing_api)}")
-
-    # Generate with API
-    if use_api and kanji_needing_api:
-        try:
-            client = GeminiClient()
-
-            # Determine school level for API prompt
-            if level.startswith('grade'):
-                grade_num = int(level.replace('grade', ''))
-                jlpt_level = 'N5' if grade_num <= 2 else ('N4' if grade_num <= 4 else 'N3')
-            elif level == 'middle':
-                jlpt_level = 'N3'
-            else:
-                jlpt_level = 'N2'
-
-            print(f"\nGenerating data for {len(kanji_needing_api)} kanji...")
-            print(f"Batch size: {BATCH_SIZE}, Estimated batches: {(len(kanji_needing_api) + BATCH_SIZE - 1) // BATCH_SIZE}")
-
-            for i, batch in enumerate(chunks(kanji_needing_api, BATCH_SIZE)):
-                batch_num = i + 1
-                total_batches = (len(kanji_needing_api) + BATCH_SIZE - 1) // BATCH_SIZE
-                batch_kanji = [k['kanji'] for k in batch]
-                print(f"\nBatch {batch_num}/{total_batches}: Processing {len(batch)} kanji: {batch_kanji[:5]}...")
-
-                try:
-                    # Use the kanji generation method
-                    batch_with_desc = [{'kanji': k['kanji'], 'description': ''} for k in batch]
-                    results = client.generate_kanji_data(batch_with_desc, jlpt_level)
-
-                    valid_results = []
-                    for item in results:
-                        issues = validate_kanji_entry(item)
-                        if issues:
-                            print(f"  Warning: Issues with '{item.get('kanji', '?')}': {issues[:2]}")
-                        valid_results.append(item)
-
-                    for item in valid_results:
-                        progress[item['kanji']] = item
-
-                    save_progress(progress_file, valid_results)
-                    print(f"  Saved {len(valid_results)} kanji to checkpoint")
-
-                except Exception as e:
-                    print(f"  Batch failed: {e}")
-                    print("  Stopping to preserve progress. Run with --resume to continue.")
-                    break
-
-        except (ImportError, ValueError) as e:
-            print(f"Warning: Cannot initialize Gemini client: {e}")
-            print("Proceeding without API generation...")
+    # Determine school level for API prompt
+    if level.startswith('grade'):
+        grade_num = int(level.replace('grade', ''))
+        jlpt_level = 'N5' if grade_num <= 2 else ('N4' if grade_num <= 4 else 'N3')
+    elif level == 'middle':
+        jlpt_level = 'N3'
+    else:
+        jlpt_level = 'N2'
+
+    progress = run_kanji_generation(
+        source_kanji,
+        progress_file,
+        jlpt_level,
+        use_api=use_api,
+        resume=resume,
+        context_cache=context_cache,
+        llm_cache_file=LLM_CACHE_FILE if response_cache else None,
+        validate=validate_kanji_entry,
+    )
 
     # Build final output
     print("\nBuilding final kanji list...")
-    all_kanji = []
-
-    for entry in source_kanji:
-        kanji = entry['kanji']
-        api_data = progress.get(kanji, {})
-
-        kanji_entry = {
-            'word': kanji,
-            'translation_cn': api_data.get('translation_cn', ''),
-            'onyomi': api_data.get('onyomi', ''),
-            'kunyomi': api_data.get('kunyomi', ''),
-            'school_level': config['name'],
-            'difficulty_level': config['difficulty'],
-            'examples': api_data.get('examples', [])
-        }
 
-        all_kanji.append(kanji_entry)
+    def output_entries():
+        for entry in source_kanji:
+            kanji = entry['kanji']
+            api_data = progress.get(kanji, KANJI_DEFAULTS)
+
+            yield {
+                'word': kanji,
+                'translation_cn': api_data['translation_cn'],
+                'onyomi': api_data['onyomi'],
+                'kunyomi': api_data['kunyomi'],
+                'school_level': config['name'],
+                'difficulty_level': config['difficulty'],
+                'examples': api_data['examples']
+            }
 
     # Write output
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    output_data = {
+    header = {
         'name': config['name'],
         'language': 'ja',
-        'description': f"{config['description']} ({len(all_kanji)}字)",
+        'description': f"{config['description']} ({len(source_kanji)}字)",
         'icon_name': 'school',
-        'words': all_kanji
     }
 
+    # Serialize one entry at a time, counting statistics on the way
+    stats = {}
     output_path = OUTPUT_DIR / config['output']
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, ensure_ascii=False, indent=2)
+    dump_json_streamed(header, 'words', tally_kanji(output_entries(), stats), output_path)
 
     print(f"Kanji list written to: {output_path}")
 
-    # Statistics
-    stats = {
-        'total_kanji': len(all_kanji),
-        'with_translation': sum(1 for k in all_kanji if k.get('translation_cn')),
-        'with_onyomi': sum(1 for k in all_kanji if k.get('onyomi')),
-        'with_kunyomi': sum(1 for k in all_kanji if k.get('kunyomi')),
-        'with_examples': sum(1 for k in all_kanji if len(k.get('examples', [])) >= 2),
-    }
-
-    print(f"\nStatistics for {config['name']}:")
-    print(f"  Total kanji: {stats['total_kanji']}")
-    if stats['total_kanji'] > 0:
-        print(f"  With translation: {stats['with_translation']} ({100*stats['with_translation']/stats['total_kanji']:.1f}%)")
-        print(f"  With onyomi: {stats['with_onyomi']} ({100*stats['with_onyomi']/stats['total_kanji']:.1f}%)")
-        print(f"  With kunyomi: {stats['with_kunyomi']} ({100*stats['with_kunyomi']/stats['total_kanji']:.1f}%)")
-        print(f"  With 2+ examples: {stats['with_examples']} ({100*stats['with_examples']/stats['total_kanji']:.1f}%)")
+    print_kanji_stats(config['name'], stats)
 
     return stats
 
@@ -418,6 +324,16 @@ def main():
         action='store_true',
         help='Process only 10 kanji for testing'
     )
+    parser.add_argument(
+        '--context-cache',
+        action='store_true',
+        help='Send the fixed prompt instructions once as Gemini cached content'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Ignore the on-disk response cache and regenerate every kanji'
+    )
 
     args = parser.parse_args()
 
@@ -440,6 +356,8 @@ def main():
             use_api=not args.no_api,
             resume=args.resume,
             dry_run=args.dry_run,
+            context_cache=args.context_cache,
+            response_cache=not args.no_cache,
         )
         all_stats[level] = stats
 
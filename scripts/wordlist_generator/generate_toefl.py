@@ -26,6 +26,7 @@ Usage:
 """
 
 import argparse
+import asyncio
 import json
 import os
 import sys
@@ -46,15 +47,20 @@ except ImportError:
 
 # Add utils to path
 sys.path.insert(0, str(Path(__file__).parent))
-from utils.gemini_client import GeminiClient
+from utils.gemini_client import GeminiClient, TransientAPIError
 from utils.json_repair import validate_word_entry
+from utils.llm_cache import LLMCache
+from utils.progress import ProgressWriter
 
 
 # Configuration
 DEFAULT_SOURCE_PATH = "D:/temp/english-vocabulary/json/6-托福-顺序.json"
 DEFAULT_OUTPUT_PATH = Path(__file__).parent.parent.parent / "assets" / "wordlists" / "english" / "toefl.json"
 PROGRESS_FILE = Path(__file__).parent / "toefl_progress.jsonl"
+LLM_CACHE_FILE = Path(__file__).parent / 'checkpoints' / 'llm_cache.sqlite'  # Shared with the other generators
 BATCH_SIZE = 15  # Words per API request
+API_CONCURRENCY = 8  # in-flight batches; GeminiClient still enforces its RPM limit
+PROGRESS_SYNC_EVERY = 5  # batches between checkpoint fsyncs
 
 
 def load_source_data(source_path: str) -> list[dict]:
@@ -191,28 +197,60 @@ def load_progress() -> dict[str, dict]:
     return progress
 
 
-def save_progress(items: list[dict]):
-    """
-    Append items to progress file.
-
-    Args:
-        items: List of word data dictionaries to save
-    """
-    if jsonlines is None:
-        print("Warning: jsonlines not installed, cannot save progress")
-        return
-
-    with jsonlines.open(PROGRESS_FILE, mode='a') as writer:
-        for item in items:
-            writer.write(item)
-
-
 def chunks(lst: list, n: int):
     """Yield successive n-sized chunks from lst."""
     for i in range(0, len(lst), n):
         yield lst[i:i + n]
 
 
+async def generate_batches(
+    client: GeminiClient,
+    batches: list[list[str]],
+    progress: dict[str, dict],
+    writer: ProgressWriter,
+):
+    """Run API batches concurrently, checkpointing each as it completes."""
+    sem = asyncio.Semaphore(API_CONCURRENCY)
+    failed = asyncio.Event()
+
+    async def process_batch(i: int, batch: list[str]):
+        async with sem:
+            # A failed batch stops new ones from starting; finished ones are kept
+            if failed.is_set():
+                return
+            print(f"\nBatch {i+1}: Processing {len(batch)} words: {batch[:3]}...")
+
+            try:
+                results = await client.generate_word_data_async(batch)
+            except TransientAPIError as e:
+                # Throttled or server error even after backing off: leave it for --resume
+                print(f"  Batch {i+1} still failing after retries, skipping: {e}")
+                return
+            except Exception as e:
+                print(f"  Batch {i+1} failed: {e}")
+                print("  Stopping to preserve progress. Run with --resume to continue.")
+                failed.set()
+                return
+
+        # Validate and save results
+        valid_results = []
+        for item in results:
+            issues = validate_word_entry(item)
+            if issues:
+                print(f"  Warning: Issues with '{item.get('word', '?')}': {issues[:2]}")
+            valid_results.append(item)
+
+        # Update progress
+        for item in valid_results:
+            progress[item['word'].lower()] = item
+
+        # Runs without an await, so checkpoint writes never interleave
+        writer.add_batch(valid_results)
+        print(f"  Batch {i+1}: saved {len(valid_results)} words to checkpoint")
+
+    await asyncio.gather(*(process_batch(i, batch) for i, batch in enumerate(batches)))
+
+
 def assign_difficulty(word: str, pos: str) -> int:
     """
     Assign difficulty level based on word characteristics.
@@ -256,7 +294,9 @@ def generate_wordlist(
     output_path: Optional[Path] = None,
     use_api: bool = True,
     resume: bool = True,
-    dry_run: bool = False
+    dry_run: bool = False,
+    response_cache: bool = True,
+    context_cache: bool = False,
 ) -> dict:
     """
     Generate the TOEFL word list.
@@ -267,6 +307,8 @@ def generate_wordlist(
         use_api: Whether to use Gemini API for examples
         resume: Whether to resume from checkpoint
         dry_run: If True, only process 10 words for testing
+        response_cache: Reuse entries from the on-disk response cache
+        context_cache: Send the fixed prompt instructions once as cached content
 
     Returns:
         Statistics dictionary
@@ -296,43 +338,22 @@ def generate_wordlist(
     # Generate with API if needed
     if use_api and words_needing_api:
         try:
-            client = GeminiClient()
+            client = GeminiClient(
+                use_context_cache=context_cache,
+                response_cache=LLMCache(LLM_CACHE_FILE) if response_cache else None,
+            )
         except (ImportError, ValueError) as e:
             print(f"Warning: Cannot initialize Gemini client: {e}")
             print("Proceeding without API generation...")
             use_api = False
 
     if use_api and words_needing_api:
+        batches = list(chunks(words_needing_api, BATCH_SIZE))
         print(f"\nGenerating data for {len(words_needing_api)} words...")
-        print(f"Batch size: {BATCH_SIZE}, Estimated batches: {len(words_needing_api) // BATCH_SIZE + 1}")
+        print(f"Batch size: {BATCH_SIZE}, Batches: {len(batches)}, Concurrency: {API_CONCURRENCY}")
 
-        for i, batch in enumerate(chunks(words_needing_api, BATCH_SIZE)):
-            print(f"\nBatch {i+1}: Processing {len(batch)} words: {batch[:3]}...")
-
-            try:
-                results = client.generate_word_data(batch)
-
-                # Validate and save results
-                valid_results = []
-                for item in results:
-                    issues = validate_word_entry(item)
-                    if issues:
-                        print(f"  Warning: Issues with '{item.get('word', '?')}': {issues[:2]}")
-                    valid_results.append(item)
-
-                # Update progress
-                for item in valid_results:
-                    word_lower = item['word'].lower()
-                    progress[word_lower] = item
-
-                # Save checkpoint
-                save_progress(valid_results)
-                print(f"  Saved {len(valid_results)} words to checkpoint")
-
-            except Exception as e:
-                print(f"  Batch failed: {e}")
-                print("  Stopping to preserve progress. Run with --resume to continue.")
-                break
+        with ProgressWriter(PROGRESS_FILE, flush_every=PROGRESS_SYNC_EVERY) as writer:
+            asyncio.run(generate_batches(client, batches, progress, writer))
 
     # Build final output
     print("\nBuilding final word list...")
@@ -439,6 +460,16 @@ def main():
         action='store_true',
         help='Resume from checkpoint (default behavior, kept for compatibility)'
     )
+    parser.add_argument(
+        '--context-cache',
+        action='store_true',
+        help='Send the fixed prompt instructions once as Gemini cached content'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Ignore the on-disk response cache and regenerate every word'
+    )
 
     args = parser.parse_args()
 
@@ -454,7 +485,9 @@ def main():
         output_path=Path(args.output),
         use_api=not args.no_api,
         resume=not args.no_resume,
-        dry_run=args.dry_run
+        dry_run=args.dry_run,
+        response_cache=not args.no_cache,
+        context_cache=args.context_cache,
     )
 
 
@@ -8,10 +8,13 @@ Example: cet6_core.json -> cet6-core.json
 
 import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Optional
 
 ASSETS_DIR = Path(__file__).parent.parent.parent / 'assets' / 'wordlists' / 'english'
 GITHUB_DIR = Path('D:/pc-project/wordmaster-wordlists/english')
+COPY_WORKERS = 8
 
 # File mapping: assets filename -> github filename
 FILE_MAPPING = {
@@ -35,22 +38,59 @@ FILE_MAPPING = {
 }
 
 
+def copy_file(asset_name: str, github_name: str) -> Optional[int]:
+    """
+    Copy one asset file into the GitHub repo if it changed since the last sync.
+
+    Returns:
+        Size of the copied file in bytes, or None if the copy was up to date
+    """
+    src = ASSETS_DIR / asset_name
+    dst = GITHUB_DIR / github_name
+    src_stat = src.stat()
+    # The copy gets a fresh mtime, so one newer than the asset with
+    # the same size was made from the current asset
+    try:
+        dst_stat = dst.stat()
+    except FileNotFoundError:
+        dst_stat = None
+    if (dst_stat is not None and dst_stat.st_size == src_stat.st_size
+            and dst_stat.st_mtime_ns > src_stat.st_mtime_ns):
+        return None
+
+    # Contents only: the repo doesn't need the asset's mode or timestamps,
+    # and copyfile uses the OS's zero-copy path where there is one
+    shutil.copyfile(src, dst)
+    return src_stat.st_size
+
+
 def sync_files():
     """Sync asset files to GitHub repo with proper naming."""
     GITHUB_DIR.mkdir(parents=True, exist_ok=True)
 
-    synced = []
+    # github name -> asset to copy; when several assets map to one file,
+    # the last one present wins, as it did when they were copied in turn
+    sources = {}
     for asset_name, github_name in FILE_MAPPING.items():
-        src = ASSETS_DIR / asset_name
-        dst = GITHUB_DIR / github_name
-
-        if src.exists():
-            shutil.copy2(src, dst)
-            size_mb = src.stat().st_size / (1024 * 1024)
+        if not (ASSETS_DIR / asset_name).exists():
+            print(f"  {asset_name} (not found, skipping)")
+            continue
+        if github_name in sources:
+            print(f"  {sources[github_name]} (superseded by {asset_name}, skipping)")
+        sources[github_name] = asset_name
+
+    # Each copy writes its own destination, so they can run side by side
+    with ThreadPoolExecutor(max_workers=COPY_WORKERS) as pool:
+        sizes = pool.map(copy_file, sources.values(), sources.keys())
+
+        synced = []
+        for (github_name, asset_name), size in zip(sources.items(), sizes):
+            if size is None:
+                print(f"  {asset_name} (unchanged, skipping)")
+                continue
+            size_mb = size / (1024 * 1024)
             print(f"✓ {asset_name} -> {github_name} ({size_mb:.2f} MB)")
             synced.append(github_name)
-        else:
-            print(f"  {asset_name} (not found, skipping)")
 
     return synced
 
@@ -61,28 +101,29 @@ def git_commit_and_push(files: list[str]):
         print("\nNo files to commit")
         return
 
-    import os
-    os.chdir(GITHUB_DIR.parent)
+    git = ['git', '-C', str(GITHUB_DIR.parent)]
 
     # Add files
-    subprocess.run(['git', 'add', '.'], check=True)
-
-    # Check if there are changes
-    result = subprocess.run(['git', 'status', '--porcelain'], capture_output=True, text=True)
-    if not result.stdout.strip():
-        print("\nNo changes to commit")
-        return
+    subprocess.run([*git, 'add', '.'], check=True)
 
-    # Commit
+    # Commit; git itself reports whether anything was staged
     msg = f"Update word lists: {', '.join(f.replace('.json', '') for f in files[:5])}"
     if len(files) > 5:
         msg += f" and {len(files) - 5} more"
 
-    subprocess.run(['git', 'commit', '-m', msg], check=True)
+    result = subprocess.run([*git, 'commit', '-m', msg], capture_output=True, text=True)
+    if result.returncode != 0:
+        # Only look at the index when the commit didn't go through
+        if subprocess.run([*git, 'diff', '--cached', '--quiet']).returncode == 0:
+            print("\nNo changes to commit")
+            return
+        print(result.stdout + result.stderr)
+        raise subprocess.CalledProcessError(result.returncode, result.args)
+    print(result.stdout)
 
     # Push
     print("\nPushing to GitHub...")
-    subprocess.run(['git', 'push'], check=True)
+    subprocess.run([*git, 'push'], check=True)
     print("✓ Pushed successfully")
 
 
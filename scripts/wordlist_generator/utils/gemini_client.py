@@ -1,27 +1,489 @@
 """Gemini API client for generating phonetics and example sentences."""
 
+import asyncio
+import datetime
+import functools
 import json
 import os
+import random
+import threading
 import time
-from typing import Optional
+from operator import itemgetter
+from typing import Iterator, Optional
 
 try:
     import google.generativeai as genai
 except ImportError:
     genai = None
 
-from .json_repair import repair_json
+try:
+    from google.generativeai import caching
+except ImportError:
+    caching = None
+
+from .json_repair import (
+    iter_json_array,
+    repair_json,
+    validate_japanese_entry,
+    validate_kanji_entry,
+    validate_word_entry,
+)
+from .llm_cache import LLMCache, cache_key, prompt_key
+
+
+MODEL_NAME = 'gemini-2.0-flash'
+
+# Bump when prompts change to invalidate cached entries and checkpoints
+PROMPT_VERSION = '1'
+
+# Explicit context caching needs a pinned model version
+CACHE_MODEL = 'models/gemini-2.0-flash-001'
+CACHE_TTL = datetime.timedelta(hours=1)
+
+# Free-form responses (generate_response) vary more than word data
+RESPONSE_TEMPERATURE = 0.7
+
+# Rough output size per word (phonetic, translation, two example sentences)
+OUTPUT_TOKENS_PER_WORD = 150
+
+# Default quota (free tier); override with GEMINI_RPM / GEMINI_TPM
+DEFAULT_RPM = 15
+DEFAULT_TPM = 1_000_000
+# Requests that may go out back to back before pacing starts; override with
+# GEMINI_BURST (up to GEMINI_RPM) when the quota tolerates bursts
+DEFAULT_BURST = 1
+
+# Longest computed backoff between retries, in seconds
+MAX_RETRY_WAIT = 60.0
+
+
+class TransientAPIError(Exception):
+    """Raised when a request still fails with a retryable error after all retries."""
+
+
+class RateLimitError(TransientAPIError):
+    """Raised when a request is still rate limited after all retries."""
+
+
+# Server-side failures that are worth retrying later (5xx, timeouts)
+SERVER_ERROR_NAMES = frozenset({
+    'InternalServerError', 'ServiceUnavailable', 'DeadlineExceeded', 'GatewayTimeout',
+})
+
+
+# Request errors that fail the same way on every attempt (400, 401, 403)
+PERMANENT_ERROR_NAMES = frozenset({'InvalidArgument', 'Unauthenticated', 'PermissionDenied'})
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Check whether an API error is an HTTP 429 / quota exhaustion."""
+    return getattr(error, 'code', None) == 429 or type(error).__name__ == 'ResourceExhausted'
+
+
+def is_server_error(error: Exception) -> bool:
+    """Check whether an API error is a transient HTTP 5xx / timeout."""
+    code = getattr(error, 'code', None)
+    return (isinstance(code, int) and 500 <= code < 600) or type(error).__name__ in SERVER_ERROR_NAMES
+
+
+def is_permanent_error(error: Exception) -> bool:
+    """Check whether an API error is a bad request or bad key, which retrying cannot fix."""
+    return getattr(error, 'code', None) in (400, 401, 403) or type(error).__name__ in PERMANENT_ERROR_NAMES
+
+
+def is_malformed_response(error: Exception) -> bool:
+    """Check whether a failure came from parsing the response (bad JSON)."""
+    return isinstance(error, ValueError)
+
+
+def is_cache_missing(error: Exception) -> bool:
+    """Check whether an API error means a cached content resource has expired."""
+    return getattr(error, 'code', None) == 404 or type(error).__name__ == 'NotFound'
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Return the seconds the server asked the client to wait before retrying, if it said."""
+    # gRPC errors carry a RetryInfo detail; REST ones may have a Retry-After header
+    details = getattr(error, 'details', None)
+    for detail in details if isinstance(details, (list, tuple)) else ():
+        delay = getattr(detail, 'retry_delay', None)
+        if delay is not None:
+            return delay.seconds + delay.nanos / 1e9
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    try:
+        return float(headers['Retry-After'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def retry_wait(error: Exception, attempt: int, retry_delay: float) -> float:
+    """
+    Return how long to sleep before retrying a failed attempt.
+
+    A wait the server asked for is used as given; otherwise the delay doubles
+    per attempt from retry_delay, capped at MAX_RETRY_WAIT, plus up to
+    retry_delay of jitter so concurrent batches don't retry in lockstep.
+    """
+    hinted = retry_after(error)
+    if hinted is not None:
+        return hinted
+    return min(MAX_RETRY_WAIT, retry_delay * 2 ** attempt) + random.uniform(0, retry_delay)
+
+
+def load_api_keys() -> list[str]:
+    """
+    Read the configured Gemini API keys.
+
+    GEMINI_API_KEYS (comma-separated) takes precedence over GEMINI_API_KEY.
+    Each key has its own quota, so callers running several processes can
+    give each one a different key.
+    """
+    keys = [key.strip() for key in os.environ.get('GEMINI_API_KEYS', '').split(',')]
+    keys = [key for key in keys if key]
+    if not keys and os.environ.get('GEMINI_API_KEY'):
+        keys = [os.environ['GEMINI_API_KEY']]
+    return keys
+
+
+def missing_words(requested: list[str], result: list[dict], key: str = 'word') -> list[str]:
+    """Return the requested words with no entry in result, case-insensitively and in request order."""
+    by_lower = {w.lower(): w for w in requested}
+    absent = by_lower.keys() - {item.get(key, '').lower() for item in result}
+    return [w for lower, w in by_lower.items() if lower in absent]
+
+
+def estimate_tokens(prompt: str, words: list[str]) -> int:
+    """Estimate the tokens a request will consume (prompt plus response)."""
+    return len(prompt) // 4 + OUTPUT_TOKENS_PER_WORD * len(words)
+
+
+class RateLimiter:
+    """
+    Token buckets for requests per minute and tokens per minute.
+
+    Buckets refill continuously and hold burst requests' worth of budget: with
+    the default of one, concurrent callers are paced evenly rather than
+    released in bursts, while a larger burst lets an idle limiter admit that
+    many requests at once. After a 429 both refill rates are halved for
+    backoff_window seconds. acquire is
+    for coroutines, acquire_blocking for the synchronous client methods; the
+    lock only guards the bucket update, never a wait, so one limiter can be
+    shared across threads and event loops.
+    """
+
+    def __init__(self, rpm: int, tpm: int, burst: int = 1, backoff_window: float = 60.0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.backoff_window = backoff_window
+        self._request_capacity = float(max(1, min(burst, rpm)))
+        self._token_capacity = self._request_capacity * tpm / rpm
+        self._requests = self._request_capacity
+        self._tokens = self._token_capacity
+        self._updated = time.monotonic()
+        self._slow_until = 0.0
+        self._lock = threading.Lock()
+
+    def _rate_scale(self, now: float) -> float:
+        return 0.5 if now < self._slow_until else 1.0
+
+    def _refill(self, now: float):
+        scale = self._rate_scale(now) / 60.0
+        elapsed = now - self._updated
+        self._requests = min(self._request_capacity, self._requests + elapsed * self.rpm * scale)
+        self._tokens = min(self._token_capacity, self._tokens + elapsed * self.tpm * scale)
+        self._updated = now
+
+    def _try_take(self, tokens: float) -> float:
+        """Take one request and tokens if available; else return seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._requests >= 1.0 and self._tokens >= tokens:
+                self._requests -= 1.0
+                self._tokens -= tokens
+                return 0.0
+            scale = self._rate_scale(now) / 60.0
+            return max(
+                (1.0 - self._requests) / (self.rpm * scale),
+                (tokens - self._tokens) / (self.tpm * scale),
+            )
+
+    async def acquire(self, tokens: int = 0):
+        """Wait until one request and the given number of tokens are available."""
+        # A single oversized request just waits for a full bucket
+        tokens = min(tokens, self._token_capacity)
+        while (wait := self._try_take(tokens)) > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_blocking(self, tokens: int = 0):
+        """Blocking variant of acquire for synchronous callers."""
+        tokens = min(tokens, self._token_capacity)
+        while (wait := self._try_take(tokens)) > 0:
+            time.sleep(wait)
+
+    def on_rate_limited(self):
+        """Halve the refill rates for the next backoff window."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._slow_until = time.monotonic() + self.backoff_window
+
+
+# Response schemas: Gemini constrains its JSON output to these, so every
+# response is an array of entries with the fields the prompts ask for
+def _array_of(properties: dict) -> dict:
+    """Schema for an array of objects that all have the given properties."""
+    return {
+        'type': 'array',
+        'items': {'type': 'object', 'properties': properties, 'required': list(properties)},
+    }
+
+
+_SENTENCE_EXAMPLES = _array_of({'sentence': {'type': 'string'}, 'translation_cn': {'type': 'string'}})
+
+WORD_SCHEMA = _array_of({
+    'word': {'type': 'string'},
+    'phonetic': {'type': 'string'},
+    'examples': _SENTENCE_EXAMPLES,
+})
+# Also used for French, which asks for the same fields
+CEFR_SCHEMA = _array_of({
+    'word': {'type': 'string'},
+    'translation_cn': {'type': 'string'},
+    'phonetic': {'type': 'string'},
+    'examples': _SENTENCE_EXAMPLES,
+})
+JAPANESE_SCHEMA = _array_of({
+    'word': {'type': 'string'},
+    'translation_cn': {'type': 'string'},
+    'examples': _SENTENCE_EXAMPLES,
+})
+KANJI_SCHEMA = _array_of({
+    'kanji': {'type': 'string'},
+    'translation_cn': {'type': 'string'},
+    'onyomi': {'type': 'string'},
+    'kunyomi': {'type': 'string'},
+    'examples': _array_of({
+        'word': {'type': 'string'},
+        'reading': {'type': 'string'},
+        'translation_cn': {'type': 'string'},
+    }),
+})
+
+
+# Static prompt text, built once; each request only adds its words
+_WORD_PROMPT_HEAD = 'Generate phonetics and example sentences for these English words: '
+_WORD_PROMPT_TAIL = '''
+
+For each word, provide:
+1. IPA phonetic transcription (e.g., /əˈbændən/)
+2. Two simple, practical example sentences with Chinese translations
+
+Return a JSON array with this exact structure for each word:
+[
+  {
+    "word": "example",
+    "phonetic": "/ɪɡˈzæmpəl/",
+    "examples": [
+      {"sentence": "This is an example sentence.", "translation_cn": "这是一个例句。"},
+      {"sentence": "Can you give me an example?", "translation_cn": "你能给我一个例子吗？"}
+    ]
+  }
+]
+
+Requirements:
+- Use standard IPA notation for phonetics
+- Example sentences should be simple and suitable for English learners
+- Chinese translations should be natural and accurate
+- Each word MUST have exactly 2 examples
+- Return ONLY the JSON array, no other text'''
+
+_JAPANESE_TASK = '''1. Chinese translation (translation_cn) - accurate and natural
+2. Two example sentences in Japanese with Chinese translations'''
+_JAPANESE_PROMPT_HEAD = f'''For each Japanese word below, provide:
+{_JAPANESE_TASK}
+
+Japanese words to process:
+'''
+_JAPANESE_PROMPT_TAIL = '''
+
+Return a JSON array with this exact structure:
+[
+  {
+    "word": "食べる",
+    "translation_cn": "吃",
+    "examples": [
+      {"sentence": "朝ごはんを食べます。", "translation_cn": "吃早饭。"},
+      {"sentence": "何を食べたいですか。", "translation_cn": "你想吃什么？"}
+    ]
+  }
+]
+
+Requirements:
+- Chinese translations should be concise and accurate
+- Example sentences should be natural and suitable for Japanese learners
+- Use appropriate politeness level (です/ます form preferred for beginners)
+- Each word MUST have exactly 2 examples
+- Return ONLY the JSON array, no other text'''
+
+
+# Example sentence complexity by CEFR level
+_CEFR_GUIDANCE = {
+    'A1': 'very simple sentences suitable for complete beginners',
+    'A2': 'simple sentences suitable for elementary learners',
+    'B1': 'moderately complex sentences suitable for intermediate learners',
+    'B2': 'complex sentences suitable for upper-intermediate learners',
+    'C1': 'sophisticated sentences suitable for advanced learners',
+    'C2': 'nuanced sentences suitable for proficient speakers',
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _cefr_instructions_tail(cefr_level: str) -> str:
+    """Build the part of the CEFR instructions after the subject, which depends only on the level."""
+    complexity = _CEFR_GUIDANCE.get(cefr_level.upper(), 'sentences appropriate for the word level')
+
+    return f'''
+
+For each word, provide:
+1. Chinese translation (translation_cn) - concise and accurate
+2. IPA phonetic transcription (e.g., /əˈbændən/)
+3. Two example sentences with Chinese translations - use {complexity}
+
+Return a JSON array with this exact structure for each word:
+[
+  {{
+    "word": "example",
+    "translation_cn": "例子；范例",
+    "phonetic": "/ɪɡˈzæmpəl/",
+    "examples": [
+      {{"sentence": "This is an example.", "translation_cn": "这是一个例子。"}},
+      {{"sentence": "Can you give me an example?", "translation_cn": "你能给我一个例子吗？"}}
+    ]
+  }}
+]
+
+Requirements:
+- Chinese translations should be concise, listing main meanings separated by ；
+- Use standard IPA notation for phonetics
+- Example sentences should match {cefr_level} difficulty level
+- Chinese translations of examples should be natural and accurate
+- Each word MUST have exactly 2 examples
+- Return ONLY the JSON array, no other text'''
+
+
+# Example word difficulty by JLPT level
+_JLPT_GUIDANCE = {
+    'N5': 'very common, basic vocabulary words',
+    'N4': 'common, elementary vocabulary words',
+    'N3': 'intermediate vocabulary words',
+    'N2': 'upper-intermediate vocabulary words',
+    'N1': 'advanced vocabulary words',
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _kanji_instructions(jlpt_level: str) -> str:
+    """Build the fixed kanji instructions shared by every batch of a level."""
+    complexity = _JLPT_GUIDANCE.get(jlpt_level, 'vocabulary words appropriate for the level')
+
+    return f'''For each kanji, provide:
+1. translation_cn: Chinese meaning (concise)
+2. onyomi: 音読み in katakana (e.g., ジン, ニン)
+3. kunyomi: 訓読み in hiragana (e.g., ひと)
+4. Two example words using this kanji - use {complexity}
+
+Return a JSON array with this exact structure:
+[
+  {{
+    "kanji": "人",
+    "translation_cn": "人",
+    "onyomi": "ジン、ニン",
+    "kunyomi": "ひと",
+    "examples": [
+      {{"word": "人間", "reading": "にんげん", "translation_cn": "人类；人"}},
+      {{"word": "日本人", "reading": "にほんじん", "translation_cn": "日本人"}}
+    ]
+  }}
+]
+
+Requirements:
+- Chinese translations should be concise
+- Multiple readings should be separated by 、
+- If no onyomi or kunyomi exists, use empty string ""
+- Example words should be common vocabulary containing this kanji
+- Reading should be in hiragana
+- Each kanji MUST have exactly 2 example words
+- Return ONLY the JSON array, no other text'''
+
+
+# Example sentence complexity by CEFR level, for the French prompt
+_FRENCH_GUIDANCE = {
+    'A1': 'très simples, adaptées aux débutants complets',
+    'A2': 'simples, adaptées aux apprenants élémentaires',
+    'B1': 'moyennement complexes, adaptées aux apprenants intermédiaires',
+    'B2': 'complexes, adaptées aux apprenants de niveau intermédiaire avancé',
+    'C1': 'sophistiquées, adaptées aux apprenants avancés',
+    'C2': 'nuancées, adaptées aux locuteurs maîtrisant la langue',
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _french_prompt_tail(cefr_level: str) -> str:
+    """Build the part of the French prompt after the word list, which depends only on the level."""
+    complexity = _FRENCH_GUIDANCE.get(cefr_level, 'phrases appropriées au niveau du mot')
+
+    return f'''
+
+Pour chaque mot, fournis :
+1. Traduction chinoise (translation_cn) - concise et précise
+2. Transcription phonétique IPA (par exemple, /ɛtʁ/ pour "être")
+3. Deux phrases d'exemple avec traductions chinoises - utilise des phrases {complexity}
+
+IMPORTANT : Les mots français contiennent des caractères spéciaux (é, è, ê, ë, ç, œ, ù, â). Assure-toi de les préserver exactement.
+
+Retourne un tableau JSON avec exactement cette structure pour chaque mot :
+[
+  {{
+    "word": "être",
+    "translation_cn": "是；存在",
+    "phonetic": "[ɛtʁ]",
+    "examples": [
+      {{"sentence": "Je suis étudiant.", "translation_cn": "我是学生。"}},
+      {{"sentence": "Il est français.", "translation_cn": "他是法国人。"}}
+    ]
+  }}
+]
+
+Exigences :
+- Les traductions chinoises doivent être concises, listant les significations principales séparées par ；
+- Utilise la notation IPA standard entre crochets [...]
+- Les phrases d'exemple doivent correspondre au niveau de difficulté {cefr_level}
+- Les traductions chinoises des exemples doivent être naturelles et précises
+- Chaque mot DOIT avoir exactement 2 exemples
+- PRÉSERVE TOUS LES CARACTÈRES SPÉCIAUX FRANÇAIS (é, è, ê, ë, ç, œ, ù, â, etc.)
+- Retourne UNIQUEMENT le tableau JSON, sans autre texte'''
 
 
 class GeminiClient:
     """Client for Gemini API with structured output for word data generation."""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        use_context_cache: bool = False,
+        response_cache: Optional[LLMCache] = None,
+    ):
         """
         Initialize Gemini client.
 
         Args:
-            api_key: Gemini API key. If not provided, reads from GEMINI_API_KEY env var.
+            api_key: Gemini API key. If not provided, uses the first key from
+                GEMINI_API_KEYS or GEMINI_API_KEY (see load_api_keys).
+            use_context_cache: Upload fixed prompt instructions once as cached
+                content and send only the word list per request (async methods)
+            response_cache: On-disk cache of validated entries; words found in
+                it are not sent to the API, and
+                generate_response replays the response to a repeated prompt
         """
         if genai is None:
             raise ImportError(
@@ -29,7 +491,7 @@ class GeminiClient:
                 "Run: pip install google-generativeai"
             )
 
-        self.api_key = api_key or os.environ.get('GEMINI_API_KEY')
+        self.api_key = api_key or next(iter(load_api_keys()), None)
         if not self.api_key:
             raise ValueError(
                 "Gemini API key not provided. Set GEMINI_API_KEY environment variable "
@@ -37,19 +499,64 @@ class GeminiClient:
             )
 
         genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        self.model_name = MODEL_NAME
+        self.model = genai.GenerativeModel(self.model_name)
+
+        # Generation settings, shared by every request of a kind
+        self._gen_configs = {
+            kind: genai.GenerationConfig(
+                response_mime_type="application/json",
+                response_schema=schema,
+                temperature=0.3,  # Lower temperature for more consistent output
+            )
+            for kind, schema in (
+                ('word', WORD_SCHEMA),
+                ('cefr', CEFR_SCHEMA),
+                ('japanese', JAPANESE_SCHEMA),
+                ('kanji', KANJI_SCHEMA),
+            )
+        }
+        self._text_config = genai.GenerationConfig(temperature=RESPONSE_TEMPERATURE)
+        self.response_cache = response_cache
 
-        # Rate limiting
-        self.requests_per_minute = 15  # Conservative limit
-        self.last_request_time = 0
-        self.min_request_interval = 60.0 / self.requests_per_minute
+        # Context caching: key -> model bound to cached instructions, or None
+        # once creation has failed (caching unsupported, prefix too short, ...)
+        self.use_context_cache = use_context_cache and caching is not None
+        self._cached_models = {}
 
-    def _rate_limit(self):
-        """Apply rate limiting between requests."""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_request_interval:
-            time.sleep(self.min_request_interval - elapsed)
-        self.last_request_time = time.time()
+        # Rate limiting: pace requests to stay under the account's quota
+        self.requests_per_minute = int(os.environ.get('GEMINI_RPM', DEFAULT_RPM))
+        self.tokens_per_minute = int(os.environ.get('GEMINI_TPM', DEFAULT_TPM))
+        burst = int(os.environ.get('GEMINI_BURST', DEFAULT_BURST))
+        self.limiter = RateLimiter(self.requests_per_minute, self.tokens_per_minute, burst)
+
+    def _rate_limit(self, prompt: str, words: list = ()):
+        """Block until the limiter admits a request of this size."""
+        self.limiter.acquire_blocking(estimate_tokens(prompt, words))
+
+    def _backoff(self, error: Exception, attempt: int, max_retries: int, retry_delay: float):
+        """
+        Handle a failed synchronous attempt: sleep before the retry, or re-raise.
+
+        Bad requests are re-raised at once, and malformed responses are
+        retried without sleeping.
+        """
+        print(f"Attempt {attempt + 1}/{max_retries} failed: {error}")
+        if is_permanent_error(error):
+            raise error
+        rate_limited = is_rate_limited(error)
+        if rate_limited:
+            self.limiter.on_rate_limited()
+        if attempt < max_retries - 1:
+            # A malformed response says nothing about load: ask again right away
+            if not is_malformed_response(error):
+                time.sleep(retry_wait(error, attempt, retry_delay))
+        elif rate_limited:
+            raise RateLimitError(str(error)) from error
+        elif is_server_error(error):
+            raise TransientAPIError(str(error)) from error
+        else:
+            raise error
 
     def generate_word_data(
         self,
@@ -63,7 +570,7 @@ class GeminiClient:
         Args:
             words: List of English words (recommended batch size: 10-20)
             max_retries: Maximum retry attempts on failure
-            retry_delay: Delay between retries in seconds
+            retry_delay: Base delay between retries in seconds
 
         Returns:
             List of word data dictionaries with structure:
@@ -76,73 +583,216 @@ class GeminiClient:
                 ]
             }
         """
-        prompt = self._build_prompt(words)
+        cached, words = self._lookup_cached('english', words)
+        if not words:
+            return cached
+
+        result = self._generate(self._build_prompt(words), words, max_retries, retry_delay)
+        self._store_cached('english', words, result)
+        return cached + result
+
+    async def generate_word_data_async(
+        self,
+        words: list[str],
+        max_retries: int = 3,
+        retry_delay: float = 5.0
+    ) -> list[dict]:
+        """
+        Async variant of generate_word_data for running batches concurrently.
+
+        Retries use exponential backoff with jitter so that concurrent batches
+        hitting the same rate limit do not retry in lockstep.
+
+        Args:
+            words: List of English words (recommended batch size: 10-20)
+            max_retries: Maximum retry attempts on failure
+            retry_delay: Base delay between retries in seconds
+
+        Returns:
+            List of word data dictionaries (see generate_word_data)
+        """
+        cached, words = self._lookup_cached('english', words)
+        if not words:
+            return cached
+
+        result = await self._generate_async(
+            lambda: self._word_request(words), words, max_retries, retry_delay
+        )
+        self._store_cached('english', words, result)
+        return cached + result
+
+    def stream_word_data(
+        self,
+        words: list[str],
+        max_retries: int = 3,
+        retry_delay: float = 5.0
+    ) -> Iterator[dict]:
+        """
+        Streaming variant of generate_word_data.
+
+        Entries are yielded as soon as the streamed response completes them,
+        so callers can start on the first words while the rest are still
+        being generated. A failed attempt is retried for the words that
+        have not been yielded yet.
+
+        Args:
+            words: List of English words (recommended batch size: 10-20)
+            max_retries: Maximum retry attempts on failure
+            retry_delay: Base delay between retries in seconds
+
+        Yields:
+            Word data dictionaries (see generate_word_data)
+        """
+        cached, words = self._lookup_cached('english', words)
+        yield from cached
 
         for attempt in range(max_retries):
+            if not words:
+                return
+            prompt = self._build_prompt(words)
+            result = []
             try:
-                self._rate_limit()
+                self._rate_limit(prompt, words)
 
                 response = self.model.generate_content(
                     prompt,
-                    generation_config=genai.GenerationConfig(
-                        response_mime_type="application/json",
-                        temperature=0.3,  # Lower temperature for more consistent output
-                    )
+                    generation_config=self._gen_configs['word'],
+                    stream=True,
                 )
 
-                # Parse response
-                result = repair_json(response.text)
-
-                # Validate structure
-                if not isinstance(result, list):
-                    raise ValueError("Response is not a list")
-
-                # Ensure all words are present
-                result_words = {item.get('word', '').lower() for item in result}
-                missing = [w for w in words if w.lower() not in result_words]
+                for item in iter_json_array(chunk.text for chunk in response):
+                    result.append(item)
+                    yield item
 
+                missing = missing_words(words, result)
                 if missing:
                     print(f"Warning: Missing words in response: {missing}")
+                return
 
-                return result
+            except Exception as e:
+                self._backoff(e, attempt, max_retries, retry_delay)
+
+            finally:
+                self._store_cached('english', words, result)
+                done = {item.get('word', '').lower() for item in result}
+                words = [w for w in words if w.lower() not in done]
+
+    def _generate(
+        self,
+        prompt: str,
+        words: list,
+        max_retries: int,
+        retry_delay: float,
+        parse=None,
+        kind: str = 'word',
+    ) -> list[dict]:
+        """
+        Send a JSON prompt synchronously, retrying through _backoff.
+
+        parse(text, words) turns the response into entries and defaults to
+        _parse_word_response; kind picks the response schema.
+        """
+        for attempt in range(max_retries):
+            try:
+                self._rate_limit(prompt, words)
+
+                response = self.model.generate_content(
+                    prompt,
+                    generation_config=self._gen_configs[kind]
+                )
+
+                return (parse or self._parse_word_response)(response.text, words)
+
+            except Exception as e:
+                self._backoff(e, attempt, max_retries, retry_delay)
+
+        return []
+
+    async def _generate_async(
+        self,
+        build_request,
+        words: list,
+        max_retries: int,
+        retry_delay: float,
+        parse=None,
+        kind: str = 'word',
+    ) -> list[dict]:
+        """
+        Send a word data prompt asynchronously, retrying with jittered backoff.
+
+        build_request returns the (model, prompt) pair to send and is called
+        per attempt, so an expired context cache can be recreated on retry.
+        parse(text, words) turns the response into entries and defaults to
+        _parse_word_response; kind picks the response schema.
+
+        Bad requests are re-raised at once, and malformed responses are
+        retried without sleeping.
+
+        Raises:
+            RateLimitError: If the last attempt was rejected with a 429
+            TransientAPIError: If the last attempt failed with a 5xx or timeout
+        """
+        for attempt in range(max_retries):
+            try:
+                model, prompt = build_request()
+                await self.limiter.acquire(estimate_tokens(prompt, words))
+
+                response = await model.generate_content_async(
+                    prompt,
+                    generation_config=self._gen_configs[kind]
+                )
+
+                return (parse or self._parse_word_response)(response.text, words)
 
             except Exception as e:
                 print(f"Attempt {attempt + 1}/{max_retries} failed: {e}")
+                if is_permanent_error(e):
+                    raise
+                if is_cache_missing(e):
+                    self._cached_models.clear()
+                rate_limited = is_rate_limited(e)
+                if rate_limited:
+                    self.limiter.on_rate_limited()
                 if attempt < max_retries - 1:
-                    time.sleep(retry_delay * (attempt + 1))  # Exponential backoff
+                    # A malformed response says nothing about load: ask again right away
+                    if not is_malformed_response(e):
+                        await asyncio.sleep(retry_wait(e, attempt, retry_delay))
+                elif rate_limited:
+                    raise RateLimitError(str(e)) from e
+                elif is_server_error(e):
+                    raise TransientAPIError(str(e)) from e
                 else:
                     raise
 
         return []
 
-    def _build_prompt(self, words: list[str]) -> str:
-        """Build the prompt for word data generation."""
-        words_str = ', '.join(words)
+    def _parse_word_response(self, text: str, words: list[str]) -> list[dict]:
+        """Parse a word data response and warn about words missing from it."""
+        result = repair_json(text)
 
-        return f'''Generate phonetics and example sentences for these English words: {words_str}
+        # Ensure all words are present
+        missing = missing_words(words, result)
 
-For each word, provide:
-1. IPA phonetic transcription (e.g., /əˈbændən/)
-2. Two simple, practical example sentences with Chinese translations
+        if missing:
+            print(f"Warning: Missing words in response: {missing}")
 
-Return a JSON array with this exact structure for each word:
-[
-  {{
-    "word": "example",
-    "phonetic": "/ɪɡˈzæmpəl/",
-    "examples": [
-      {{"sentence": "This is an example sentence.", "translation_cn": "这是一个例句。"}},
-      {{"sentence": "Can you give me an example?", "translation_cn": "你能给我一个例子吗？"}}
-    ]
-  }}
-]
+        return result
 
-Requirements:
-- Use standard IPA notation for phonetics
-- Example sentences should be simple and suitable for English learners
-- Chinese translations should be natural and accurate
-- Each word MUST have exactly 2 examples
-- Return ONLY the JSON array, no other text'''
+    def _word_request(self, words: list[str]):
+        """Pick the model and prompt for a word data batch, using the context cache if enabled."""
+        if self.use_context_cache:
+            instructions = (
+                'Generate phonetics and example sentences for the English words listed in each request'
+                + _WORD_PROMPT_TAIL
+            )
+            model = self._cached_model('english', instructions)
+            if model is not None:
+                return model, f"Words: {', '.join(words)}"
+        return self.model, self._build_prompt(words)
+
+    def _build_prompt(self, words: list[str]) -> str:
+        """Build the prompt for word data generation."""
+        return _WORD_PROMPT_HEAD + ', '.join(words) + _WORD_PROMPT_TAIL
 
     def generate_japanese_enrichment(
         self,
@@ -155,89 +805,94 @@ Requirements:
 
         Args:
             words: List of word dictionaries with keys: word, reading, meaning_en
-            max_retries: Maximum retry attempts on failure
-            retry_delay: Delay between retries in seconds
-
-        Returns:
-            List of enriched word data dictionaries with structure:
-            {
-                "word": str,
-                "translation_cn": str,
-                "examples": [
-                    {"sentence": str, "translation_cn": str},
-                    {"sentence": str, "translation_cn": str}
-                ]
-            }
-        """
-        prompt = self._build_japanese_prompt(words)
-
-        for attempt in range(max_retries):
-            try:
-                self._rate_limit()
-
-                response = self.model.generate_content(
-                    prompt,
-                    generation_config=genai.GenerationConfig(
-                        response_mime_type="application/json",
-                        temperature=0.3,
-                    )
-                )
-
-                result = repair_json(response.text)
-
-                if not isinstance(result, list):
-                    raise ValueError("Response is not a list")
-
-                result_words = {item.get('word', '') for item in result}
-                input_words = {w['word'] for w in words}
-                missing = input_words - result_words
-
-                if missing:
-                    print(f"Warning: Missing words in response: {missing}")
+            max_retries: Maximum retry attempts on failure
+            retry_delay: Base delay between retries in seconds
 
-                return result
+        Returns:
+            List of enriched word data dictionaries with structure:
+            {
+                "word": str,
+                "translation_cn": str,
+                "examples": [
+                    {"sentence": str, "translation_cn": str},
+                    {"sentence": str, "translation_cn": str}
+                ]
+            }
+        """
+        cached, words = self._lookup_cached('japanese', words, word_of=itemgetter('word'))
+        if not words:
+            return cached
+
+        result = self._generate(
+            self._build_japanese_prompt(words), words, max_retries, retry_delay,
+            parse=self._parse_japanese_response, kind='japanese',
+        )
+        self._store_cached(
+            'japanese', [w['word'] for w in words], result, validate=validate_japanese_entry
+        )
+        return cached + result
+
+    async def generate_japanese_enrichment_async(
+        self,
+        words: list[dict],
+        max_retries: int = 3,
+        retry_delay: float = 5.0
+    ) -> list[dict]:
+        """
+        Async variant of generate_japanese_enrichment for running batches concurrently.
 
-            except Exception as e:
-                print(f"Attempt {attempt + 1}/{max_retries} failed: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay * (attempt + 1))
-                else:
-                    raise
+        Args:
+            words: List of word dictionaries with keys: word, reading, meaning_en
+            max_retries: Maximum retry attempts on failure
+            retry_delay: Base delay between retries in seconds
 
-        return []
+        Returns:
+            List of enriched word data dictionaries (see generate_japanese_enrichment)
+        """
+        cached, words = self._lookup_cached('japanese', words, word_of=itemgetter('word'))
+        if not words:
+            return cached
+
+        result = await self._generate_async(
+            lambda: self._japanese_request(words), words, max_retries, retry_delay,
+            parse=self._parse_japanese_response, kind='japanese',
+        )
+        self._store_cached('japanese', [w['word'] for w in words], result, validate=validate_japanese_entry)
+        return cached + result
+
+    def _parse_japanese_response(self, text: str, words: list[dict]) -> list[dict]:
+        """Parse a Japanese enrichment response and warn about words missing from it."""
+        result = repair_json(text)
+
+        missing = missing_words([w['word'] for w in words], result)
+
+        if missing:
+            print(f"Warning: Missing words in response: {missing}")
+
+        return result
+
+    def _japanese_request(self, words: list[dict]):
+        """Pick the model and prompt for a Japanese batch, using the context cache if enabled."""
+        if self.use_context_cache:
+            instructions = (
+                f"For each Japanese word listed in each request, provide:\n{_JAPANESE_TASK}"
+                + _JAPANESE_PROMPT_TAIL
+            )
+            model = self._cached_model('japanese', instructions)
+            if model is not None:
+                return model, f"Japanese words to process:\n{self._build_japanese_list(words)}"
+        return self.model, self._build_japanese_prompt(words)
 
     def _build_japanese_prompt(self, words: list[dict]) -> str:
         """Build the prompt for Japanese word enrichment."""
+        return _JAPANESE_PROMPT_HEAD + self._build_japanese_list(words) + _JAPANESE_PROMPT_TAIL
+
+    def _build_japanese_list(self, words: list[dict]) -> str:
+        """Build the per-batch word list of a Japanese prompt."""
         words_info = []
         for w in words:
             words_info.append(f"- {w['word']} ({w['reading']}): {w['meaning_en']}")
-        words_str = '\n'.join(words_info)
-
-        return f'''For each Japanese word below, provide:
-1. Chinese translation (translation_cn) - accurate and natural
-2. Two example sentences in Japanese with Chinese translations
-
-Japanese words to process:
-{words_str}
-
-Return a JSON array with this exact structure:
-[
-  {{
-    "word": "食べる",
-    "translation_cn": "吃",
-    "examples": [
-      {{"sentence": "朝ごはんを食べます。", "translation_cn": "吃早饭。"}},
-      {{"sentence": "何を食べたいですか。", "translation_cn": "你想吃什么？"}}
-    ]
-  }}
-]
-
-Requirements:
-- Chinese translations should be concise and accurate
-- Example sentences should be natural and suitable for Japanese learners
-- Use appropriate politeness level (です/ます form preferred for beginners)
-- Each word MUST have exactly 2 examples
-- Return ONLY the JSON array, no other text'''
+        return '\n'.join(words_info)
 
     def generate_cefr_word_data(
         self,
@@ -253,7 +908,7 @@ Requirements:
             words: List of English words (recommended batch size: 10-20)
             cefr_level: CEFR level (A1, A2, B1, B2, C1, C2)
             max_retries: Maximum retry attempts on failure
-            retry_delay: Delay between retries in seconds
+            retry_delay: Base delay between retries in seconds
 
         Returns:
             List of word data dictionaries with structure:
@@ -267,85 +922,132 @@ Requirements:
                 ]
             }
         """
-        prompt = self._build_cefr_prompt(words, cefr_level)
-
-        for attempt in range(max_retries):
-            try:
-                self._rate_limit()
-
-                response = self.model.generate_content(
-                    prompt,
-                    generation_config=genai.GenerationConfig(
-                        response_mime_type="application/json",
-                        temperature=0.3,
-                    )
-                )
-
-                result = repair_json(response.text)
-
-                if not isinstance(result, list):
-                    raise ValueError("Response is not a list")
-
-                result_words = {item.get('word', '').lower() for item in result}
-                missing = [w for w in words if w.lower() not in result_words]
+        namespace = f'cefr:{cefr_level}'
+        cached, words = self._lookup_cached(namespace, words)
+        if not words:
+            return cached
+
+        result = self._generate(
+            self._build_cefr_prompt(words, cefr_level), words, max_retries, retry_delay,
+            kind='cefr',
+        )
+        self._store_cached(namespace, words, result)
+        return cached + result
+
+    async def generate_cefr_word_data_async(
+        self,
+        words: list[str],
+        cefr_level: str,
+        max_retries: int = 3,
+        retry_delay: float = 5.0
+    ) -> list[dict]:
+        """
+        Async variant of generate_cefr_word_data for running batches concurrently.
 
-                if missing:
-                    print(f"Warning: Missing words in response: {missing}")
+        Args:
+            words: List of English words (recommended batch size: 10-20)
+            cefr_level: CEFR level (A1, A2, B1, B2, C1, C2)
+            max_retries: Maximum retry attempts on failure
+            retry_delay: Base delay between retries in seconds
 
-                return result
+        Returns:
+            List of word data dictionaries (see generate_cefr_word_data)
+        """
+        namespace = f'cefr:{cefr_level}'
+        cached, words = self._lookup_cached(namespace, words)
+        if not words:
+            return cached
+
+        result = await self._generate_async(
+            lambda: self._cefr_request(words, cefr_level), words, max_retries, retry_delay,
+            kind='cefr',
+        )
+        self._store_cached(namespace, words, result)
+        return cached + result
+
+    def _lookup_cached(self, namespace: str, words: list, word_of=str) -> tuple[list[dict], list]:
+        """
+        Split words into cached entries and the words still needing the API.
 
+        word_of maps an item of words to the word it is cached under. Repeats
+        of a word (case-insensitively) are dropped, keeping the first, so no
+        word is looked up or sent to the API twice.
+        """
+        unique = {}
+        for w in words:
+            unique.setdefault(word_of(w).lower(), w)
+        words = list(unique.values())
+        if self.response_cache is None:
+            return [], words
+        keys = [cache_key(self.model_name, PROMPT_VERSION, namespace, word_of(w)) for w in words]
+        found = self.response_cache.get_many(keys)
+        if found:
+            print(f"  {len(found)}/{len(words)} words served from response cache")
+        hits = [found[k] for k in keys if k in found]
+        misses = [w for w, k in zip(words, keys) if k not in found]
+        return hits, misses
+
+    def _store_cached(
+        self,
+        namespace: str,
+        words: list[str],
+        result: list[dict],
+        word_key: str = 'word',
+        validate=validate_word_entry,
+    ):
+        """Cache the requested, fully valid entries from an API response."""
+        if self.response_cache is None:
+            return
+        requested = {w.lower() for w in words}
+        self.response_cache.set_many({
+            cache_key(self.model_name, PROMPT_VERSION, namespace, item[word_key]): item
+            for item in result
+            if isinstance(item, dict)
+            and item.get(word_key, '').lower() in requested
+            and not validate(item)
+        })
+
+    def _cached_model(self, key: str, instructions: str):
+        """Return a model bound to cached instructions, creating the cache on first use."""
+        if key not in self._cached_models:
+            try:
+                cache = caching.CachedContent.create(
+                    model=CACHE_MODEL,
+                    display_name=f'wordmaster-{key}',
+                    system_instruction=instructions,
+                    ttl=CACHE_TTL,
+                )
+                self._cached_models[key] = genai.GenerativeModel.from_cached_content(cache)
+                print(f"Created context cache {cache.name} for {key}")
             except Exception as e:
-                print(f"Attempt {attempt + 1}/{max_retries} failed: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay * (attempt + 1))
-                else:
-                    raise
-
-        return []
+                print(f"Warning: Context cache unavailable for {key}, sending full prompts: {e}")
+                self._cached_models[key] = None
+        return self._cached_models[key]
+
+    def _cefr_request(self, words: list[str], cefr_level: str):
+        """Pick the model and prompt for a CEFR batch, using the context cache if enabled."""
+        if self.use_context_cache:
+            instructions = self._build_cefr_instructions(
+                f'the {cefr_level} level English words listed in each request', cefr_level
+            )
+            model = self._cached_model(f'cefr-{cefr_level.lower()}', instructions)
+            if model is not None:
+                return model, f"Words: {', '.join(words)}"
+        return self.model, self._build_cefr_prompt(words, cefr_level)
 
     def _build_cefr_prompt(self, words: list[str], cefr_level: str) -> str:
         """Build the prompt for CEFR word data generation."""
         words_str = ', '.join(words)
+        return self._build_cefr_instructions(
+            f'these {cefr_level} level English words: {words_str}', cefr_level
+        )
 
-        # Adjust complexity based on CEFR level
-        level_guidance = {
-            'A1': 'very simple sentences suitable for complete beginners',
-            'A2': 'simple sentences suitable for elementary learners',
-            'B1': 'moderately complex sentences suitable for intermediate learners',
-            'B2': 'complex sentences suitable for upper-intermediate learners',
-            'C1': 'sophisticated sentences suitable for advanced learners',
-            'C2': 'nuanced sentences suitable for proficient speakers',
-        }
-
-        complexity = level_guidance.get(cefr_level, 'sentences appropriate for the word level')
-
-        return f'''Generate Chinese translations, IPA phonetics, and example sentences for these {cefr_level} level English words: {words_str}
-
-For each word, provide:
-1. Chinese translation (translation_cn) - concise and accurate
-2. IPA phonetic transcription (e.g., /əˈbændən/)
-3. Two example sentences with Chinese translations - use {complexity}
-
-Return a JSON array with this exact structure for each word:
-[
-  {{
-    "word": "example",
-    "translation_cn": "例子；范例",
-    "phonetic": "/ɪɡˈzæmpəl/",
-    "examples": [
-      {{"sentence": "This is an example.", "translation_cn": "这是一个例子。"}},
-      {{"sentence": "Can you give me an example?", "translation_cn": "你能给我一个例子吗？"}}
-    ]
-  }}
-]
-
-Requirements:
-- Chinese translations should be concise, listing main meanings separated by ；
-- Use standard IPA notation for phonetics
-- Example sentences should match {cefr_level} difficulty level
-- Chinese translations of examples should be natural and accurate
-- Each word MUST have exactly 2 examples
-- Return ONLY the JSON array, no other text'''
+    def _build_cefr_instructions(self, subject: str, cefr_level: str) -> str:
+        """Build the CEFR instructions for the given subject (inline words or a reference)."""
+        return (
+            f'Generate Chinese translations, IPA phonetics, and example sentences for {subject}'
+            + _cefr_instructions_tail(cefr_level)
+        )
 
     def generate_kanji_data(
         self,
@@ -361,7 +1063,7 @@ Requirements:
             kanji_list: List of kanji dictionaries with keys: kanji, description
             jlpt_level: JLPT level (N5, N4, N3, N2, N1)
             max_retries: Maximum retry attempts on failure
-            retry_delay: Delay between retries in seconds
+            retry_delay: Base delay between retries in seconds
 
         Returns:
             List of kanji data dictionaries with structure:
@@ -376,94 +1078,97 @@ Requirements:
                 ]
             }
         """
-        prompt = self._build_kanji_prompt(kanji_list, jlpt_level)
-
-        for attempt in range(max_retries):
-            try:
-                self._rate_limit()
-
-                response = self.model.generate_content(
-                    prompt,
-                    generation_config=genai.GenerationConfig(
-                        response_mime_type="application/json",
-                        temperature=0.3,
-                    )
-                )
-
-                result = repair_json(response.text)
-
-                if not isinstance(result, list):
-                    raise ValueError("Response is not a list")
-
-                result_kanji = {item.get('kanji', '') for item in result}
-                input_kanji = {k['kanji'] for k in kanji_list}
-                missing = input_kanji - result_kanji
-
-                if missing:
-                    print(f"Warning: Missing kanji in response: {missing}")
-
-                return result
+        namespace = f'kanji:{jlpt_level}'
+        cached, kanji_list = self._lookup_cached(namespace, kanji_list, word_of=itemgetter('kanji'))
+        if not kanji_list:
+            return cached
+
+        result = self._generate(
+            self._build_kanji_prompt(kanji_list, jlpt_level), kanji_list, max_retries, retry_delay,
+            parse=self._parse_kanji_response, kind='kanji',
+        )
+        self._store_cached(
+            namespace, [k['kanji'] for k in kanji_list], result,
+            word_key='kanji', validate=validate_kanji_entry,
+        )
+        return cached + result
+
+    async def generate_kanji_data_async(
+        self,
+        kanji_list: list[dict],
+        jlpt_level: str,
+        max_retries: int = 3,
+        retry_delay: float = 5.0
+    ) -> list[dict]:
+        """
+        Async variant of generate_kanji_data for running batches concurrently.
 
-            except Exception as e:
-                print(f"Attempt {attempt + 1}/{max_retries} failed: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay * (attempt + 1))
-                else:
-                    raise
+        Args:
+            kanji_list: List of kanji dictionaries with keys: kanji, description
+            jlpt_level: JLPT level (N5, N4, N3, N2, N1)
+            max_retries: Maximum retry attempts on failure
+            retry_delay: Base delay between retries in seconds
 
-        return []
+        Returns:
+            List of kanji data dictionaries (see generate_kanji_data)
+        """
+        namespace = f'kanji:{jlpt_level}'
+        cached, kanji_list = self._lookup_cached(namespace, kanji_list, word_of=itemgetter('kanji'))
+        if not kanji_list:
+            return cached
+
+        result = await self._generate_async(
+            lambda: self._kanji_request(kanji_list, jlpt_level), kanji_list, max_retries, retry_delay,
+            parse=self._parse_kanji_response, kind='kanji',
+        )
+        self._store_cached(
+            namespace, [k['kanji'] for k in kanji_list], result,
+            word_key='kanji', validate=validate_kanji_entry,
+        )
+        return cached + result
+
+    def _parse_kanji_response(self, text: str, kanji_list: list[dict]) -> list[dict]:
+        """Parse a kanji data response and warn about kanji missing from it."""
+        result = repair_json(text)
+
+        missing = missing_words([k['kanji'] for k in kanji_list], result, key='kanji')
+
+        if missing:
+            print(f"Warning: Missing kanji in response: {missing}")
+
+        return result
+
+    def _kanji_request(self, kanji_list: list[dict], jlpt_level: str):
+        """Pick the model and prompt for a kanji batch, using the context cache if enabled."""
+        if self.use_context_cache:
+            instructions = (
+                "For each Japanese kanji listed in each request, provide readings and example words.\n\n"
+                + self._build_kanji_instructions(jlpt_level)
+            )
+            model = self._cached_model(f'kanji-{jlpt_level.lower()}', instructions)
+            if model is not None:
+                return model, self._build_kanji_list(kanji_list, jlpt_level)
+        return self.model, self._build_kanji_prompt(kanji_list, jlpt_level)
 
     def _build_kanji_prompt(self, kanji_list: list[dict], jlpt_level: str) -> str:
         """Build the prompt for kanji data generation."""
+        return (
+            "For each Japanese kanji below, provide readings and example words.\n\n"
+            f"{self._build_kanji_list(kanji_list, jlpt_level)}\n\n"
+            + self._build_kanji_instructions(jlpt_level)
+        )
+
+    def _build_kanji_list(self, kanji_list: list[dict], jlpt_level: str) -> str:
+        """Build the per-batch part of a kanji prompt."""
         kanji_info = []
         for k in kanji_list:
             kanji_info.append(f"- {k['kanji']}: {k.get('description', '')}")
         kanji_str = '\n'.join(kanji_info)
+        return f"Kanji to process (JLPT {jlpt_level}):\n{kanji_str}"
 
-        # Adjust complexity based on JLPT level
-        level_guidance = {
-            'N5': 'very common, basic vocabulary words',
-            'N4': 'common, elementary vocabulary words',
-            'N3': 'intermediate vocabulary words',
-            'N2': 'upper-intermediate vocabulary words',
-            'N1': 'advanced vocabulary words',
-        }
-
-        complexity = level_guidance.get(jlpt_level, 'vocabulary words appropriate for the level')
-
-        return f'''For each Japanese kanji below, provide readings and example words.
-
-Kanji to process (JLPT {jlpt_level}):
-{kanji_str}
-
-For each kanji, provide:
-1. translation_cn: Chinese meaning (concise)
-2. onyomi: 音読み in katakana (e.g., ジン, ニン)
-3. kunyomi: 訓読み in hiragana (e.g., ひと)
-4. Two example words using this kanji - use {complexity}
-
-Return a JSON array with this exact structure:
-[
-  {{
-    "kanji": "人",
-    "translation_cn": "人",
-    "onyomi": "ジン、ニン",
-    "kunyomi": "ひと",
-    "examples": [
-      {{"word": "人間", "reading": "にんげん", "translation_cn": "人类；人"}},
-      {{"word": "日本人", "reading": "にほんじん", "translation_cn": "日本人"}}
-    ]
-  }}
-]
-
-Requirements:
-- Chinese translations should be concise
-- Multiple readings should be separated by 、
-- If no onyomi or kunyomi exists, use empty string ""
-- Example words should be common vocabulary containing this kanji
-- Reading should be in hiragana
-- Each kanji MUST have exactly 2 example words
-- Return ONLY the JSON array, no other text'''
+    def _build_kanji_instructions(self, jlpt_level: str) -> str:
+        """Build the fixed kanji instructions shared by every batch of a level."""
+        return _kanji_instructions(jlpt_level)
 
     def generate_response(
         self,
@@ -477,30 +1182,35 @@ Requirements:
         Args:
             prompt: The prompt to send to Gemini
             max_retries: Maximum retry attempts on failure
-            retry_delay: Delay between retries in seconds
+            retry_delay: Base delay between retries in seconds
 
         Returns:
             Generated text response
         """
+        # The same prompt gets the same response back from the cache
+        key = None
+        if self.response_cache is not None:
+            key = prompt_key(self.model_name, prompt, RESPONSE_TEMPERATURE)
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                print("  Response served from response cache")
+                return cached['text']
+
         for attempt in range(max_retries):
             try:
-                self._rate_limit()
+                self._rate_limit(prompt)
 
                 response = self.model.generate_content(
                     prompt,
-                    generation_config=genai.GenerationConfig(
-                        temperature=0.7,
-                    )
+                    generation_config=self._text_config
                 )
 
+                if key is not None and response.text:
+                    self.response_cache.set(key, {'text': response.text})
                 return response.text
 
             except Exception as e:
-                print(f"Attempt {attempt + 1}/{max_retries} failed: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay * (attempt + 1))
-                else:
-                    raise
+                self._backoff(e, attempt, max_retries, retry_delay)
 
         return ""
 
@@ -518,7 +1228,7 @@ Requirements:
             words: List of French words (recommended batch size: 10-20)
             cefr_level: CEFR level (A1, A2, B1, B2, C1, C2)
             max_retries: Maximum retry attempts on failure
-            retry_delay: Delay between retries in seconds
+            retry_delay: Base delay between retries in seconds
 
         Returns:
             List of word data dictionaries with structure:
@@ -532,85 +1242,67 @@ Requirements:
                 ]
             }
         """
-        prompt = self._build_french_prompt(words, cefr_level)
-
-        for attempt in range(max_retries):
-            try:
-                self._rate_limit()
-
-                response = self.model.generate_content(
-                    prompt,
-                    generation_config=genai.GenerationConfig(
-                        response_mime_type="application/json",
-                        temperature=0.3,
-                    )
-                )
-
-                result = repair_json(response.text)
-
-                if not isinstance(result, list):
-                    raise ValueError("Response is not a list")
-
-                result_words = {item.get('word', '').lower() for item in result}
-                missing = [w for w in words if w.lower() not in result_words]
-
-                if missing:
-                    print(f"Warning: Missing words in response: {missing}")
-
-                return result
+        namespace = f'french:{cefr_level}'
+        cached, words = self._lookup_cached(namespace, words)
+        if not words:
+            return cached
+
+        result = self._generate(
+            self._build_french_prompt(words, cefr_level), words, max_retries, retry_delay,
+            kind='cefr',
+        )
+        self._store_cached(namespace, words, result)
+        return cached + result
+
+    async def generate_french_word_data_async(
+        self,
+        words: list[str],
+        cefr_level: str,
+        max_retries: int = 3,
+        retry_delay: float = 5.0
+    ) -> list[dict]:
+        """
+        Async variant of generate_french_word_data for running batches concurrently.
 
-            except Exception as e:
-                print(f"Attempt {attempt + 1}/{max_retries} failed: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay * (attempt + 1))
-                else:
-                    raise
+        Args:
+            words: List of French words (recommended batch size: 10-20)
+            cefr_level: CEFR level (A1, A2, B1, B2, C1, C2)
+            max_retries: Maximum retry attempts on failure
+            retry_delay: Base delay between retries in seconds
 
-        return []
+        Returns:
+            List of word data dictionaries (see generate_french_word_data)
+        """
+        namespace = f'french:{cefr_level}'
+        cached, words = self._lookup_cached(namespace, words)
+        if not words:
+            return cached
+
+        result = await self._generate_async(
+            lambda: self._french_request(words, cefr_level), words, max_retries, retry_delay,
+            kind='cefr',
+        )
+        self._store_cached(namespace, words, result)
+        return cached + result
+
+    def _french_request(self, words: list[str], cefr_level: str):
+        """Pick the model and prompt for a French batch, using the context cache if enabled."""
+        if self.use_context_cache:
+            instructions = (
+                "Génère des traductions chinoises, des transcriptions phonétiques IPA et des phrases "
+                f"d'exemple pour les mots français de niveau {cefr_level} du CECR listés dans chaque requête"
+                + _french_prompt_tail(cefr_level)
+            )
+            model = self._cached_model(f'french-{cefr_level.lower()}', instructions)
+            if model is not None:
+                return model, f"Mots : {', '.join(words)}"
+        return self.model, self._build_french_prompt(words, cefr_level)
 
     def _build_french_prompt(self, words: list[str], cefr_level: str) -> str:
         """Build the prompt for French word data generation."""
         words_str = ', '.join(words)
-
-        # Adjust complexity based on CEFR level
-        level_guidance = {
-            'A1': 'très simples, adaptées aux débutants complets',
-            'A2': 'simples, adaptées aux apprenants élémentaires',
-            'B1': 'moyennement complexes, adaptées aux apprenants intermédiaires',
-            'B2': 'complexes, adaptées aux apprenants de niveau intermédiaire avancé',
-            'C1': 'sophistiquées, adaptées aux apprenants avancés',
-            'C2': 'nuancées, adaptées aux locuteurs maîtrisant la langue',
-        }
-
-        complexity = level_guidance.get(cefr_level, 'phrases appropriées au niveau du mot')
-
-        return f'''Génère des traductions chinoises, des transcriptions phonétiques IPA et des phrases d'exemple pour ces mots français de niveau {cefr_level} du CECR : {words_str}
-
-Pour chaque mot, fournis :
-1. Traduction chinoise (translation_cn) - concise et précise
-2. Transcription phonétique IPA (par exemple, /ɛtʁ/ pour "être")
-3. Deux phrases d'exemple avec traductions chinoises - utilise des phrases {complexity}
-
-IMPORTANT : Les mots français contiennent des caractères spéciaux (é, è, ê, ë, ç, œ, ù, â). Assure-toi de les préserver exactement.
-
-Retourne un tableau JSON avec exactement cette structure pour chaque mot :
-[
-  {{
-    "word": "être",
-    "translation_cn": "是；存在",
-    "phonetic": "[ɛtʁ]",
-    "examples": [
-      {{"sentence": "Je suis étudiant.", "translation_cn": "我是学生。"}},
-      {{"sentence": "Il est français.", "translation_cn": "他是法国人。"}}
-    ]
-  }}
-]
-
-Exigences :
-- Les traductions chinoises doivent être concises, listant les significations principales séparées par ；
-- Utilise la notation IPA standard entre crochets [...]
-- Les phrases d'exemple doivent correspondre au niveau de difficulté {cefr_level}
-- Les traductions chinoises des exemples doivent être naturelles et précises
-- Chaque mot DOIT avoir exactement 2 exemples
-- PRÉSERVE TOUS LES CARACTÈRES SPÉCIAUX FRANÇAIS (é, è, ê, ë, ç, œ, ù, â, etc.)
-- Retourne UNIQUEMENT le tableau JSON, sans autre texte'''
+        return (
+            "Génère des traductions chinoises, des transcriptions phonétiques IPA et des phrases "
+            f"d'exemple pour ces mots français de niveau {cefr_level} du CECR : {words_str}"
+            + _french_prompt_tail(cefr_level)
+        )
@@ -0,0 +1,132 @@
+"""JSON file I/O helpers, using orjson when installed and stdlib json otherwise."""
+
+import json
+import mmap
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def load_json(path) -> Any:
+    """
+    Read and parse a UTF-8 JSON file.
+
+    Args:
+        path: File to read
+
+    Returns:
+        Parsed JSON object
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_json_mapped(path) -> Any:
+    """
+    Parse a JSON file straight from a read-only memory map.
+
+    With orjson the file is parsed without first copying it into a bytes
+    object; the stdlib fallback behaves like load_json.
+
+    Args:
+        path: File to read
+
+    Returns:
+        Parsed JSON object
+    """
+    with open(path, 'rb') as f:
+        if orjson is None or f.seek(0, 2) == 0:
+            f.seek(0)
+            return json.loads(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                return orjson.loads(view)
+            finally:
+                view.release()
+
+
+def dump_json(obj: Any, path, indent: bool = True):
+    """
+    Write an object as UTF-8 JSON, keeping non-ASCII characters as-is.
+
+    Args:
+        obj: JSON-serializable object
+        path: File to write
+        indent: Pretty-print with 2-space indentation
+    """
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(obj, f, ensure_ascii=False, indent=2 if indent else None)
+
+
+def _dumps_indented(obj: Any) -> bytes:
+    """Serialize with 2-space indentation, matching dump_json's formatting."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def dump_json_streamed(header: dict, list_key: str, items, path):
+    """
+    Write ``{**header, list_key: [*items]}`` as indented JSON, one item at a time.
+
+    The output is byte-identical to dump_json() on the assembled object, but
+    only a single serialized item is held in memory, and items may come from
+    a generator.
+
+    Args:
+        header: Leading top-level fields (must not be empty)
+        list_key: Key of the trailing array field
+        items: Iterable of JSON-serializable array elements
+        path: File to write
+    """
+    with open(path, 'wb') as f:
+        # '{\n  "a": 1\n}' -> '{\n  "a": 1,\n'
+        f.write(_dumps_indented(header)[:-2] + b',\n  ')
+        f.write(_dumps_indented(list_key) + b': [')
+        count = 0
+        for item in items:
+            f.write(b',\n    ' if count else b'\n    ')
+            f.write(_dumps_indented(item).replace(b'\n', b'\n    '))
+            count += 1
+        f.write(b'\n  ]\n}' if count else b']\n}')
+
+
+def dump_line(obj: Any) -> bytes:
+    """
+    Serialize an object as compact single-line UTF-8 JSON (for JSONL files).
+
+    Args:
+        obj: JSON-serializable object
+
+    Returns:
+        Encoded JSON without a trailing newline
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+def load_line(data: bytes) -> Any:
+    """
+    Parse one compact JSON document, as written by dump_line.
+
+    Args:
+        data: Encoded JSON
+
+    Returns:
+        Parsed JSON object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
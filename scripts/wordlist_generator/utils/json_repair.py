@@ -2,7 +2,61 @@
 
 import json
 import re
-from typing import Any
+from typing import Any, Iterable, Iterator
+
+from .json_io import load_line
+
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+
+# Entries matching this schema have no validate_word_entry issues
+_NON_EMPTY_STRING = {'type': 'string', 'minLength': 1}
+WORD_ENTRY_SCHEMA = {
+    'type': 'object',
+    'required': ['word', 'phonetic', 'examples'],
+    'properties': {
+        'word': _NON_EMPTY_STRING,
+        'phonetic': _NON_EMPTY_STRING,
+        'examples': {
+            'type': 'array',
+            'minItems': 2,
+            'items': {
+                'type': 'object',
+                'required': ['sentence', 'translation_cn'],
+                'properties': {
+                    'sentence': _NON_EMPTY_STRING,
+                    'translation_cn': _NON_EMPTY_STRING,
+                },
+            },
+        },
+    },
+}
+
+# Entries matching this schema have no validate_japanese_entry issues
+JAPANESE_ENTRY_SCHEMA = {
+    'type': 'object',
+    'required': ['word', 'translation_cn', 'examples'],
+    'properties': {
+        'word': _NON_EMPTY_STRING,
+        'translation_cn': _NON_EMPTY_STRING,
+        'examples': WORD_ENTRY_SCHEMA['properties']['examples'],
+    },
+}
+
+_word_entry_validator = fastjsonschema.compile(WORD_ENTRY_SCHEMA) if fastjsonschema else None
+_japanese_entry_validator = fastjsonschema.compile(JAPANESE_ENTRY_SCHEMA) if fastjsonschema else None
+
+
+# Patterns for the repair passes in repair_json
+_FENCE_OPEN = re.compile(r'^```json?\s*\n?')
+_FENCE_CLOSE = re.compile(r'\n?```\s*$')
+_TRAILING_COMMA = re.compile(r',(\s*[}\]])')
+_BARE_KEY = re.compile(r'(\{|\,)\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*:')
+_ARRAY_SPAN = re.compile(r'\[[\s\S]*\]')
+_OBJECT_SPAN = re.compile(r'\{[\s\S]*\}')
 
 
 def repair_json(raw_text: str) -> Any:
@@ -18,48 +72,131 @@ def repair_json(raw_text: str) -> Any:
     Raises:
         json.JSONDecodeError: If JSON cannot be repaired and parsed
     """
+    # Fast path: JSON-mode responses are almost always valid as they are;
+    # anything else (a fence, leading text) can't be, so don't try parsing it
+    if raw_text[:1] in ('[', '{'):
+        try:
+            return load_line(raw_text)
+        except json.JSONDecodeError:
+            pass
+
     text = raw_text.strip()
 
     # Remove markdown code blocks
-    text = re.sub(r'^```json?\s*\n?', '', text)
-    text = re.sub(r'\n?```\s*$', '', text)
+    text = _FENCE_OPEN.sub('', text)
+    text = _FENCE_CLOSE.sub('', text)
 
     # Try parsing as-is first
     try:
-        return json.loads(text)
+        return load_line(text)
     except json.JSONDecodeError:
         pass
 
     # Fix trailing commas before } or ]
-    text = re.sub(r',(\s*[}\]])', r'\1', text)
+    text = _TRAILING_COMMA.sub(r'\1', text)
 
     # Fix missing quotes around keys (simple cases)
-    text = re.sub(r'(\{|\,)\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*:', r'\1"\2":', text)
+    text = _BARE_KEY.sub(r'\1"\2":', text)
 
     # Try parsing again
     try:
-        return json.loads(text)
+        return load_line(text)
     except json.JSONDecodeError:
         pass
 
     # Try to extract JSON array or object from text
     # Look for first [ or { and last ] or }
-    array_match = re.search(r'\[[\s\S]*\]', text)
+    array_match = _ARRAY_SPAN.search(text)
     if array_match:
         try:
-            return json.loads(array_match.group())
+            return load_line(array_match.group())
         except json.JSONDecodeError:
             pass
 
-    object_match = re.search(r'\{[\s\S]*\}', text)
+    object_match = _OBJECT_SPAN.search(text)
     if object_match:
         try:
-            return json.loads(object_match.group())
+            return load_line(object_match.group())
         except json.JSONDecodeError:
             pass
 
     # Last resort: raise the original error
-    return json.loads(raw_text)
+    return load_line(raw_text)
+
+
+# Characters that change the nesting state outside / inside a JSON string
+_STRUCTURE_CHARS = re.compile(r'[\[\]{}"]')
+_STRING_CHARS = re.compile(r'["\\]')
+
+
+def iter_json_array(chunks: Iterable[str]) -> Iterator[dict]:
+    """
+    Yield the objects of a JSON array as its text arrives in chunks.
+
+    Each object is parsed as soon as its closing brace arrives, and each
+    character is scanned once however the text is split. Text before the
+    opening bracket (e.g. a markdown fence) is skipped.
+
+    Args:
+        chunks: Pieces of the text of a JSON array of objects
+
+    Yields:
+        Parsed array elements
+
+    Raises:
+        json.JSONDecodeError: If an element is not valid JSON
+        ValueError: If the text ends before the array is closed
+    """
+    buffer = ''
+    pos = 0
+    depth = 0
+    start = None
+    in_string = False
+
+    for chunk in chunks:
+        buffer += chunk
+        while True:
+            if in_string:
+                match = _STRING_CHARS.search(buffer, pos)
+                if match is None:
+                    pos = len(buffer)
+                    break
+                if match.group() == '\\':
+                    if match.end() == len(buffer):
+                        # The escaped character is in the next chunk
+                        pos = match.start()
+                        break
+                    pos = match.end() + 1
+                    continue
+                in_string = False
+                pos = match.end()
+                continue
+
+            match = _STRUCTURE_CHARS.search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            ch = match.group()
+            pos = match.end()
+            if depth == 0:
+                if ch == '[':
+                    depth = 1
+            elif ch == '"':
+                in_string = True
+            elif ch in '[{':
+                if depth == 1:
+                    start = match.start()
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 1:
+                    yield load_line(buffer[start:pos])
+                    buffer = buffer[pos:]
+                    pos = 0
+                elif depth == 0:
+                    return
+
+    raise ValueError("Response ended before the JSON array was closed")
 
 
 def validate_word_entry(entry: dict) -> list[str]:
@@ -72,6 +209,15 @@ def validate_word_entry(entry: dict) -> list[str]:
     Returns:
         List of validation issues (empty if valid)
     """
+    # Fast path for the common case; invalid entries fall through so every
+    # issue is still reported, not just the schema's first error
+    if _word_entry_validator is not None:
+        try:
+            _word_entry_validator(entry)
+            return []
+        except fastjsonschema.JsonSchemaException:
+            pass
+
     issues = []
     word = entry.get('word', '<unknown>')
 
@@ -95,3 +241,75 @@ def validate_word_entry(entry: dict) -> list[str]:
             issues.append(f"Example {i+1} missing 'translation_cn' for: {word}")
 
     return issues
+
+
+def validate_japanese_entry(entry: dict) -> list[str]:
+    """
+    Validate a single Japanese word entry (translation instead of phonetic).
+
+    Args:
+        entry: Word entry dictionary
+
+    Returns:
+        List of validation issues (empty if valid)
+    """
+    if _japanese_entry_validator is not None:
+        try:
+            _japanese_entry_validator(entry)
+            return []
+        except fastjsonschema.JsonSchemaException:
+            pass
+
+    issues = []
+    word = entry.get('word', '<unknown>')
+
+    if not entry.get('word'):
+        issues.append("Missing 'word' field")
+    if not entry.get('translation_cn'):
+        issues.append(f"Missing 'translation_cn' for: {word}")
+
+    examples = entry.get('examples', [])
+    if not examples:
+        issues.append(f"No examples for: {word}")
+    elif len(examples) < 2:
+        issues.append(f"Less than 2 examples for: {word} (has {len(examples)})")
+
+    for i, ex in enumerate(examples):
+        if not ex.get('sentence'):
+            issues.append(f"Example {i+1} missing 'sentence' for: {word}")
+        if not ex.get('translation_cn'):
+            issues.append(f"Example {i+1} missing 'translation_cn' for: {word}")
+
+    return issues
+
+
+def validate_kanji_entry(entry: dict) -> list[str]:
+    """
+    Validate a single kanji entry (readings plus example words).
+
+    Args:
+        entry: Kanji entry dictionary
+
+    Returns:
+        List of validation issues (empty if valid)
+    """
+    issues = []
+
+    if not entry.get('kanji'):
+        issues.append('missing kanji')
+    if not entry.get('translation_cn'):
+        issues.append('missing translation_cn')
+
+    examples = entry.get('examples', [])
+    if len(examples) < 2:
+        issues.append(f'only {len(examples)} examples (need 2)')
+
+    for i, ex in enumerate(examples):
+        if not ex.get('word'):
+            issues.append(f'example {i+1} missing word')
+        if not ex.get('reading'):
+            issues.append(f'example {i+1} missing reading')
+        if not ex.get('translation_cn'):
+            issues.append(f'example {i+1} missing translation_cn')
+
+    return issues
@@ -0,0 +1,186 @@
+"""Gemini enrichment and checkpointing shared by the kanji list generators."""
+
+import asyncio
+import functools
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from .gemini_client import GeminiClient, TransientAPIError
+from .json_io import load_line
+from .json_repair import validate_kanji_entry
+from .llm_cache import LLMCache
+from .progress import ProgressWriter
+
+
+BATCH_SIZE = 10  # Smaller batch for kanji (more complex data per entry)
+API_CONCURRENCY = 8  # in-flight requests; GeminiClient still enforces its RPM limit
+PROGRESS_SYNC_EVERY = 5  # batches between checkpoint fsyncs
+MAX_RETRIES = 6  # per batch, with jittered exponential backoff (capped at 60s)
+
+# Generated fields of a kanji entry; every entry in progress has all of them
+KANJI_DEFAULTS = {'translation_cn': '', 'onyomi': '', 'kunyomi': '', 'examples': []}
+
+
+def load_progress(progress_file: Path) -> dict[str, dict]:
+    """Load progress from checkpoint file."""
+    if not progress_file.exists():
+        return {}
+
+    progress = {}
+    with open(progress_file, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = load_line(line)
+            kanji = item.get('kanji', '')
+            if kanji:
+                progress[kanji] = {**KANJI_DEFAULTS, **item}
+    print(f"Loaded {len(progress)} kanji from checkpoint")
+    return progress
+
+
+def chunks(lst: list, n: int):
+    """Yield successive n-sized chunks from lst."""
+    for i in range(0, len(lst), n):
+        yield lst[i:i + n]
+
+
+@functools.lru_cache(maxsize=1)
+def get_client(llm_cache_file: Optional[Path], context_cache: bool = False) -> GeminiClient:
+    """
+    Return the process-wide Gemini client, so every level shares one rate limiter and context cache.
+
+    Args:
+        llm_cache_file: SQLite response cache to use, or None to always call the API
+        context_cache: Send the fixed prompt instructions once as cached content
+    """
+    cache = LLMCache(llm_cache_file) if llm_cache_file is not None else None
+    return GeminiClient(use_context_cache=context_cache, response_cache=cache)
+
+
+async def generate_batches(
+    client: GeminiClient,
+    batches: list[list[dict]],
+    jlpt_level: str,
+    progress: dict[str, dict],
+    writer: ProgressWriter,
+    validate=validate_kanji_entry,
+):
+    """Run API batches concurrently, checkpointing each as it completes."""
+    sem = asyncio.Semaphore(API_CONCURRENCY)
+    failed = asyncio.Event()
+
+    async def process_batch(i: int, batch: list[dict]):
+        batch_kanji = [k['kanji'] for k in batch]
+        async with sem:
+            # A failed batch stops new ones from starting; finished ones are kept
+            if failed.is_set():
+                return
+            print(f"\nBatch {i+1}/{len(batches)}: Processing {len(batch)} kanji: {batch_kanji[:5]}...")
+
+            try:
+                results = await client.generate_kanji_data_async(
+                    batch, jlpt_level, max_retries=MAX_RETRIES
+                )
+            except TransientAPIError as e:
+                # Throttled or server error even after backing off: leave it for --resume
+                print(f"  Batch {i+1} still failing after retries, skipping: {e}")
+                return
+            except Exception as e:
+                print(f"  Batch {i+1} failed: {e}")
+                print("  Stopping to preserve progress. Run with --resume to continue.")
+                failed.set()
+                return
+
+        valid_results = []
+        for item in results:
+            issues = validate(item)
+            if issues:
+                print(f"  Warning: Issues with '{item.get('kanji', '?')}': {issues[:2]}")
+            valid_results.append(item)
+
+        for item in valid_results:
+            progress[item['kanji']] = {**KANJI_DEFAULTS, **item}
+
+        # Runs without an await, so checkpoint writes never interleave
+        writer.add_batch(valid_results)
+        print(f"  Batch {i+1}: saved {len(valid_results)} kanji to checkpoint")
+
+    await asyncio.gather(*(process_batch(i, batch) for i, batch in enumerate(batches)))
+
+
+def run_kanji_generation(
+    source_kanji: list[dict],
+    progress_file: Path,
+    jlpt_level: str,
+    use_api: bool = True,
+    resume: bool = True,
+    context_cache: bool = False,
+    llm_cache_file: Optional[Path] = None,
+    validate=validate_kanji_entry,
+) -> dict[str, dict]:
+    """
+    Generate API data for the source kanji that have none yet.
+
+    Args:
+        source_kanji: Kanji dicts with keys: kanji, and optionally description
+        progress_file: JSONL checkpoint to resume from and append to
+        jlpt_level: JLPT level the prompt's example words are pitched at
+        use_api: Call Gemini for kanji missing from the checkpoint
+        resume: Start from the checkpoint instead of from scratch
+        context_cache: Send the fixed prompt instructions once as cached content
+        llm_cache_file: SQLite response cache, or None to always call the API
+        validate: Returns the issues with a generated entry, for warnings
+
+    Returns:
+        Generated entries by kanji, each with every field in KANJI_DEFAULTS
+    """
+    progress = load_progress(progress_file) if resume else {}
+
+    kanji_needing_api = [entry for entry in source_kanji if entry['kanji'] not in progress]
+
+    print(f"Kanji needing API generation: {len(kanji_needing_api)}")
+
+    if use_api and kanji_needing_api:
+        try:
+            client = get_client(llm_cache_file, context_cache)
+            batches = list(chunks(kanji_needing_api, BATCH_SIZE))
+            print(f"\nGenerating data for {len(kanji_needing_api)} kanji...")
+            print(f"Batch size: {BATCH_SIZE}, Batches: {len(batches)}, Concurrency: {API_CONCURRENCY}")
+
+            with ProgressWriter(progress_file, flush_every=PROGRESS_SYNC_EVERY) as writer:
+                asyncio.run(generate_batches(client, batches, jlpt_level, progress, writer, validate))
+
+        except (ImportError, ValueError) as e:
+            print(f"Warning: Cannot initialize Gemini client: {e}")
+            print("Proceeding without API generation...")
+
+    return progress
+
+
+def tally_kanji(entries: Iterable[dict], stats: dict) -> Iterator[dict]:
+    """
+    Yield output entries unchanged, counting those with each kind of generated data.
+
+    stats is reset when iteration starts and complete once the entries are
+    exhausted, so the output can be streamed without keeping a list for them.
+    """
+    stats.update(total_kanji=0, with_translation=0, with_onyomi=0, with_kunyomi=0, with_examples=0)
+    for k in entries:
+        stats['total_kanji'] += 1
+        stats['with_translation'] += bool(k['translation_cn'])
+        stats['with_onyomi'] += bool(k['onyomi'])
+        stats['with_kunyomi'] += bool(k['kunyomi'])
+        stats['with_examples'] += len(k['examples']) >= 2
+        yield k
+
+
+def print_kanji_stats(title: str, stats: dict):
+    """Print the statistics counted by tally_kanji."""
+    print(f"\nStatistics for {title}:")
+    print(f"  Total kanji: {stats['total_kanji']}")
+    if stats['total_kanji'] > 0:
+        print(f"  With translation: {stats['with_translation']} ({100*stats['with_translation']/stats['total_kanji']:.1f}%)")
+        print(f"  With onyomi: {stats['with_onyomi']} ({100*stats['with_onyomi']/stats['total_kanji']:.1f}%)")
+        print(f"  With kunyomi: {stats['with_kunyomi']} ({100*stats['with_kunyomi']/stats['total_kanji']:.1f}%)")
+        print(f"  With 2+ examples: {stats['with_examples']} ({100*stats['with_examples']/stats['total_kanji']:.1f}%)")
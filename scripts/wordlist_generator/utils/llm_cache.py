@@ -0,0 +1,97 @@
+"""On-disk cache of generated word entries, shared across runs and levels."""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+from .json_io import dump_line, load_line
+
+
+def cache_key(model: str, prompt_version: str, namespace: str, word: str) -> str:
+    """
+    Build the cache key for one word's generated entry.
+
+    Args:
+        model: Model name the entry was generated with
+        prompt_version: Prompt version; bump it to invalidate old entries
+        namespace: Prompt family and level, e.g. "cefr:B1"
+        word: The word (case-insensitive)
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    raw = f"{model}|{prompt_version}|{namespace}|{word.lower()}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def prompt_key(model: str, prompt: str, temperature: float) -> str:
+    """
+    Build the cache key for the response to a whole free-form prompt.
+
+    Args:
+        model: Model name the response was generated with
+        prompt: The exact prompt text
+        temperature: Sampling temperature the prompt was sent with
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    raw = json.dumps({'model': model, 'prompt': prompt, 'temperature': temperature}, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """SQLite-backed key -> entry store for API responses, safe to share between threads."""
+
+    def __init__(self, path: Path):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: SQLite file to store entries in
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value BLOB NOT NULL)'
+        )
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached entry for key, or None."""
+        with self.lock:
+            row = self.conn.execute('SELECT value FROM llm_cache WHERE key = ?', (key,)).fetchone()
+        return load_line(row[0]) if row else None
+
+    def get_many(self, keys: list[str]) -> dict[str, dict]:
+        """Return cached entries for whichever of keys are present."""
+        if not keys:
+            return {}
+        placeholders = ','.join('?' * len(keys))
+        with self.lock:
+            rows = self.conn.execute(
+                f'SELECT key, value FROM llm_cache WHERE key IN ({placeholders})', keys
+            ).fetchall()
+        return {key: load_line(value) for key, value in rows}
+
+    def set(self, key: str, value: dict):
+        """Store a single entry."""
+        self.set_many({key: value})
+
+    def set_many(self, entries: dict[str, dict]):
+        """Store several entries in one transaction."""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO llm_cache (key, value) VALUES (?, ?)',
+                [(key, dump_line(value)) for key, value in entries.items()],
+            )
+
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
@@ -0,0 +1,350 @@
+"""Checkpoint storage shared by the generator scripts."""
+
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Optional
+
+from .json_io import dump_line, load_line
+
+# Key of the header record identifying what produced a checkpoint
+META_KEY = '__meta__'
+
+
+def checkpoint_meta(model: str, prompt_version: str, schema: dict) -> dict:
+    """
+    Describe the generation setup a checkpoint's entries depend on.
+
+    Args:
+        model: Model name
+        prompt_version: Prompt version
+        schema: JSON schema of the stored entries
+
+    Returns:
+        Metadata dict for the checkpoint header
+    """
+    schema_json = json.dumps(schema, sort_keys=True).encode('utf-8')
+    return {
+        'model': model,
+        'prompt_version': prompt_version,
+        'schema_hash': hashlib.sha256(schema_json).hexdigest()[:16],
+    }
+
+
+def discard_stale_checkpoint(path: Path, meta: dict) -> bool:
+    """
+    Move a checkpoint aside if its header records a different setup.
+
+    Files without a header predate it and are kept as-is.
+
+    Args:
+        path: JSONL checkpoint file
+        meta: Current checkpoint metadata
+
+    Returns:
+        True if the checkpoint was moved to *.stale.jsonl
+    """
+    path = Path(path)
+    if not path.exists():
+        return False
+    with open(path, 'rb') as f:
+        first_line = f.readline()
+    try:
+        found = json.loads(first_line).get(META_KEY) if first_line.strip() else None
+    except (ValueError, AttributeError):
+        found = None
+    if found is None or found == meta:
+        return False
+
+    stale_path = path.with_suffix('.stale.jsonl')
+    os.replace(path, stale_path)
+    print(f"Warning: checkpoint {path.name} was generated with {found}, now {meta}")
+    print(f"  Moved it to {stale_path.name}; starting fresh")
+    return True
+
+
+def run_fingerprint(source_path: Path, *parts) -> str:
+    """
+    Hash a generator's inputs: the source file's bytes plus extra parts.
+
+    Args:
+        source_path: Source word list the output is built from
+        *parts: Anything else the output depends on (prompt version, level, ...)
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    with open(source_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    for part in parts:
+        digest.update(b'\0' + str(part).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def up_to_date_stats(
+    fingerprint_path: Path,
+    fingerprint: str,
+    output_path: Path,
+    require_complete: bool,
+) -> Optional[dict]:
+    """
+    Return the stats of the last run if its output can be reused as-is.
+
+    Args:
+        fingerprint_path: Sidecar written by save_fingerprint
+        fingerprint: run_fingerprint of the current inputs
+        output_path: Output file the sidecar describes
+        require_complete: Only reuse an output with no words missing API data
+
+    Returns:
+        The recorded stats, or None if the output must be rebuilt
+    """
+    if not Path(output_path).exists():
+        return None
+    try:
+        with open(fingerprint_path, encoding='utf-8') as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(record, dict) or record.get('fingerprint') != fingerprint:
+        return None
+    if require_complete and record.get('missing'):
+        return None
+    return record.get('stats')
+
+
+def save_fingerprint(fingerprint_path: Path, fingerprint: str, missing: int, stats: dict):
+    """
+    Record the inputs and stats of a completed run, replacing the sidecar atomically.
+
+    Args:
+        fingerprint_path: Sidecar file
+        fingerprint: run_fingerprint of the inputs the output was built from
+        missing: Words written without API data
+        stats: Statistics of the written output
+    """
+    fingerprint_path = Path(fingerprint_path)
+    fingerprint_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = fingerprint_path.with_name(fingerprint_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'fingerprint': fingerprint, 'missing': missing, 'stats': stats}, f)
+    os.replace(tmp_path, fingerprint_path)
+
+
+class ProgressWriter:
+    """
+    Append-only JSONL checkpoint writer.
+
+    Batches are serialized into an in-memory buffer and written with a single
+    os.write (then fsync'd) every flush_every batches, or sooner if the buffer
+    grows past buffer_limit bytes. Pending batches are flushed on close and,
+    as a safety net, at interpreter exit. A new file starts with a metadata
+    header record when meta is given.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        flush_every: int = 5,
+        buffer_limit: int = 1 << 16,
+        meta: Optional[dict] = None,
+    ):
+        """
+        Open the checkpoint file for appending.
+
+        Args:
+            path: JSONL checkpoint file (created if missing)
+            flush_every: Batches to buffer before writing to disk
+            buffer_limit: Buffered bytes that force an early write
+            meta: Header written first if the file is new (see checkpoint_meta)
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.flush_every = flush_every
+        self.buffer_limit = buffer_limit
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._buffer = bytearray()
+        self._pending = 0
+        if meta is not None and os.fstat(self._fd).st_size == 0:
+            self._buffer += dump_line({META_KEY: meta}) + b'\n'
+        atexit.register(self.close)
+
+    def add_batch(self, items: list[dict]):
+        """Buffer one batch of entries, writing through when a threshold is hit."""
+        for item in items:
+            self._buffer += dump_line(item)
+            self._buffer += b'\n'
+        self._pending += 1
+        if self._pending >= self.flush_every or len(self._buffer) >= self.buffer_limit:
+            self.flush()
+
+    def flush(self):
+        """Write buffered entries and fsync them to disk."""
+        if self._fd is None or not self._buffer:
+            return
+        view = memoryview(self._buffer)
+        while view:
+            written = os.write(self._fd, view)
+            view = view[written:]
+        view.release()
+        os.fsync(self._fd)
+        self._buffer.clear()
+        self._pending = 0
+
+    def close(self):
+        """Flush pending entries and close the file."""
+        if self._fd is None:
+            return
+        try:
+            self.flush()
+        finally:
+            os.close(self._fd)
+            self._fd = None
+            atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ProgressStore:
+    """
+    SQLite checkpoint of generated entries, keyed by lowercase word.
+
+    Each batch is upserted in one transaction, so re-generated words replace
+    their old entry instead of growing the file, and a crash never leaves a
+    partial batch behind. Has the same add_batch interface as ProgressWriter.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        meta: Optional[dict] = None,
+        legacy_jsonl: Optional[Path] = None,
+        key=str.lower,
+    ):
+        """
+        Open (or create) the checkpoint database.
+
+        Args:
+            path: SQLite checkpoint file
+            meta: Current checkpoint metadata (see checkpoint_meta); a store
+                written under different metadata is moved to *.stale.sqlite
+            legacy_jsonl: JSONL checkpoint to import once, then rename to
+                *.jsonl.migrated
+            key: Maps an entry's word to its checkpoint key
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.key = key
+        self.conn = self._connect()
+
+        stored = self._stored_meta()
+        if meta is not None and stored is not None and stored != meta:
+            self.conn.close()
+            stale_path = path.with_suffix('.stale.sqlite')
+            os.replace(path, stale_path)
+            print(f"Warning: checkpoint {path.name} was generated with {stored}, now {meta}")
+            print(f"  Moved it to {stale_path.name}; starting fresh")
+            self.conn = self._connect()
+            stored = None
+        if meta is not None and stored is None:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                (META_KEY, json.dumps(meta, sort_keys=True)),
+            )
+
+        if legacy_jsonl is not None:
+            self._import_jsonl(Path(legacy_jsonl), meta)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS progress '
+            '(word TEXT PRIMARY KEY, json BLOB NOT NULL, mtime INTEGER NOT NULL)'
+        )
+        conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+        return conn
+
+    def _stored_meta(self) -> Optional[dict]:
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (META_KEY,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _import_jsonl(self, legacy_path: Path, meta: Optional[dict]):
+        """Copy entries from a JSONL checkpoint written before the SQLite store."""
+        if not legacy_path.exists():
+            return
+        if meta is not None and discard_stale_checkpoint(legacy_path, meta):
+            return
+        items = []
+        with open(legacy_path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    items.append(load_line(line))
+        self.add_batch(items)
+        os.replace(legacy_path, legacy_path.with_suffix('.jsonl.migrated'))
+        print(f"Imported {len(items)} checkpoint records from {legacy_path.name}")
+
+    def add_batch(self, items: list[dict]):
+        """Upsert one batch of entries atomically."""
+        rows = [(self.key(item['word']), dump_line(item)) for item in items if item.get('word')]
+        self.conn.execute('BEGIN')
+        try:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO progress (word, json, mtime) "
+                "VALUES (?, ?, strftime('%s', 'now'))",
+                rows,
+            )
+        except BaseException:
+            self.conn.execute('ROLLBACK')
+            raise
+        self.conn.execute('COMMIT')
+
+    def words(self) -> frozenset[str]:
+        """Return the keys of the words that have a stored entry."""
+        return frozenset(word for (word,) in self.conn.execute('SELECT word FROM progress'))
+
+    def revision(self) -> tuple[int, int]:
+        """Return (entry count, newest mtime), which changes whenever entries do."""
+        count, newest = self.conn.execute('SELECT COUNT(*), MAX(mtime) FROM progress').fetchone()
+        return count, newest or 0
+
+    def load(self) -> dict[str, dict]:
+        """Return all stored entries by key."""
+        return {word: load_line(data) for word, data in self.conn.execute('SELECT word, json FROM progress')}
+
+    def export_jsonl(self, path: Path) -> int:
+        """
+        Write all stored entries to a JSONL file, e.g. for inspection.
+
+        Returns:
+            Number of entries written
+        """
+        count = 0
+        with open(path, 'wb') as f:
+            for (data,) in self.conn.execute('SELECT json FROM progress ORDER BY word'):
+                f.write(data)
+                f.write(b'\n')
+                count += 1
+        return count
+
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
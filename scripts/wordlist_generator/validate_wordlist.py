@@ -5,123 +5,175 @@ Automated validation script for word list JSON files.
 Usage:
     python validate_wordlist.py <path_to_wordlist.json>
     python validate_wordlist.py --all  # Validate all wordlists in assets
+    python validate_wordlist.py --all --fail-fast  # Stop each file at its first issue
 """
 
-import json
+import argparse
+import os
 import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Optional
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
-def validate_wordlist(filepath: str, verbose: bool = True) -> dict:
+# Add utils to path
+sys.path.insert(0, str(Path(__file__).parent))
+from utils.json_io import load_json
+
+# Top-level fields every wordlist must set
+REQUIRED_METADATA = ('name', 'language')
+
+
+def read_metadata(f) -> dict:
+    """Read the required top-level fields of a wordlist file, streaming past its word array."""
+    metadata = {}
+    for prefix, event, value in ijson.parse(f):
+        if prefix in REQUIRED_METADATA and event not in ('start_map', 'start_array'):
+            metadata[prefix] = value
+            if len(metadata) == len(REQUIRED_METADATA):
+                break
+    return metadata
+
+
+def validate_wordlist(filepath: str, verbose: bool = True, max_issues: Optional[int] = None) -> dict:
     """
     Check word list quality automatically.
 
     Args:
         filepath: Path to the JSON wordlist file
         verbose: Print detailed output
+        max_issues: Stop reading entries once this many issues are found;
+            None checks the whole list
 
     Returns:
         Validation result dictionary with:
-        - total_words: Number of words
+        - total_words: Number of words (read so far, if truncated)
         - unique_words: Number of unique words
         - issues: List of issue strings
+        - truncated: Whether entries were left unchecked because of max_issues
         - valid: Boolean indicating if all checks passed
     """
-    with open(filepath, encoding='utf-8') as f:
-        data = json.load(f)
-
-    issues = []
-    words = data.get('words', [])
-    seen_words = set()
-
-    # Check metadata
-    if not data.get('name'):
-        issues.append("Missing 'name' field in metadata")
-    if not data.get('language'):
-        issues.append("Missing 'language' field in metadata")
-
-    for i, w in enumerate(words):
-        word = w.get('word', '')
-        line_ref = f"[{i+1}]"
-
-        # Check duplicates
-        word_lower = word.lower()
-        if word_lower in seen_words:
-            issues.append(f"{line_ref} Duplicate: {word}")
-        seen_words.add(word_lower)
-
-        # Check required fields
-        if not word:
-            issues.append(f"{line_ref} Missing 'word' field")
-            continue
-
-        if not w.get('translation_cn'):
-            issues.append(f"{line_ref} Missing translation_cn: {word}")
-
-        if not w.get('phonetic'):
-            issues.append(f"{line_ref} Missing phonetic: {word}")
-
-        # Check phonetic format (should start with /)
-        phonetic = w.get('phonetic', '')
-        if phonetic and not phonetic.startswith('/'):
-            issues.append(f"{line_ref} Invalid phonetic format for: {word} (got: {phonetic})")
-
-        # Check examples
-        examples = w.get('examples', [])
-        if len(examples) < 2:
-            issues.append(f"{line_ref} <2 examples: {word} (has {len(examples)})")
-
-        for j, ex in enumerate(examples):
-            if not ex.get('sentence'):
-                issues.append(f"{line_ref} Example {j+1} missing 'sentence' for: {word}")
-            if not ex.get('translation_cn'):
-                issues.append(f"{line_ref} Example {j+1} missing 'translation_cn' for: {word}")
-
-        # Check part_of_speech (optional but recommended)
-        if not w.get('part_of_speech'):
-            # This is a warning, not an error
-            pass
+    with open(filepath, 'rb') as f:
+        if ijson is not None:
+            # Stream entries with ijson so only one word entry is in memory at a time
+            metadata = read_metadata(f)
+            f.seek(0)
+            words = ijson.items(f, 'words.item', use_float=True)
+        else:
+            metadata = load_json(filepath)
+            words = metadata.get('words', [])
+
+        issues = []
+        word_counts = Counter()
+        total_words = 0
+        truncated = False
+
+        # Check metadata
+        if not metadata.get('name'):
+            issues.append("Missing 'name' field in metadata")
+        if not metadata.get('language'):
+            issues.append("Missing 'language' field in metadata")
+
+        for i, w in enumerate(words):
+            if max_issues is not None and len(issues) >= max_issues:
+                truncated = True
+                break
+            total_words += 1
+            word = w.get('word', '')
+            line_ref = f"[{i+1}]"
+
+            word_counts[word.lower()] += 1
+
+            # Check required fields
+            if not word:
+                issues.append(f"{line_ref} Missing 'word' field")
+                continue
+
+            if not w.get('translation_cn'):
+                issues.append(f"{line_ref} Missing translation_cn: {word}")
+
+            if not w.get('phonetic'):
+                issues.append(f"{line_ref} Missing phonetic: {word}")
+
+            # Check phonetic format (should start with /)
+            phonetic = w.get('phonetic', '')
+            if phonetic and not phonetic.startswith('/'):
+                issues.append(f"{line_ref} Invalid phonetic format for: {word} (got: {phonetic})")
+
+            # Check examples
+            examples = w.get('examples', [])
+            if len(examples) < 2:
+                issues.append(f"{line_ref} <2 examples: {word} (has {len(examples)})")
+
+            for j, ex in enumerate(examples):
+                if not ex.get('sentence'):
+                    issues.append(f"{line_ref} Example {j+1} missing 'sentence' for: {word}")
+                if not ex.get('translation_cn'):
+                    issues.append(f"{line_ref} Example {j+1} missing 'translation_cn' for: {word}")
+
+            # Check part_of_speech (optional but recommended)
+            if not w.get('part_of_speech'):
+                # This is a warning, not an error
+                pass
+
+    # Check duplicates, once per repeated word
+    for word_lower, count in word_counts.items():
+        if word_lower and count > 1:
+            issues.append(f"Duplicate: {word_lower} (x{count})")
 
     result = {
         'filepath': filepath,
-        'total_words': len(words),
-        'unique_words': len(seen_words),
-        'duplicate_count': len(words) - len(seen_words),
+        'total_words': total_words,
+        'unique_words': len(word_counts),
+        'duplicate_count': total_words - len(word_counts),
         'issues': issues,
+        'truncated': truncated,
         'valid': len(issues) == 0
     }
 
     if verbose:
-        print(f"\n{'='*60}")
-        print(f"Validation Report: {filepath}")
-        print(f"{'='*60}")
-        print(f"Total words: {result['total_words']}")
-        print(f"Unique words: {result['unique_words']}")
-        print(f"Duplicates: {result['duplicate_count']}")
-        print(f"Issues found: {len(issues)}")
-
-        if issues:
-            print(f"\n{'Issues:':-^60}")
-            # Show first 20 issues
-            for issue in issues[:20]:
-                print(f"  - {issue}")
-            if len(issues) > 20:
-                print(f"  ... and {len(issues) - 20} more issues")
-        else:
-            print("\n[OK] All checks passed!")
-
-        print(f"{'='*60}\n")
+        print_report(result)
 
     return result
 
 
-def validate_all_wordlists(assets_dir: Optional[str] = None) -> dict:
+def print_report(result: dict):
+    """Print the validation report for one wordlist, as returned by validate_wordlist."""
+    print(f"\n{'='*60}")
+    print(f"Validation Report: {result['filepath']}")
+    print(f"{'='*60}")
+    print(f"Total words: {result['total_words']}")
+    print(f"Unique words: {result['unique_words']}")
+    print(f"Duplicates: {result['duplicate_count']}")
+    print(f"Issues found: {len(result['issues'])}")
+    if result['truncated']:
+        print("Stopped early; the remaining entries were not checked")
+
+    if result['issues']:
+        print(f"\n{'Issues:':-^60}")
+        # Show first 20 issues
+        for issue in result['issues'][:20]:
+            print(f"  - {issue}")
+        if len(result['issues']) > 20:
+            print(f"  ... and {len(result['issues']) - 20} more issues")
+    else:
+        print("\n[OK] All checks passed!")
+
+    print(f"{'='*60}\n")
+
+
+def validate_all_wordlists(assets_dir: Optional[str] = None, max_issues: Optional[int] = None) -> dict:
     """
     Validate all wordlist JSON files in the assets directory.
 
     Args:
         assets_dir: Path to assets/wordlists directory
+        max_issues: Per-file issue limit, as in validate_wordlist
 
     Returns:
         Dictionary mapping filepath to validation results
@@ -134,8 +186,14 @@ def validate_all_wordlists(assets_dir: Optional[str] = None) -> dict:
     assets_path = Path(assets_dir)
     results = {}
 
-    for json_file in assets_path.rglob('*.json'):
-        results[str(json_file)] = validate_wordlist(str(json_file))
+    # Files are independent and parsing is CPU-bound, so validate them in
+    # separate processes; reports are printed here, in file order
+    paths = [str(json_file) for json_file in assets_path.rglob('*.json')]
+    workers = min(len(paths), os.cpu_count() or 1) or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for filepath, result in zip(paths, pool.map(validate_wordlist, paths, [False] * len(paths), [max_issues] * len(paths))):
+            print_report(result)
+            results[filepath] = result
 
     # Summary
     print("\n" + "="*60)
@@ -158,19 +216,36 @@ def validate_all_wordlists(assets_dir: Optional[str] = None) -> dict:
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python validate_wordlist.py <path_to_wordlist.json>")
-        print("       python validate_wordlist.py --all")
+    parser = argparse.ArgumentParser(description='Validate word list JSON files')
+    parser.add_argument(
+        'path',
+        nargs='?',
+        help='Wordlist JSON file to validate'
+    )
+    parser.add_argument(
+        '--all',
+        action='store_true',
+        help='Validate all wordlists in assets'
+    )
+    parser.add_argument(
+        '--fail-fast',
+        action='store_true',
+        help='Stop checking a file at its first issue'
+    )
+
+    args = parser.parse_args()
+    if not args.all and args.path is None:
+        parser.print_usage()
         sys.exit(1)
 
-    arg = sys.argv[1]
+    max_issues = 1 if args.fail_fast else None
 
-    if arg == '--all':
-        results = validate_all_wordlists()
+    if args.all:
+        results = validate_all_wordlists(max_issues=max_issues)
         all_valid = all(r['valid'] for r in results.values())
         sys.exit(0 if all_valid else 1)
     else:
-        result = validate_wordlist(arg)
+        result = validate_wordlist(args.path, max_issues=max_issues)
         sys.exit(0 if result['valid'] else 1)
 
 
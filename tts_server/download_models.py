@@ -6,7 +6,7 @@ This script downloads the TTS model files and extracts them to the correct locat
 Run this once before using TTS in the app.
 
 Usage:
-    python download_models.py [model_name]
+    python download_models.py [model_name] [--concurrency N] [--force]
 
 Models:
     en-us   - English (US) - LibriTTS medium (default)
@@ -15,13 +15,22 @@ Models:
     zh      - Chinese + English - Melo TTS
 """
 
+import argparse
+import hashlib
+import http.client
 import os
 import sys
+import subprocess
 import tarfile
+import threading
+import time
+import urllib.error
 import urllib.request
 import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+# An entry may also set 'sha256' to the archive's checksum, which downloads are verified against
 MODELS = {
     'en-us': {
         'name': 'vits-piper-en_US-libritts_r-medium',
@@ -41,6 +50,24 @@ MODELS = {
     },
 }
 
+# Multi-threaded bzip2 decoders, used for extraction when installed
+PARALLEL_BZIP2 = ['lbzip2', 'pbzip2']
+
+# Attempts per model, and seconds without data before a read fails
+DOWNLOAD_ATTEMPTS = 3
+DOWNLOAD_TIMEOUT = 60
+
+# Read size for the download and extraction streams; tarfile's default
+# 10 KiB record size means a Python-level read per few packets
+READ_SIZE = 1024 * 1024
+
+# Size of each byte range fetched by --concurrency downloads
+CHUNK_SIZE = 16 * 1024 * 1024
+
+# Written to tts_models after an install, recording which archive its files came from
+INSTALLED_MARKER = '.installed_model'
+MODEL_FILES = ['model.onnx', 'tokens.txt']
+
 def get_app_data_dir():
     """Get the app's documents directory based on platform."""
     if sys.platform == 'win32':
@@ -50,20 +77,255 @@ def get_app_data_dir():
     else:
         return Path.home() / '.local' / 'share' / 'wordmaster'
 
-def download_file(url, dest_path):
-    """Download a file with progress indicator."""
-    print(f"Downloading: {url}")
-    print(f"To: {dest_path}")
+class ProgressReader:
+    """Wrap a download response and print progress as it is read, resuming it if the connection drops."""
+
+    def __init__(self, response, url):
+        self.response = response
+        self.url = url
+        self.total_size = int(response.headers.get('Content-Length') or 0)
+        self.read_size = 0
+        self.resumes = 0
+        self.percent = None
+        self.sha256 = hashlib.sha256()
+
+    def read(self, size=-1):
+        while True:
+            try:
+                data = self.response.read(size)
+                if not data and size and self.read_size < self.total_size:
+                    # urllib returns a short body when the connection drops
+                    raise http.client.IncompleteRead(b'', self.total_size - self.read_size)
+                break
+            except (http.client.HTTPException, ConnectionError, TimeoutError) as e:
+                self.resume(e)
+        self.read_size += len(data)
+        self.sha256.update(data)
+        if self.total_size:
+            percent = int(self.read_size * 100 / self.total_size)
+            # Only redraw when the number changes, not on every read
+            if percent != self.percent:
+                self.percent = percent
+                print(f"\rProgress: {percent}%", end='', flush=True)
+        return data
+
+    def resume(self, error):
+        """Continue the download from the current offset with a Range request, or re-raise error."""
+        if not self.total_size or self.resumes >= DOWNLOAD_ATTEMPTS:
+            raise error
+        self.resumes += 1
+        print(f"\nConnection lost ({error}), resuming from byte {self.read_size}...")
+        self.response.close()
+
+        request = urllib.request.Request(self.url, headers={'Range': f'bytes={self.read_size}-'})
+        try:
+            response = urllib.request.urlopen(request, timeout=DOWNLOAD_TIMEOUT)
+        except (urllib.error.URLError, http.client.HTTPException, OSError):
+            raise error
+        # Anything but the requested tail means starting the download over
+        content_range = response.headers.get('Content-Range', '')
+        if response.status != 206 or not content_range.startswith(f'bytes {self.read_size}-'):
+            response.close()
+            raise error
+        self.response = response
 
-    def progress_hook(count, block_size, total_size):
-        percent = int(count * block_size * 100 / total_size)
-        print(f"\rProgress: {percent}%", end='', flush=True)
+    def close(self):
+        self.response.close()
+
+def strip_top_dir(tar):
+    """Yield the members of a model archive with its top-level directory removed from their paths."""
+    for member in tar:
+        _, _, member.name = member.name.partition('/')
+        if not member.name:
+            continue  # the top-level directory itself
+        if member.islnk():
+            _, _, member.linkname = member.linkname.partition('/')
+        yield member
+
+def extract_with_decoder(decoder, source, dest_dir):
+    """Extract a .tar.bz2 stream, decompressing it with an external bzip2 decoder."""
+    proc = subprocess.Popen([decoder, '-dc'], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    feed_errors = []
+
+    def feed():
+        # Download on this thread while the main thread unpacks the output
+        try:
+            shutil.copyfileobj(source, proc.stdin, READ_SIZE)
+        except Exception as e:
+            feed_errors.append(e)
+        finally:
+            proc.stdin.close()
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    try:
+        with tarfile.open(fileobj=proc.stdout, mode='r|', bufsize=READ_SIZE, copybufsize=READ_SIZE) as tar:
+            tar.extractall(dest_dir, members=strip_top_dir(tar))
+    except BaseException:
+        proc.kill()
+        feeder.join()
+        # A failed download truncates the stream; report that, not the tar error
+        if feed_errors:
+            raise feed_errors[0]
+        raise
+    finally:
+        feeder.join()
+        proc.stdout.close()
+        proc.wait()
+
+    if feed_errors:
+        raise feed_errors[0]
+    if proc.returncode != 0:
+        raise RuntimeError(f"{decoder} exited with status {proc.returncode}")
+
+def extract_archive(source, dest_dir):
+    """Extract a model's .tar.bz2 stream, read sequentially from source, into dest_dir."""
+    decoder = next(filter(None, map(shutil.which, PARALLEL_BZIP2)), None)
+    if decoder is not None:
+        extract_with_decoder(decoder, source, dest_dir)
+    else:
+        with tarfile.open(fileobj=source, mode='r|bz2', bufsize=READ_SIZE, copybufsize=READ_SIZE) as tar:
+            tar.extractall(dest_dir, members=strip_top_dir(tar))
+
+def check_sha256(url, digest, expected):
+    """Raise if an archive's checksum is not the expected one (if any)."""
+    if expected is not None and digest != expected.lower():
+        raise ValueError(f"Checksum mismatch for {url}: expected sha256 {expected}, got {digest}")
+
+def download_and_extract(url, dest_dir, sha256=None):
+    """Download a .tar.bz2 archive and extract it as it arrives, with progress indicator."""
+    print(f"Downloading: {url}")
+    print(f"Extracting to: {dest_dir}")
 
-    urllib.request.urlretrieve(url, dest_path, progress_hook)
+    # The archive is read sequentially, so it is decompressed and unpacked
+    # while downloading and never written to disk
+    with urllib.request.urlopen(url, timeout=DOWNLOAD_TIMEOUT) as response:
+        source = ProgressReader(response, url)
+        try:
+            extract_archive(source, dest_dir)
+            # Drain anything tarfile left after the end-of-archive marker, so it is hashed too
+            while source.read(READ_SIZE):
+                pass
+        finally:
+            source.close()
     print()  # New line after progress
 
+    # The digest is only known once the whole stream has been unpacked
+    try:
+        check_sha256(url, source.sha256.hexdigest(), sha256)
+    except ValueError:
+        print("The extracted model files are from a bad download and may be corrupt.")
+        raise
+
+def fetch_range(url, path, start, end):
+    """Download bytes start..end (inclusive) of url into the same offsets of path."""
+    request = urllib.request.Request(url, headers={'Range': f'bytes={start}-{end}'})
+    with urllib.request.urlopen(request, timeout=DOWNLOAD_TIMEOUT) as response:
+        if response.status != 206:
+            raise RuntimeError(f"Server ignored the byte range request (HTTP {response.status})")
+        with open(path, 'r+b') as f:
+            f.seek(start)
+            shutil.copyfileobj(response, f, READ_SIZE)
+            received = f.tell() - start
+    if received != end - start + 1:
+        raise http.client.IncompleteRead(b'', end - start + 1 - received)
+    return received
+
+def download_parallel(url, dest_dir, concurrency, sha256=None):
+    """Download a .tar.bz2 archive as concurrent byte ranges, then extract it."""
+    # Resolve redirects once; the ranges are fetched from the final URL
+    head = urllib.request.Request(url, method='HEAD')
+    with urllib.request.urlopen(head, timeout=DOWNLOAD_TIMEOUT) as response:
+        total_size = int(response.headers.get('Content-Length') or 0)
+        accepts_ranges = response.headers.get('Accept-Ranges') == 'bytes'
+        resolved_url = response.url
+    if not total_size or not accepts_ranges:
+        print("Server does not support byte ranges, downloading as a single stream")
+        download_and_extract(url, dest_dir, sha256)
+        return
+
+    archive_path = dest_dir / url.rsplit('/', 1)[-1]
+    print(f"Downloading: {url} ({concurrency} connections)")
+
+    try:
+        with open(archive_path, 'wb') as f:
+            f.truncate(total_size)
+
+        ranges = [(start, min(start + CHUNK_SIZE, total_size) - 1)
+                  for start in range(0, total_size, CHUNK_SIZE)]
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [pool.submit(fetch_range, resolved_url, archive_path, start, end)
+                       for start, end in ranges]
+            read_size = 0
+            try:
+                for future in as_completed(futures):
+                    read_size += future.result()
+                    print(f"\rProgress: {int(read_size * 100 / total_size)}%", end='', flush=True)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        print()  # New line after progress
+
+        # The archive is complete on disk, so it is checked before anything is unpacked
+        if sha256 is not None:
+            digest = hashlib.sha256()
+            with open(archive_path, 'rb') as f:
+                while data := f.read(READ_SIZE):
+                    digest.update(data)
+            check_sha256(url, digest.hexdigest(), sha256)
+
+        print(f"Extracting to: {dest_dir}")
+        with open(archive_path, 'rb') as f:
+            extract_archive(f, dest_dir)
+    finally:
+        archive_path.unlink(missing_ok=True)
+
+def is_retryable(error):
+    """Check whether a download failed for a reason worth retrying (5xx, 429, dropped connection)."""
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code >= 500 or error.code == 429
+    return isinstance(error, (urllib.error.URLError, http.client.HTTPException, ConnectionError, TimeoutError))
+
+def download_with_retries(url, dest_dir, concurrency=1, sha256=None):
+    """Download and extract an archive, starting over after transient network errors."""
+    for attempt in range(1, DOWNLOAD_ATTEMPTS + 1):
+        try:
+            if concurrency > 1:
+                download_parallel(url, dest_dir, concurrency, sha256)
+            else:
+                download_and_extract(url, dest_dir, sha256)
+            return
+        except Exception as e:
+            if attempt == DOWNLOAD_ATTEMPTS or not is_retryable(e):
+                raise
+            delay = 2 ** attempt
+            print(f"\nDownload failed: {e}")
+            print(f"Retrying in {delay}s (attempt {attempt + 1}/{DOWNLOAD_ATTEMPTS})...")
+            time.sleep(delay)
+
+def install_record(model):
+    """Return the marker contents for a model installed from its current archive."""
+    return f"{model['url']}\n{model.get('sha256', '')}\n"
+
+def is_installed(model, models_dir):
+    """Check whether models_dir already holds this model's files."""
+    try:
+        recorded = (models_dir / INSTALLED_MARKER).read_text(encoding='utf-8')
+    except FileNotFoundError:
+        return False
+    return recorded == install_record(model) and all((models_dir / name).is_file() for name in MODEL_FILES)
+
 def main():
-    model_key = sys.argv[1] if len(sys.argv) > 1 else 'en-us'
+    parser = argparse.ArgumentParser(description='Download sherpa-onnx TTS models for WordMaster')
+    parser.add_argument('model', nargs='?', default='en-us', help='Model to download (default: en-us)')
+    parser.add_argument(
+        '--concurrency', type=int, default=1,
+        help='Download the archive over this many connections (default: 1, streamed straight into extraction)'
+    )
+    parser.add_argument('--force', action='store_true', help='Download the model even if it is already installed')
+    args = parser.parse_args()
+    model_key = args.model
 
     if model_key not in MODELS:
         print(f"Unknown model: {model_key}")
@@ -71,40 +333,26 @@ def main():
         sys.exit(1)
 
     model = MODELS[model_key]
-    print(f"Downloading TTS model: {model['name']}")
 
-    # Create directories
     app_dir = get_app_data_dir()
     tts_models_dir = app_dir / 'tts_models'
+    if not args.force and is_installed(model, tts_models_dir):
+        print(f"TTS model {model['name']} is already installed in {tts_models_dir}")
+        print("Use --force to download it again.")
+        return
+
+    print(f"Downloading TTS model: {model['name']}")
+
+    # Create directories
     tts_models_dir.mkdir(parents=True, exist_ok=True)
 
-    # Download the model archive
-    archive_path = tts_models_dir / f"{model['name']}.tar.bz2"
-    download_file(model['url'], archive_path)
-
-    # Extract the archive
-    print(f"Extracting to: {tts_models_dir}")
-    with tarfile.open(archive_path, 'r:bz2') as tar:
-        tar.extractall(tts_models_dir)
-
-    # Move files to the expected location
-    extracted_dir = tts_models_dir / model['name']
-    if extracted_dir.exists():
-        # Copy model files to root of tts_models
-        for item in extracted_dir.iterdir():
-            dest = tts_models_dir / item.name
-            if dest.exists():
-                if dest.is_dir():
-                    shutil.rmtree(dest)
-                else:
-                    dest.unlink()
-            shutil.move(str(item), str(dest))
-
-        # Clean up extracted directory
-        extracted_dir.rmdir()
-
-    # Clean up archive
-    archive_path.unlink()
+    # The files are about to be overwritten, so the old record no longer holds
+    marker = tts_models_dir / INSTALLED_MARKER
+    marker.unlink(missing_ok=True)
+
+    # Download the model archive and extract its files to the root of tts_models
+    download_with_retries(model['url'], tts_models_dir, args.concurrency, model.get('sha256'))
+    marker.write_text(install_record(model), encoding='utf-8')
 
     print(f"\nModel installed successfully!")
     print(f"Location: {tts_models_dir}")
@@ -11,6 +11,7 @@ API Endpoints:
     GET /health                              -> Health check
 """
 
+import importlib.util
 import subprocess
 import sys
 import os
@@ -36,6 +37,16 @@ def main():
         "--port", port,
     ]
 
+    if os.name != "nt":
+        if importlib.util.find_spec("TTS") is None:
+            print("Error: No module named 'TTS'")
+            print("\nMake sure TTS is installed: pip install TTS")
+            sys.exit(1)
+        # Replace this process with the server, so signals and the exit
+        # status go straight to it instead of through a waiting parent
+        sys.stdout.flush()
+        os.execv(sys.executable, cmd)
+
     try:
         subprocess.run(cmd, check=True)
     except KeyboardInterrupt: